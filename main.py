@@ -11,13 +11,21 @@ from pathlib import Path
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
-from mcp_server import MultiModelMCPServer
+from mcp_server import MultiModelMCPServer, parse_args
+from profiling import install_uvloop
 
-async def main():
+async def main(args):
     """Main entry point"""
     print("Starting Multi-Model Debate MCP Server...")
     server = MultiModelMCPServer()
+    if args.profile:
+        server.enable_profiling(args.profile_dir, args.profile_sample_rate, args.lag_threshold_ms)
+    if args.record:
+        server.start_recording(args.record)
     await server.run()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    args = parse_args()
+    if args.uvloop:
+        install_uvloop()
+    asyncio.run(main(args))
\ No newline at end of file
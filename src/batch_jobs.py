@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Batch Jobs
+Offline bulk generation through the Anthropic Message Batches API, with a local stand-in
+"""
+
+import json
+import time
+import uuid
+import random
+import sqlite3
+import asyncio
+import hashlib
+import logging
+from types import SimpleNamespace
+from typing import List, Dict, Optional, Any, Callable, Tuple
+
+try:
+    from .tracing import detached_task
+except ImportError:
+    from tracing import detached_task
+
+logger = logging.getLogger(__name__)
+
+# Result states for individual prompts, mirroring the Batches API result types
+PENDING = "pending"
+SUCCEEDED = "succeeded"
+
+
+def prompt_hash(params: Dict[str, Any]) -> str:
+    """Stable key for a request, used as the batch custom_id and result key"""
+    encoded = json.dumps(params, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()[:32]
+
+
+class BatchStore:
+    """SQLite persistence for submitted batches and per-prompt results"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS batches (
+                batch_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                request_count INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS results (
+                prompt_hash TEXT PRIMARY KEY,
+                batch_id TEXT,
+                status TEXT NOT NULL,
+                text TEXT,
+                input_tokens INTEGER DEFAULT 0,
+                output_tokens INTEGER DEFAULT 0,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS results_by_batch ON results(batch_id);
+            CREATE TABLE IF NOT EXISTS batch_owners (
+                batch_id TEXT PRIMARY KEY,
+                channel_id TEXT,
+                persona TEXT
+            );
+        ''')
+        self.conn.commit()
+
+    def add_batch(self, batch_id: str, hashes: List[str], channel_id: Optional[str] = None,
+                  persona: Optional[str] = None):
+        """Record a submitted batch, the channel and persona its usage is charged to, and mark its prompts pending"""
+        now = time.time()
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO batches VALUES (?, ?, ?, ?)",
+                (batch_id, "in_progress", len(hashes), now)
+            )
+            self.conn.execute("INSERT OR REPLACE INTO batch_owners VALUES (?, ?, ?)", (batch_id, channel_id, persona))
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO results (prompt_hash, batch_id, status, updated_at) VALUES (?, ?, ?, ?)",
+                [(h, batch_id, PENDING, now) for h in hashes]
+            )
+
+    def set_batch_status(self, batch_id: str, status: str):
+        with self.conn:
+            self.conn.execute("UPDATE batches SET status = ? WHERE batch_id = ?", (status, batch_id))
+
+    def store_result(self, key: str, batch_id: str, status: str, text: Optional[str],
+                     input_tokens: int = 0, output_tokens: int = 0):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, batch_id, status, text, input_tokens, output_tokens, time.time())
+            )
+
+    def known_hashes(self, hashes: List[str]) -> set:
+        """Hashes already pending or succeeded (failed prompts may be resubmitted)"""
+        if not hashes:
+            return set()
+        placeholders = ",".join("?" * len(hashes))
+        rows = self.conn.execute(
+            f"SELECT prompt_hash FROM results WHERE status IN (?, ?) AND prompt_hash IN ({placeholders})",
+            [PENDING, SUCCEEDED, *hashes]
+        ).fetchall()
+        return {row[0] for row in rows}
+
+    def pending_batches(self) -> List[str]:
+        rows = self.conn.execute("SELECT batch_id FROM batches WHERE status != 'ended'").fetchall()
+        return [row[0] for row in rows]
+
+    def get_batch(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute(
+            "SELECT batch_id, status, request_count, created_at FROM batches WHERE batch_id = ?", (batch_id,)
+        ).fetchone()
+        if not row:
+            return None
+
+        counts = dict(self.conn.execute(
+            "SELECT status, COUNT(*) FROM results WHERE batch_id = ? GROUP BY status", (batch_id,)
+        ).fetchall())
+        return {'batch_id': row[0], 'status': row[1], 'request_count': row[2], 'created_at': row[3], 'results': counts}
+
+    def batch_owner(self, batch_id: str) -> Tuple[Optional[str], Optional[str]]:
+        """(channel_id, persona) a batch was submitted for"""
+        row = self.conn.execute(
+            "SELECT channel_id, persona FROM batch_owners WHERE batch_id = ?", (batch_id,)
+        ).fetchone()
+        return (row[0], row[1]) if row else (None, None)
+
+    def get_result(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute(
+            "SELECT prompt_hash, batch_id, status, text, input_tokens, output_tokens FROM results WHERE prompt_hash = ?",
+            (key,)
+        ).fetchone()
+        if not row:
+            return None
+        return dict(zip(('prompt_hash', 'batch_id', 'status', 'text', 'input_tokens', 'output_tokens'), row))
+
+    def close(self):
+        self.conn.close()
+
+
+class FakeBatchClient:
+    """Local stand-in for the Message Batches endpoint, shaped like anthropic.Anthropic"""
+
+    def __init__(self, responder: Optional[Callable[[Dict[str, Any]], str]] = None, polls_until_done: int = 1):
+        self.responder = responder or (lambda params: f"[batch] {params['messages'][-1]['content'][:80]}")
+        self.polls_until_done = polls_until_done
+        self.batches: Dict[str, Dict[str, Any]] = {}
+        self.messages = SimpleNamespace(batches=SimpleNamespace(
+            create=self._create, retrieve=self._retrieve, results=self._results
+        ))
+
+    def _create(self, requests: List[Dict[str, Any]], **kwargs):
+        batch_id = f"msgbatch_fake_{uuid.uuid4().hex[:12]}"
+        self.batches[batch_id] = {'requests': list(requests), 'polls': 0}
+        return SimpleNamespace(id=batch_id, processing_status="in_progress")
+
+    def _retrieve(self, batch_id: str, **kwargs):
+        batch = self.batches[batch_id]
+        batch['polls'] += 1
+        status = "ended" if batch['polls'] >= self.polls_until_done else "in_progress"
+        return SimpleNamespace(id=batch_id, processing_status=status)
+
+    def _results(self, batch_id: str, **kwargs):
+        for request in self.batches[batch_id]['requests']:
+            text = self.responder(request['params'])
+            message = SimpleNamespace(
+                content=[SimpleNamespace(text=text)],
+                usage=SimpleNamespace(input_tokens=len(str(request['params'])) // 4, output_tokens=len(text) // 4)
+            )
+            yield SimpleNamespace(
+                custom_id=request['custom_id'],
+                result=SimpleNamespace(type=SUCCEEDED, message=message)
+            )
+
+
+class BatchJobManager:
+    """Packs prompts into batches, polls them in the background and persists results by prompt hash"""
+
+    def __init__(self, client, store: BatchStore, poll_interval: float = 30.0, max_batch_size: int = 10000,
+                 max_poll_failures: int = 10, retry_base_delay: float = 1.0, retry_max_delay: float = 300.0,
+                 on_usage: Callable[[Optional[str], Optional[str], int, int], None] = None):
+        self.client = client
+        self.store = store
+        # Called with (channel_id, persona, input tokens, output tokens) once a batch's results are stored
+        self.on_usage = on_usage
+        self.poll_interval = poll_interval
+        self.max_batch_size = max_batch_size
+        self.max_poll_failures = max_poll_failures
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.poll_retries = 0
+        self.poll_tasks: Dict[str, asyncio.Task] = {}
+
+    async def submit(self, requests: List[Dict[str, Any]], channel_id: Optional[str] = None,
+                     persona: Optional[str] = None) -> Dict[str, Any]:
+        """Submit Messages API params in bulk; already known prompts are not resent"""
+        keyed = {prompt_hash(params): params for params in requests}
+        known = self.store.known_hashes(list(keyed))
+        fresh = [(key, params) for key, params in keyed.items() if key not in known]
+
+        batch_ids = []
+        for offset in range(0, len(fresh), self.max_batch_size):
+            chunk = fresh[offset:offset + self.max_batch_size]
+            batch = await asyncio.to_thread(
+                self.client.messages.batches.create,
+                requests=[{'custom_id': key, 'params': params} for key, params in chunk]
+            )
+            self.store.add_batch(batch.id, [key for key, _ in chunk], channel_id, persona)
+            self.start_polling(batch.id)
+            batch_ids.append(batch.id)
+
+        logger.info(f"Batch submit: {len(fresh)} new prompts in {len(batch_ids)} batches, {len(known)} already known")
+        return {'batch_ids': batch_ids, 'prompt_hashes': list(keyed), 'reused': len(known)}
+
+    def start_polling(self, batch_id: str):
+        """Poll a batch in the background until it ends"""
+        task = self.poll_tasks.get(batch_id)
+        if task is None or task.done():
+            self.poll_tasks[batch_id] = detached_task(self.poll(batch_id))
+
+    async def poll(self, batch_id: str):
+        """Wait for a batch to end, then persist its results; failed checks are retried with backoff"""
+        failures = 0
+        try:
+            while True:
+                try:
+                    batch = await asyncio.to_thread(self.client.messages.batches.retrieve, batch_id)
+                    if batch.processing_status == "ended":
+                        input_tokens, output_tokens = await asyncio.to_thread(self.collect_results, batch_id)
+                        self.store.set_batch_status(batch_id, "ended")
+                        if self.on_usage is not None:
+                            self.on_usage(*self.store.batch_owner(batch_id), input_tokens, output_tokens)
+                        logger.info(f"Batch {batch_id} ended, results stored")
+                        return
+                    failures = 0
+                    delay = self.poll_interval
+                except Exception as e:
+                    failures += 1
+                    if failures >= self.max_poll_failures:
+                        logger.warning(f"Polling batch {batch_id} failed {failures} times, will resume on next start: "
+                                       f"{str(e)[:200]}")
+                        return
+                    self.poll_retries += 1
+                    delay = min(self.retry_base_delay * (2 ** (failures - 1)) + random.uniform(0, 1),
+                                self.retry_max_delay)
+                    logger.warning(f"Polling batch {batch_id} failed, retrying in {delay:.2f}s: {str(e)[:200]}")
+                await asyncio.sleep(delay)
+        finally:
+            self.poll_tasks.pop(batch_id, None)
+
+    def collect_results(self, batch_id: str) -> Tuple[int, int]:
+        """Stream batch results into the store; returns the batch's total (input, output) tokens"""
+        input_total = output_total = 0
+        for item in self.client.messages.batches.results(batch_id):
+            result = item.result
+            if result.type == SUCCEEDED:
+                usage = getattr(result.message, 'usage', None)
+                input_tokens = getattr(usage, 'input_tokens', 0) or 0
+                output_tokens = getattr(usage, 'output_tokens', 0) or 0
+                input_total += input_tokens
+                output_total += output_tokens
+                self.store.store_result(
+                    item.custom_id, batch_id, SUCCEEDED, result.message.content[0].text, input_tokens, output_tokens
+                )
+            else:
+                self.store.store_result(item.custom_id, batch_id, result.type, None)
+        return input_total, output_total
+
+    def resume(self) -> List[str]:
+        """Restart polling for batches that had not ended before a restart"""
+        pending = self.store.pending_batches()
+        for batch_id in pending:
+            self.start_polling(batch_id)
+        if pending:
+            logger.info(f"Resumed polling for {len(pending)} batches")
+        return pending
+
+    async def wait(self):
+        """Wait for all in-flight polls (used by tests and shutdown)"""
+        if self.poll_tasks:
+            await asyncio.gather(*self.poll_tasks.values(), return_exceptions=True)
+
+    def get_batch(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.get_batch(batch_id)
+
+    def get_result(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.store.get_result(key)
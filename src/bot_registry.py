@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Bot Registry
+Mattermost bot identity per persona: pooled pre-authenticated session, cached user ID and a rate-limit bucket per bot
+"""
+
+import os
+import time
+import asyncio
+import logging
+from typing import List, Dict, Optional, Any
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Persona whose bot token also authenticates the server's own reads
+DEFAULT_PERSONA = "claude-research"
+
+
+def token_env_for(persona: str, persona_config: dict) -> str:
+    """Environment variable holding a persona's bot token (personas.<name>.bot_token_env, else <NAME>_BOT_TOKEN)"""
+    return persona_config.get('bot_token_env') or f"{persona.upper().replace('-', '_')}_BOT_TOKEN"
+
+
+def read_token(env: str) -> Optional[str]:
+    """Token from the environment; unset and .env.example placeholders count as missing"""
+    token = os.getenv(env)
+    if not token or token.startswith("your_"):
+        return None
+    return token
+
+
+class RateBucket:
+    """Token bucket: burst requests at once, then rate_per_second; waiters reserve slots so concurrent posts queue fairly"""
+
+    def __init__(self, rate_per_second: float, burst: int):
+        self.rate = rate_per_second
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.throttled = 0
+
+    def reserve(self, now: float = None) -> float:
+        """Take a slot; returns how long the caller must wait for it"""
+        now = now if now is not None else time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return max(0.0, -self.tokens / self.rate)
+
+    async def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            self.throttled += 1
+            await asyncio.sleep(wait)
+
+
+class BotIdentity:
+    """One Mattermost bot account; token None means the server's own token, supplied per request"""
+
+    def __init__(self, name: str, token: Optional[str], rate_per_second: float = 10, burst: int = 10,
+                 pool_size: int = 10):
+        self.name = name
+        self.token = token
+        self.personas: List[str] = []
+        self.user_id: Optional[str] = None
+        self.username: Optional[str] = None
+        self.requests = 0
+        self.bucket = RateBucket(rate_per_second, burst)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'personas': self.personas,
+            'user': self.username or self.user_id,
+            'requests': self.requests,
+            'throttled': self.bucket.throttled
+        }
+
+
+class BotRegistry:
+    """Bot identities for the configured personas, one per distinct token; lookups are dict hits"""
+
+    def __init__(self, default: BotIdentity):
+        self.default = default
+        self.bots: Dict[str, BotIdentity] = {}
+        self.aliases: Dict[str, BotIdentity] = {}
+
+    @classmethod
+    def from_config(cls, config: dict) -> "BotRegistry":
+        settings = config.get('mattermost_bots', {}) or {}
+        limits = {
+            'rate_per_second': settings.get('rate_per_second', 10),
+            'burst': settings.get('burst', 10),
+            'pool_size': settings.get('pool_size', 10)
+        }
+        personas = config.get('personas', {}) or {}
+        default_config = personas.get(DEFAULT_PERSONA) or {}
+        registry = cls(BotIdentity(DEFAULT_PERSONA, read_token(token_env_for(DEFAULT_PERSONA, default_config)), **limits))
+        registry.bots[DEFAULT_PERSONA] = registry.default
+
+        by_token = {registry.default.token: registry.default} if registry.default.token else {}
+        for persona, persona_config in personas.items():
+            persona_config = persona_config or {}
+            if persona == DEFAULT_PERSONA:
+                bot = registry.default
+            else:
+                token_env = token_env_for(persona, persona_config)
+                token = read_token(token_env)
+                if token is None:
+                    logger.info(f"{token_env} not set - {persona} posts as {DEFAULT_PERSONA}")
+                    bot = registry.default
+                elif token in by_token:
+                    bot = by_token[token]
+                else:
+                    bot = by_token[token] = registry.bots[persona] = BotIdentity(persona, token, **limits)
+            bot.personas.append(persona)
+            registry.register_aliases(persona, persona_config, bot)
+        return registry
+
+    def register_aliases(self, persona: str, persona_config: dict, bot: BotIdentity):
+        """Persona key, display name and their -/_ spellings all resolve to the bot"""
+        for alias in (persona, persona_config.get('name') or persona):
+            alias = alias.lower()
+            for spelling in (alias, alias.replace('-', '_'), alias.replace('_', '-')):
+                self.aliases.setdefault(spelling, bot)
+
+    def for_persona(self, persona: Optional[str]) -> BotIdentity:
+        """Bot a persona posts as (the server bot for unknown personas)"""
+        if not persona:
+            return self.default
+        return self.aliases.get(persona.lower(), self.default)
+
+    def identities(self) -> List[BotIdentity]:
+        return list(self.bots.values())
+
+    def remember_user(self, bot: BotIdentity, user: Any):
+        """Cache the bot's own user (from /users/me) so its posts never need a username lookup"""
+        bot.user_id = user.get('id')
+        bot.username = user.get('username')
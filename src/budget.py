@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Budget Governor
+Leaky-bucket token budgets per channel and persona, with graceful degradation
+"""
+
+import time
+from typing import Dict, Optional, Any, Tuple
+
+# Budget states, from cheapest intervention to refusal
+OK = "ok"
+DEGRADE = "degrade"      # stay on the cheap tier
+SHRINK = "shrink"        # cheap tier with a reduced max_tokens
+EXHAUSTED = "exhausted"  # no model calls until the bucket drains
+
+
+class LeakyBucket:
+    """Token usage that drains linearly, so capacity is spend per window"""
+
+    def __init__(self, capacity: float, window_seconds: float):
+        self.capacity = capacity
+        self.leak_rate = capacity / window_seconds
+        self.level = 0.0
+        self.updated = time.monotonic()
+        self.total = 0
+
+    def _drain(self, now: float):
+        elapsed = max(0.0, now - self.updated)
+        self.level = max(0.0, self.level - elapsed * self.leak_rate)
+        self.updated = now
+
+    def add(self, amount: int, now: float = None):
+        """Pour used tokens into the bucket"""
+        self._drain(now if now is not None else time.monotonic())
+        self.level += amount
+        self.total += amount
+
+    def utilization(self, now: float = None) -> float:
+        """Current level as a fraction of capacity (may exceed 1.0)"""
+        self._drain(now if now is not None else time.monotonic())
+        return self.level / self.capacity if self.capacity else 0.0
+
+
+class BudgetGovernor:
+    """Tracks API token usage and decides how much model each call may use"""
+
+    def __init__(self, budgets_config: dict = None):
+        budgets_config = budgets_config or {}
+        self.enabled = budgets_config.get('enabled', True)
+        self.window_seconds = budgets_config.get('window_seconds', 3600)
+        self.capacities = {
+            'channel': budgets_config.get('channel_tokens_per_window', 200000),
+            'persona': budgets_config.get('persona_tokens_per_window', 100000)
+        }
+        self.degrade_at = budgets_config.get('degrade_at', 0.7)
+        self.shrink_at = budgets_config.get('shrink_at', 0.9)
+        self.shrunk_max_tokens = budgets_config.get('shrunk_max_tokens', 150)
+        self.buckets: Dict[Tuple[str, str], LeakyBucket] = {}
+
+    @classmethod
+    def from_config(cls, config: dict) -> "BudgetGovernor":
+        return cls(config.get('budgets', {}))
+
+    def _bucket(self, scope: str, key: str) -> LeakyBucket:
+        bucket = self.buckets.get((scope, key))
+        if bucket is None:
+            bucket = LeakyBucket(self.capacities[scope], self.window_seconds)
+            self.buckets[(scope, key)] = bucket
+        return bucket
+
+    def record(self, channel: str, persona: Optional[str], input_tokens: int, output_tokens: int, now: float = None):
+        """Charge usage reported by the API to the channel and persona buckets"""
+        used = input_tokens + output_tokens
+        self._bucket('channel', channel).add(used, now)
+        self._bucket('persona', persona or 'unknown').add(used, now)
+
+    def assess(self, channel: str, persona: Optional[str], now: float = None) -> Tuple[str, float]:
+        """Budget state for a call, driven by the tightest of its buckets"""
+        if not self.enabled:
+            return OK, 0.0
+
+        utilization = max(
+            self._bucket('channel', channel).utilization(now),
+            self._bucket('persona', persona or 'unknown').utilization(now)
+        )
+        if utilization >= 1.0:
+            return EXHAUSTED, utilization
+        if utilization >= self.shrink_at:
+            return SHRINK, utilization
+        if utilization >= self.degrade_at:
+            return DEGRADE, utilization
+        return OK, utilization
+
+    def snapshot(self, now: float = None) -> Dict[str, Dict[str, Any]]:
+        """Current burn per bucket, for the get_budget_status tool"""
+        report = {}
+        for (scope, key), bucket in sorted(self.buckets.items()):
+            utilization = bucket.utilization(now)
+            report[f"{scope}:{key}"] = {
+                'tokens_in_window': int(bucket.level),
+                'capacity': bucket.capacity,
+                'utilization': round(utilization, 3),
+                'total_tokens': bucket.total
+            }
+        return report
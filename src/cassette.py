@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Cassettes
+Record upstream traffic and tool calls to JSON lines, then replay a session against local fakes
+"""
+
+import os
+import sys
+import gzip
+import json
+import time
+import atexit
+import asyncio
+import argparse
+import tempfile
+from collections import deque, Counter
+from types import SimpleNamespace
+from typing import List, Dict, Optional, Any
+
+TOOL = "tool"
+MATTERMOST = "mattermost"
+ANTHROPIC = "anthropic"
+
+
+def _open(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def request_key(method: str, path: str, kwargs: Dict[str, Any]) -> str:
+    return f"{method} {path} {json.dumps(kwargs, sort_keys=True, default=str)}"
+
+
+class CassetteRecorder:
+    """Appends one compact JSON event per line; offsets are seconds since recording started"""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.file = _open(path, "w")
+        self.started = time.monotonic()
+        self.counts: Counter = Counter()
+        atexit.register(self.close)
+
+    def record(self, kind: str, **fields):
+        event = {'t': round(time.monotonic() - self.started, 4), 'kind': kind}
+        event.update(fields)
+        self.file.write(json.dumps(event, separators=(',', ':'), default=str) + "\n")
+        self.counts[kind] += 1
+
+    def record_tool(self, name: str, arguments: dict, result: list, duration_ms: float):
+        self.record(TOOL, name=name, arguments=arguments,
+                    result=[getattr(item, 'text', str(item)) for item in result or []],
+                    ms=round(duration_ms, 2))
+        # Tool calls close a unit of work, so flush here rather than on every upstream event
+        self.file.flush()
+
+    def record_mattermost(self, method: str, path: str, kwargs: dict, response=None,
+                          duration_ms: float = 0, error: BaseException = None):
+        fields = {'method': method, 'path': path, 'request': kwargs, 'ms': round(duration_ms, 2)}
+        if error is not None:
+            fields['error'] = f"{type(error).__name__}: {error}"
+        else:
+            fields['status'] = response.status_code
+            try:
+                fields['body'] = response.json()
+            except Exception:
+                fields['text'] = getattr(response, 'text', "")
+        self.record(MATTERMOST, **fields)
+
+    def record_anthropic(self, params: dict, response=None, duration_ms: float = 0, error: BaseException = None,
+                         provider: str = ANTHROPIC):
+        """Record one model completion; non-Anthropic backends share the stream, tagged with their provider"""
+        fields = {'model': params.get('model'), 'max_tokens': params.get('max_tokens'),
+                  'messages': params.get('messages'), 'ms': round(duration_ms, 2)}
+        if provider != ANTHROPIC:
+            fields['provider'] = provider
+        if error is not None:
+            fields['error'] = f"{type(error).__name__}: {error}"
+        else:
+            usage = getattr(response, 'usage', None)
+            fields['text'] = response.content[0].text
+            fields['usage'] = [getattr(usage, 'input_tokens', 0) or 0, getattr(usage, 'output_tokens', 0) or 0]
+        self.record(ANTHROPIC, **fields)
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+
+def load_cassette(path: str) -> List[Dict[str, Any]]:
+    with _open(path, "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class ReplayedError(Exception):
+    """An upstream failure captured in the cassette"""
+
+
+class ReplayResponse:
+    """Minimal stand-in for requests.Response"""
+
+    def __init__(self, status_code: int, body: Any = None, text: str = ""):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self._body = body
+        self.text = text or (json.dumps(body) if body is not None else "")
+
+    def json(self):
+        if self._body is None:
+            raise ValueError("No JSON body recorded")
+        return self._body
+
+
+class ReplayUpstream:
+    """Serves recorded Mattermost and Anthropic responses in recorded order"""
+
+    def __init__(self, events: List[Dict[str, Any]], speed: float = 0):
+        self.speed = speed
+        self.exact: Dict[str, deque] = {}
+        self.by_route: Dict[str, deque] = {}
+        self.completions: deque = deque()
+        self.counts: Counter = Counter()
+        self.misses: Counter = Counter()
+
+        for event in events:
+            if event['kind'] == MATTERMOST:
+                self.exact.setdefault(request_key(event['method'], event['path'], event['request']),
+                                      deque()).append(event)
+                self.by_route.setdefault(f"{event['method']} {event['path']}", deque()).append(event)
+            elif event['kind'] == ANTHROPIC:
+                self.completions.append(event)
+
+    def attach(self, server):
+        """Point a server's upstream seams at this replay"""
+        server.replay = self
+        server.mattermost = True
+        server.mattermost_token = "replay"
+        server.mattermost_base_url = "replay://mattermost"
+        server.anthropic_client = self
+
+    async def _delay(self, event: Dict[str, Any]):
+        if self.speed:
+            await asyncio.sleep(event.get('ms', 0) / 1000 / self.speed)
+
+    def _take(self, key: str, route: str) -> Optional[Dict[str, Any]]:
+        # Exact request first; if the request drifted (new version, different params) use the next one for the route
+        for queue_ in (self.exact.get(key), self.by_route.get(route)):
+            while queue_:
+                event = queue_.popleft()
+                if not event.get('_used'):
+                    event['_used'] = True
+                    return event
+        return None
+
+    async def mattermost(self, method: str, path: str, **kwargs) -> ReplayResponse:
+        self.counts[MATTERMOST] += 1
+        event = self._take(request_key(method, path, kwargs), f"{method} {path}")
+        if event is None:
+            self.misses[MATTERMOST] += 1
+            return ReplayResponse(404, {'message': f"No recorded response for {method} {path}"})
+        await self._delay(event)
+        if 'error' in event:
+            raise ReplayedError(event['error'])
+        return ReplayResponse(event['status'], event.get('body'), event.get('text', ""))
+
+    async def anthropic(self, params: dict):
+        self.counts[ANTHROPIC] += 1
+        if not self.completions:
+            self.misses[ANTHROPIC] += 1
+            raise ReplayedError("No recorded completion left")
+        event = self.completions.popleft()
+        await self._delay(event)
+        if 'error' in event:
+            raise ReplayedError(event['error'])
+        return SimpleNamespace(
+            content=[SimpleNamespace(text=event['text'])],
+            usage=SimpleNamespace(input_tokens=event['usage'][0], output_tokens=event['usage'][1])
+        )
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def replay_session(server, events: List[Dict[str, Any]], speed: float = 0) -> Dict[str, Any]:
+    """Re-run recorded tool calls in order (gaps divided by speed; 0 = back to back) and report"""
+    upstream = ReplayUpstream(events, speed=speed)
+    upstream.attach(server)
+
+    latencies: Dict[str, List[float]] = {}
+    recorded_upstream = Counter(event['kind'] for event in events if event['kind'] != TOOL)
+    changed = 0
+    previous_t = 0.0
+
+    for event in events:
+        if event['kind'] != TOOL:
+            continue
+        if speed:
+            await asyncio.sleep(max(0.0, event['t'] - previous_t) / speed)
+        previous_t = event['t']
+
+        start = time.perf_counter()
+        result = await server.dispatch_tool(event['name'], event['arguments'])
+        latencies.setdefault(event['name'], []).append((time.perf_counter() - start) * 1000)
+        if [item.text for item in result] != event['result']:
+            changed += 1
+
+    return {
+        'tool_calls': sum(len(values) for values in latencies.values()),
+        'changed_results': changed,
+        'upstream_requests': dict(upstream.counts),
+        'recorded_upstream_requests': dict(recorded_upstream),
+        'unmatched_requests': dict(upstream.misses),
+        'latency_ms': {
+            name: {'count': len(values), 'p50': round(percentile(values, 50), 2),
+                   'p95': round(percentile(values, 95), 2), 'max': round(max(values), 2)}
+            for name, values in sorted(latencies.items())
+        }
+    }
+
+
+async def main(argv: List[str] = None):
+    """Replay a cassette against local fakes and print the report as JSON"""
+    parser = argparse.ArgumentParser(description="Replay a recorded MCP session")
+    parser.add_argument("cassette", help="cassette recorded with --record")
+    parser.add_argument("--speed", type=float, default=0,
+                        help="time compression (10 = ten times faster); 0 replays back to back without delays")
+    parser.add_argument("--config", default="config/chat_coordination_rules.yaml")
+    args = parser.parse_args(argv)
+
+    # Fresh local state so sync cursors and indexes start where the recording did, and no live connection
+    os.environ["MCP_DATA_DIR"] = tempfile.mkdtemp(prefix="mcp-replay-")
+    os.environ.pop("CLAUDE_RESEARCH_BOT_TOKEN", None)
+    try:
+        from .mcp_server import MultiModelMCPServer
+    except ImportError:
+        from mcp_server import MultiModelMCPServer
+
+    server = MultiModelMCPServer(args.config)
+    report = await replay_session(server, load_cassette(args.cassette), speed=args.speed)
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
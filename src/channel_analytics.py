@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Channel Analytics
+Participation, reply-latency and AI-streak figures per channel, updated as posts sync
+"""
+
+import logging
+from collections import deque, OrderedDict
+from typing import List, Dict, Optional, Any, Callable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class RunningLatency:
+    """Count, mean and recent-window percentiles of reply latencies"""
+
+    def __init__(self, window: int = 100):
+        self.count = 0
+        self.total_ms = 0.0
+        self.recent = deque(maxlen=window)
+
+    def add(self, latency_ms: float):
+        self.count += 1
+        self.total_ms += latency_ms
+        self.recent.append(latency_ms)
+
+    def summary(self) -> Dict[str, Any]:
+        ordered = sorted(self.recent)
+        pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] / 1000, 1) if ordered else None
+        return {
+            'replies': self.count,
+            'mean_s': round(self.total_ms / self.count / 1000, 1) if self.count else None,
+            'p50_s': pick(0.5),
+            'p95_s': pick(0.95)
+        }
+
+
+class ChannelStats:
+    """Running aggregates for one channel; each post is applied once, in creation order.
+
+    Only the most recent `recent_posts` post ids are remembered (to correct counts on delete and spot
+    re-synced edits), so deleting an older post leaves it counted.
+    """
+
+    def __init__(self, latency_window: int = 100, recent_posts: int = 5000):
+        self.latency_window = latency_window
+        self.recent_posts = recent_posts
+        self.authors: Dict[str, int] = {}
+        self.post_authors: "OrderedDict[str, str]" = OrderedDict()
+        self.forgotten_through = 0
+        self.ai_posts = 0
+        self.human_posts = 0
+        self.last_applied = 0
+        self.last_human_at: Optional[int] = None
+        self.replied_since_human: set = set()
+        self.latency: Dict[str, RunningLatency] = {}
+        self.current_ai_streak = 0
+        self.longest_ai_streak = 0
+        self.ended_streaks = 0
+        self.ended_streak_posts = 0
+
+    def apply(self, post: Dict[str, Any], author: str, is_ai: bool):
+        if post.get('delete_at'):
+            # Deletions only correct the counts; sequence figures stay as they were observed
+            previous, _ = self.post_authors.pop(post['id'], (None, None))
+            if previous is not None:
+                self.authors[previous] -= 1
+                if not self.authors[previous]:
+                    del self.authors[previous]
+                if is_ai:
+                    self.ai_posts -= 1
+                else:
+                    self.human_posts -= 1
+            return
+        if post['id'] in self.post_authors:
+            return  # an edit
+        if post['create_at'] <= self.forgotten_through and (post.get('update_at') or 0) > post['create_at']:
+            return  # an edit of a post that has left the recent window
+
+        self.remember(post, author)
+        self.authors[author] = self.authors.get(author, 0) + 1
+        if is_ai:
+            self.ai_posts += 1
+        else:
+            self.human_posts += 1
+
+        if post['create_at'] < self.last_applied:
+            return  # backfilled history: counted, but too late for latency and streak order
+        self.last_applied = post['create_at']
+
+        if is_ai:
+            self.current_ai_streak += 1
+            self.longest_ai_streak = max(self.longest_ai_streak, self.current_ai_streak)
+            if self.last_human_at is not None and author not in self.replied_since_human:
+                self.replied_since_human.add(author)
+                if author not in self.latency:
+                    self.latency[author] = RunningLatency(self.latency_window)
+                self.latency[author].add(post['create_at'] - self.last_human_at)
+        else:
+            if self.current_ai_streak:
+                self.ended_streaks += 1
+                self.ended_streak_posts += self.current_ai_streak
+            self.current_ai_streak = 0
+            self.last_human_at = post['create_at']
+            self.replied_since_human = set()
+
+    def remember(self, post: Dict[str, Any], author: str):
+        self.post_authors[post['id']] = (author, post['create_at'])
+        while len(self.post_authors) > self.recent_posts:
+            _, (_, create_at) = self.post_authors.popitem(last=False)
+            self.forgotten_through = max(self.forgotten_through, create_at)
+
+    def restore(self, author_counts: Dict[str, int], recent: List[Dict[str, Any]], is_ai: Callable[[str], bool]):
+        """Rebuild from stored history: totals from per-author counts, sequence figures by replaying recent posts"""
+        for post in sorted(recent, key=lambda post: post['create_at']):
+            author = post.get('username') or post.get('user_id') or "unknown"
+            self.apply(post, author, bool(is_ai(author)))
+        if recent and sum(author_counts.values()) > len(recent):
+            self.forgotten_through = max(self.forgotten_through, min(post['create_at'] for post in recent))
+        self.authors = {author: count for author, count in author_counts.items() if count}
+        self.ai_posts = sum(count for author, count in self.authors.items() if is_ai(author))
+        self.human_posts = sum(self.authors.values()) - self.ai_posts
+
+    def snapshot(self) -> Dict[str, Any]:
+        total = self.ai_posts + self.human_posts
+        return {
+            'posts': total,
+            'by_author': dict(sorted(self.authors.items(), key=lambda item: -item[1])),
+            'ai_posts': self.ai_posts,
+            'human_posts': self.human_posts,
+            'ai_share': round(self.ai_posts / total, 3) if total else None,
+            'reply_latency': {persona: latency.summary() for persona, latency in self.latency.items()},
+            'current_ai_streak': self.current_ai_streak,
+            'longest_ai_streak': self.longest_ai_streak,
+            'mean_ai_streak': round(self.ended_streak_posts / self.ended_streaks, 2) if self.ended_streaks else None
+        }
+
+
+class ChannelAnalytics:
+    """ChannelStats for every synced channel, fed by the server's post listeners.
+
+    `history(channel_id, limit)` returns (posts per author, newest `limit` posts) from persistent storage;
+    a channel's stats are rebuilt from it on first use, so figures survive a restart of the server.
+    """
+
+    def __init__(self, is_ai: Callable[[str], bool], latency_window: int = 100, recent_posts: int = 5000,
+                 history: Callable[[str, int], Tuple[Dict[str, int], List[Dict[str, Any]]]] = None):
+        self.is_ai = is_ai
+        self.latency_window = latency_window
+        self.recent_posts = recent_posts
+        self.history = history
+        self.channels: Dict[str, ChannelStats] = {}
+
+    def _stats(self, channel_id: str, create: bool = True) -> Optional[ChannelStats]:
+        stats = self.channels.get(channel_id)
+        if stats is not None:
+            return stats
+
+        stats = ChannelStats(self.latency_window, self.recent_posts)
+        if self.history is not None:
+            try:
+                author_counts, recent = self.history(channel_id, self.recent_posts)
+                if author_counts:
+                    stats.restore(author_counts, recent, self.is_ai)
+            except Exception as e:
+                logger.warning(f"Could not rebuild analytics for {channel_id}: {e}")
+                stats = ChannelStats(self.latency_window, self.recent_posts)
+        if not create and not stats.authors:
+            return None
+        self.channels[channel_id] = stats
+        return stats
+
+    def add_posts(self, channel_id: str, posts: List[Dict[str, Any]]):
+        stats = self._stats(channel_id)
+        for post in sorted(posts, key=lambda post: post['create_at']):
+            author = post.get('username') or post.get('user_id') or "unknown"
+            stats.apply(post, author, bool(self.is_ai(author)))
+
+    def current_ai_streak(self, channel_id: str) -> int:
+        stats = self.channels.get(channel_id)
+        return stats.current_ai_streak if stats else 0
+
+    def snapshot(self, channel_id: str) -> Optional[Dict[str, Any]]:
+        stats = self._stats(channel_id, create=False)
+        return stats.snapshot() if stats else None
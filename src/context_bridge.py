@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Context Bridge
+Local IDE-to-chat routing: decides from the context_bridging phrase lists whether IDE text belongs in team chat
+"""
+
+import re
+import time
+from typing import List, Dict, Optional, Any
+
+try:
+    from .engagement_router import PhraseMatcher
+except ImportError:
+    from engagement_router import PhraseMatcher
+
+# Routing outcomes
+BRIDGE = "bridge"
+KEEP_LOCAL = "keep_local"
+
+DEFAULT_BRIDGE_FORMAT = "From IDE discussion: [summary] - should we discuss this as a team?"
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+class BridgeClassifier:
+    """Trigger and keep-local phrases compiled into one PhraseMatcher; a text bridges when triggers outnumber keep-local hits"""
+
+    def __init__(self, trigger_phrases: List[str], keep_local_phrases: List[str],
+                 bridge_format: str = DEFAULT_BRIDGE_FORMAT, max_summary_chars: int = 200):
+        self.matcher = PhraseMatcher(
+            [(phrase, (BRIDGE, phrase)) for phrase in trigger_phrases]
+            + [(phrase, (KEEP_LOCAL, phrase)) for phrase in keep_local_phrases]
+        )
+        self.bridge_format = bridge_format
+        self.max_summary_chars = max_summary_chars
+
+    @classmethod
+    def from_config(cls, config: dict) -> "BridgeClassifier":
+        settings = (config.get('context_bridging', {}) or {}).get('ide_to_chat', {}) or {}
+        return cls(
+            settings.get('trigger_phrases') or [],
+            settings.get('keep_local_phrases') or [],
+            settings.get('bridge_format') or DEFAULT_BRIDGE_FORMAT,
+            settings.get('max_summary_chars', 200)
+        )
+
+    def summarize(self, text: str, first_trigger: Optional[int]) -> str:
+        """The sentence holding the first trigger phrase (else the first sentence), clipped"""
+        offset = 0
+        chosen = None
+        for sentence in SENTENCE_SPLIT.split(text.strip()):
+            start = text.find(sentence, offset)
+            offset = start + len(sentence)
+            if chosen is None and sentence.strip():
+                chosen = sentence
+            if first_trigger is not None and start <= first_trigger < offset:
+                chosen = sentence
+                break
+        summary = " ".join((chosen or "").split())
+        if len(summary) > self.max_summary_chars:
+            summary = summary[:self.max_summary_chars - 3].rstrip() + "..."
+        return summary
+
+    def classify(self, text: str, summary: str = None) -> Dict[str, Any]:
+        """Score text; returns decision, matched phrases, bridge message (when bridging) and elapsed microseconds"""
+        start = time.perf_counter()
+        triggers: List[str] = []
+        keep_local: List[str] = []
+        first_trigger = None
+        for match_start, _, (kind, phrase) in self.matcher.find_all(text):
+            if kind == BRIDGE:
+                if first_trigger is None:
+                    first_trigger = match_start
+                if phrase not in triggers:
+                    triggers.append(phrase)
+            elif phrase not in keep_local:
+                keep_local.append(phrase)
+
+        decision = BRIDGE if len(triggers) > len(keep_local) else KEEP_LOCAL
+        result = {
+            'decision': decision,
+            'score': len(triggers) - len(keep_local),
+            'triggers': triggers,
+            'keep_local': keep_local,
+            'message': None
+        }
+        if decision == BRIDGE:
+            result['message'] = self.bridge_format.replace("[summary]", summary or self.summarize(text, first_trigger))
+        result['elapsed_us'] = round((time.perf_counter() - start) * 1_000_000, 1)
+        return result
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Decision Index
+Rule-based extraction of decisions, action items and open questions from synced posts into SQLite
+"""
+
+import re
+import asyncio
+import sqlite3
+import logging
+import threading
+from typing import List, Dict, Optional, Any, Tuple
+
+try:
+    from .engagement_router import PhraseMatcher
+    from .tracing import detached_task
+except ImportError:
+    from engagement_router import PhraseMatcher
+    from tracing import detached_task
+
+logger = logging.getLogger(__name__)
+
+# Item kinds
+DECISION = "decision"
+ACTION = "action"
+QUESTION = "question"
+KINDS = [DECISION, ACTION, QUESTION]
+
+# Item states; a decision in the same thread resolves its open questions
+OPEN = "open"
+RESOLVED = "resolved"
+
+DEFAULT_PHRASES = {
+    DECISION: ["we decided", "we've decided", "we have decided", "decided to", "we agreed", "agreed to",
+               "decision:", "let's go with", "we'll go with", "going with", "consensus is", "final decision"],
+    ACTION: ["action item", "todo", "to-do", "next step", "next steps", "i'll", "i will", "will take",
+             "assigned to", "owner:", "please take"],
+    QUESTION: ["open question", "unresolved", "tbd", "still need to decide", "not sure whether", "need to figure out"]
+}
+
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+MENTION = re.compile(r"@([\w.-]+)")
+FIELDS = ('item_id', 'channel_id', 'kind', 'text', 'author', 'assignee', 'post_id', 'root_id', 'create_at', 'status')
+
+
+def extract_items(message: str, author: str, matcher: PhraseMatcher) -> List[Dict[str, Any]]:
+    """Classify each sentence of a post; one item per sentence, decisions winning over actions over questions"""
+    items = []
+    for sentence in SENTENCE_SPLIT.split(message or ""):
+        sentence = sentence.strip(" -*>\t")
+        if len(sentence) < 8:
+            continue
+        kinds = set(matcher.payloads(sentence))
+        if sentence.endswith("?"):
+            kinds.add(QUESTION)
+        for kind in KINDS:
+            if kind in kinds:
+                assignee = None
+                if kind == ACTION:
+                    mentions = MENTION.findall(sentence)
+                    assignee = mentions[0] if mentions else (author if re.search(r"\bi('ll| will)\b", sentence.lower()) else None)
+                items.append({'kind': kind, 'text': sentence[:500], 'assignee': assignee})
+                break
+    return items
+
+
+class DecisionStore:
+    """SQLite store of extracted items plus a per-channel checkpoint of processed posts"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        # The extractor writes from a worker thread while get_decisions reads on the event loop
+        self.lock = threading.Lock()
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS items (
+                item_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                channel_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                text TEXT NOT NULL,
+                author TEXT,
+                assignee TEXT,
+                post_id TEXT NOT NULL,
+                root_id TEXT,
+                create_at INTEGER NOT NULL,
+                status TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS items_by_channel ON items(channel_id, kind, create_at);
+            CREATE INDEX IF NOT EXISTS items_by_post ON items(post_id);
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                channel_id TEXT PRIMARY KEY,
+                last_update_at INTEGER NOT NULL
+            );
+        ''')
+        self.conn.commit()
+
+    def checkpoint(self, channel_id: str) -> int:
+        with self.lock:
+            row = self.conn.execute("SELECT last_update_at FROM checkpoints WHERE channel_id = ?", (channel_id,)).fetchone()
+        return row[0] if row else 0
+
+    def apply(self, channel_id: str, extracted: List[Tuple[Dict[str, Any], List[Dict[str, Any]]]], checkpoint: int):
+        """Replace the items of each processed post, resolve answered questions and advance the checkpoint"""
+        with self.lock, self.conn:
+            for post, items in extracted:
+                self.conn.execute("DELETE FROM items WHERE post_id = ?", (post['id'],))
+                root_id = post.get('root_id') or post['id']
+                for item in items:
+                    self.conn.execute(
+                        "INSERT INTO items (channel_id, kind, text, author, assignee, post_id, root_id, create_at, status) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (channel_id, item['kind'], item['text'], post.get('username'), item['assignee'],
+                         post['id'], root_id, post['create_at'], OPEN)
+                    )
+                if any(item['kind'] == DECISION for item in items):
+                    self.conn.execute(
+                        "UPDATE items SET status = ? WHERE channel_id = ? AND root_id = ? AND kind = ? AND create_at <= ?",
+                        (RESOLVED, channel_id, root_id, QUESTION, post['create_at'])
+                    )
+            self.conn.execute(
+                '''INSERT INTO checkpoints VALUES (?, ?)
+                   ON CONFLICT(channel_id) DO UPDATE SET last_update_at = MAX(last_update_at, excluded.last_update_at)''',
+                (channel_id, checkpoint)
+            )
+
+    def query(self, channel_id: str, kinds: List[str] = None, status: Optional[str] = None,
+              since_ms: Optional[int] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent items first"""
+        sql = f"SELECT {', '.join(FIELDS)} FROM items WHERE channel_id = ?"
+        params: List[Any] = [channel_id]
+        if kinds:
+            sql += f" AND kind IN ({', '.join('?' for _ in kinds)})"
+            params.extend(kinds)
+        if status:
+            sql += " AND status = ?"
+            params.append(status)
+        if since_ms is not None:
+            sql += " AND create_at >= ?"
+            params.append(since_ms)
+        sql += " ORDER BY create_at DESC, item_id DESC LIMIT ?"
+        params.append(limit)
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [dict(zip(FIELDS, row)) for row in rows]
+
+    def close(self):
+        self.conn.close()
+
+
+class DecisionExtractor:
+    """Processes synced posts past each channel's checkpoint in a background task"""
+
+    def __init__(self, store: DecisionStore, phrases: Dict[str, List[str]] = None):
+        self.store = store
+        phrases = phrases or DEFAULT_PHRASES
+        self.matcher = PhraseMatcher((phrase, kind) for kind in KINDS for phrase in phrases.get(kind, []))
+        self.pending: List[Tuple[str, List[Dict[str, Any]]]] = []
+        self.worker: Optional[asyncio.Task] = None
+        self.processed = 0
+
+    @classmethod
+    def from_config(cls, config: dict, store: DecisionStore) -> "DecisionExtractor":
+        """Phrase lists from the decision_extraction config section, defaults for any not given"""
+        settings = config.get('decision_extraction', {}) or {}
+        phrases = {kind: settings.get(f"{kind}_phrases") or DEFAULT_PHRASES[kind] for kind in KINDS}
+        return cls(store, phrases)
+
+    def submit(self, channel_id: str, posts: List[Dict[str, Any]]):
+        """Queue synced posts; processed inline when no event loop is running"""
+        self.pending.append((channel_id, posts))
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self.drain()
+            return
+        if self.worker is None or self.worker.done():
+            self.worker = detached_task(self.run())
+
+    async def run(self):
+        while self.pending:
+            await asyncio.to_thread(self.drain)
+
+    def drain(self):
+        while self.pending:
+            channel_id, posts = self.pending.pop(0)
+            try:
+                self.process(channel_id, posts)
+            except Exception as e:
+                logger.warning(f"Decision extraction for {channel_id} failed: {str(e)[:200]}")
+
+    def process(self, channel_id: str, posts: List[Dict[str, Any]]) -> int:
+        """Extract from posts changed since the checkpoint; returns the number of posts processed"""
+        checkpoint = self.store.checkpoint(channel_id)
+        fresh = [post for post in posts if (post.get('update_at') or post['create_at']) > checkpoint]
+        if not fresh:
+            return 0
+
+        extracted = []
+        for post in sorted(fresh, key=lambda post: post['create_at']):
+            items = [] if post.get('delete_at') else extract_items(post.get('message', ''), post.get('username'), self.matcher)
+            extracted.append((post, items))
+        newest = max(post.get('update_at') or post['create_at'] for post in fresh)
+        self.store.apply(channel_id, extracted, newest)
+        self.processed += len(fresh)
+        return len(fresh)
+
+    async def wait(self):
+        """Wait for queued posts to be processed (used by tests and get_decisions)"""
+        while self.worker is not None and not self.worker.done():
+            await self.worker
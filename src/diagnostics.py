@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Diagnostics
+Process-level probes (RSS, event-loop lag, tracemalloc) and rendering for get_server_stats
+"""
+
+import os
+import sys
+import time
+import asyncio
+import tracemalloc
+from typing import List, Dict, Optional, Any
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+def process_rss_bytes() -> Optional[int]:
+    """Current resident set size (Linux /proc), else the peak RSS from getrusage"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+async def measure_loop_lag_ms(samples: int = 3) -> float:
+    """How long a ready callback waits for the event loop right now (worst of a few yields)"""
+    worst = 0.0
+    for _ in range(samples):
+        start = time.perf_counter()
+        await asyncio.sleep(0)
+        worst = max(worst, (time.perf_counter() - start) * 1000)
+    return worst
+
+
+def tracemalloc_report(action: str = "snapshot", top: int = 10) -> Dict[str, Any]:
+    """Start/stop tracemalloc or list the top allocation sites since it was started"""
+    if action == "stop":
+        tracemalloc.stop()
+        return {'tracing': False}
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+        return {'tracing': True, 'note': "tracemalloc started; request a snapshot later to see allocation growth"}
+    if action == "start":
+        return {'tracing': True, 'note': "tracemalloc already running"}
+
+    current, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ])
+    return {
+        'tracing': True,
+        'traced_bytes': current,
+        'peak_bytes': peak,
+        'top': [
+            {'site': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}", 'bytes': stat.size, 'count': stat.count}
+            for stat in snapshot.statistics('lineno')[:top]
+        ]
+    }
+
+
+def format_bytes(count: Optional[int]) -> str:
+    if count is None:
+        return "n/a"
+    for unit in ("B", "KiB", "MiB"):
+        if abs(count) < 1024:
+            return f"{count:.0f}{unit}" if unit == "B" else f"{count:.1f}{unit}"
+        count /= 1024
+    return f"{count:.1f}GiB"
+
+
+def format_stats(stats: Dict[str, Any]) -> str:
+    """One line per section: 'section: key=value, key=value'; nested dicts and lists are flattened"""
+    lines = ["Server stats:"]
+    for section, values in stats.items():
+        if isinstance(values, dict):
+            rendered = ", ".join(f"{key}={_format_value(value)}" for key, value in values.items())
+            lines.append(f"{section}: {rendered or '-'}")
+        elif isinstance(values, list):
+            lines.append(f"{section}:")
+            lines.extend(f"  {_format_value(item)}" for item in values)
+        else:
+            lines.append(f"{section}: {_format_value(values)}")
+    return "\n".join(lines)
+
+
+def _format_value(value: Any) -> str:
+    if isinstance(value, float):
+        return f"{value:.3g}" if abs(value) < 1000 else f"{value:.0f}"
+    if isinstance(value, dict):
+        return "{" + ", ".join(f"{key}={_format_value(item)}" for key, item in value.items()) + "}"
+    return str(value)
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Engagement Router
+Local classification of incoming messages into per-persona engagement levels
+"""
+
+from collections import deque
+from typing import List, Dict, Optional, Any, Callable, Iterable, Tuple
+
+# Engagement levels from communication.engagement_hierarchy
+MANDATORY = "mandatory"
+OPTIONAL = "optional"
+OBSERVE = "observe"
+
+ENGAGEMENT_RANK = {OBSERVE: 0, OPTIONAL: 1, MANDATORY: 2}
+
+# Broadcast mentions invite every persona but oblige none of them
+BROADCAST_MENTIONS = ("@all", "@channel", "@here", "@team")
+
+
+class PhraseMatcher:
+    """Aho-Corasick automaton matching many phrases in a single pass over the text"""
+
+    def __init__(self, phrases: Iterable[Tuple[str, Any]] = (), whole_words: bool = True):
+        self.whole_words = whole_words
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._own_output: List[List[Tuple[int, Any]]] = [[]]
+        self._output: List[List[Tuple[int, Any]]] = [[]]
+        self._built = False
+        for phrase, payload in phrases:
+            self.add(phrase, payload)
+        self.build()
+
+    def __len__(self) -> int:
+        return sum(len(out) for out in self._own_output)
+
+    def add(self, phrase: str, payload: Any):
+        """Add a phrase (case-insensitive) with the payload reported on match"""
+        phrase = phrase.strip().lower()
+        if not phrase:
+            return
+
+        state = 0
+        for char in phrase:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._own_output.append([])
+                self._output.append([])
+            state = next_state
+
+        self._own_output[state].append((len(phrase), payload))
+        self._built = False
+
+    def build(self):
+        """Compute failure links breadth-first"""
+        self._output = [list(out) for out in self._own_output]
+        queue = deque()
+        for state in self._goto[0].values():
+            self._fail[state] = 0
+            queue.append(state)
+
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+        self._built = True
+
+    def find_all(self, text: str) -> List[Tuple[int, int, Any]]:
+        """Return (start, end, payload) for every phrase occurrence in text"""
+        if not self._built:
+            self.build()
+
+        text = text.lower()
+        matches = []
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+
+            for length, payload in self._output[state]:
+                start = index - length + 1
+                end = index + 1
+                if self.whole_words and not self._on_word_boundary(text, start, end):
+                    continue
+                matches.append((start, end, payload))
+
+        return matches
+
+    def payloads(self, text: str) -> List[Any]:
+        """Return payloads of all matches in order of occurrence"""
+        return [payload for _, _, payload in self.find_all(text)]
+
+    @staticmethod
+    def _on_word_boundary(text: str, start: int, end: int) -> bool:
+        """Check that a match is not embedded in a longer word"""
+        before = text[start - 1] if start > 0 else " "
+        after = text[end] if end < len(text) else " "
+        return not (before.isalnum() or before == "_") and not (after.isalnum() or after == "_")
+
+
+def keyword_scorer(message: str, persona: str, persona_config: dict, trigger_hits: int) -> float:
+    """Default scorer: each distinct trigger phrase hit adds 0.5, capped at 1.0"""
+    return min(1.0, 0.5 * trigger_hits)
+
+
+class EngagementRouter:
+    """Decides which personas should respond to a message without calling the model"""
+
+    def __init__(self, personas: Dict[str, dict], scorer: Optional[Callable] = None,
+                 optional_threshold: float = 0.5):
+        self.personas = personas or {}
+        self.scorer = scorer or keyword_scorer
+        self.optional_threshold = optional_threshold
+        self.aliases: Dict[str, str] = {}
+
+        patterns = []
+        for key, persona_config in self.personas.items():
+            for alias in self._aliases_for(key, persona_config or {}):
+                self.aliases[alias] = key
+                patterns.append((f"@{alias}", ("mention", key, MANDATORY)))
+                patterns.append((alias, ("mention", key, OPTIONAL)))
+
+            for phrase in (persona_config or {}).get('trigger_phrases', []):
+                patterns.append((phrase, ("trigger", key, phrase)))
+
+        for broadcast in BROADCAST_MENTIONS:
+            patterns.append((broadcast, ("broadcast", None, OPTIONAL)))
+
+        # '@' is not a word character, so mentions still need whole-word matching on the right
+        self.matcher = PhraseMatcher(patterns, whole_words=True)
+
+    @classmethod
+    def from_config(cls, config: dict, scorer: Optional[Callable] = None) -> "EngagementRouter":
+        """Compile a router from the coordination rules config"""
+        routing = config.get('communication', {}).get('engagement_routing', {}) or {}
+        return cls(
+            config.get('personas', {}),
+            scorer=scorer,
+            optional_threshold=routing.get('optional_threshold', 0.5)
+        )
+
+    @staticmethod
+    def _aliases_for(key: str, persona_config: dict) -> List[str]:
+        """Names a persona can be mentioned by"""
+        candidates = [key, key.replace('-', '_'), key.replace('_', '-')]
+        if persona_config.get('name'):
+            candidates.append(persona_config['name'])
+        candidates.extend(persona_config.get('aliases', []))
+
+        aliases = []
+        for candidate in candidates:
+            alias = candidate.strip().lower()
+            if alias and alias not in aliases:
+                aliases.append(alias)
+        return aliases
+
+    def resolve(self, persona: str) -> Optional[str]:
+        """Map any persona alias (e.g. 'claude_research') to its config key"""
+        if not persona:
+            return None
+        return self.aliases.get(persona.strip().lower())
+
+    def classify(self, message: str, author: Optional[str] = None) -> Dict[str, str]:
+        """Classify a message into mandatory/optional/observe for every persona"""
+        levels = {key: OBSERVE for key in self.personas}
+        trigger_hits: Dict[str, set] = {key: set() for key in self.personas}
+
+        for kind, key, value in self.matcher.payloads(message or ""):
+            if kind == "mention":
+                if ENGAGEMENT_RANK[value] > ENGAGEMENT_RANK[levels[key]]:
+                    levels[key] = value
+            elif kind == "broadcast":
+                for persona_key, level in levels.items():
+                    if level == OBSERVE:
+                        levels[persona_key] = OPTIONAL
+            elif kind == "trigger":
+                trigger_hits[key].add(value)
+
+        for key, level in levels.items():
+            if level != OBSERVE:
+                continue
+            score = self.scorer(message, key, self.personas.get(key) or {}, len(trigger_hits[key]))
+            if score >= self.optional_threshold:
+                levels[key] = OPTIONAL
+
+        # Personas never respond to their own posts
+        author_key = self.resolve(author) if author else None
+        if author_key in levels:
+            levels[author_key] = OBSERVE
+
+        return levels
+
+    def responders(self, message: str, author: Optional[str] = None,
+                   levels: Optional[Dict[str, str]] = None) -> List[str]:
+        """Personas that should actually generate a reply, mandatory first (pass `levels` from classify to reuse them)"""
+        levels = levels if levels is not None else self.classify(message, author)
+        candidates = [key for key, level in levels.items() if level != OBSERVE]
+        return sorted(candidates, key=lambda key: -ENGAGEMENT_RANK[levels[key]])
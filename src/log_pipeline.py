@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Log Pipeline
+Queue-based, non-blocking structured logging with per-event sampling and payload truncation
+"""
+
+import sys
+import json
+import queue
+import atexit
+import logging
+import logging.handlers
+from datetime import datetime, timezone
+from typing import Dict, Optional, Any, Iterable
+
+DEFAULT_REDACT_FIELDS = ("message", "prompts", "instruction", "token", "api_key")
+
+
+def truncate(value: Any, max_length: int = 200) -> Any:
+    """Shorten long strings, keeping their original length visible"""
+    if isinstance(value, str) and len(value) > max_length:
+        return f"{value[:max_length]}…(+{len(value) - max_length} chars)"
+    return value
+
+
+def summarize(value: Any, redact_fields: Iterable[str] = DEFAULT_REDACT_FIELDS, max_length: int = 200,
+              depth: int = 0) -> Any:
+    """Loggable copy of a payload: redacted keys become sizes, long strings and lists are cut short"""
+    if isinstance(value, dict):
+        summary = {}
+        for key, item in value.items():
+            if key in redact_fields:
+                size = len(item) if hasattr(item, '__len__') else 1
+                summary[key] = f"<redacted {type(item).__name__} len={size}>"
+            elif depth < 3:
+                summary[key] = summarize(item, redact_fields, max_length, depth + 1)
+            else:
+                summary[key] = "<nested>"
+        return summary
+    if isinstance(value, (list, tuple)):
+        items = [summarize(item, redact_fields, max_length, depth + 1) for item in value[:5]]
+        if len(value) > 5:
+            items.append(f"…(+{len(value) - 5} items)")
+        return items
+    if isinstance(value, (int, float, bool)) or value is None:
+        return value
+    return truncate(str(value), max_length)
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps 1 in N records per event (records tagged with extra={'event': ...}); warnings always pass"""
+
+    def __init__(self, rates: Dict[str, float] = None):
+        super().__init__()
+        self.rates = dict(rates or {})
+        self.counters: Dict[str, int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        event = getattr(record, 'event', None)
+        if event is None or record.levelno >= logging.WARNING:
+            return True
+
+        rate = self.rates.get(event, 1.0)
+        if rate >= 1.0:
+            return True
+        if rate <= 0.0:
+            return False
+
+        count = self.counters.get(event, 0)
+        self.counters[event] = count + 1
+        return count % max(1, round(1 / rate)) == 0
+
+
+class StructuredFormatter(logging.Formatter):
+    """Formats on the listener thread: JSON lines, or text with key=value fields"""
+
+    def __init__(self, json_output: bool = False, redact_fields: Iterable[str] = DEFAULT_REDACT_FIELDS,
+                 max_field_length: int = 200, max_message_length: int = 1000):
+        super().__init__('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        self.json_output = json_output
+        self.redact_fields = tuple(redact_fields)
+        self.max_field_length = max_field_length
+        self.max_message_length = max_message_length
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = truncate(record.getMessage(), self.max_message_length)
+        fields = getattr(record, 'fields', None)
+        fields = summarize(fields, self.redact_fields, self.max_field_length) if fields else {}
+
+        if self.json_output:
+            entry = {
+                'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+                'level': record.levelname,
+                'logger': record.name,
+                'msg': message
+            }
+            event = getattr(record, 'event', None)
+            if event:
+                entry['event'] = event
+            entry.update(fields)
+            if record.exc_info:
+                entry['exc'] = truncate(self.formatException(record.exc_info), self.max_message_length)
+            return json.dumps(entry, default=str)
+
+        line = f"{self.formatTime(record)} - {record.name} - {record.levelname} - {message}"
+        if fields:
+            line += " " + " ".join(f"{key}={json.dumps(value, default=str)}" for key, value in fields.items())
+        if record.exc_info:
+            line += "\n" + truncate(self.formatException(record.exc_info), self.max_message_length)
+        return line
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues raw records without blocking; drops (and counts) records when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting happens on the listener thread, so the caller pays only for the enqueue
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogPipeline:
+    """Root-logger queue handler plus a background listener writing to stderr"""
+
+    def __init__(self, level: int = logging.INFO, json_output: bool = False, queue_size: int = 10000,
+                 stream=None):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.handler = DroppingQueueHandler(self.queue)
+        self.sampling = SamplingFilter()
+        self.handler.addFilter(self.sampling)
+
+        self.output = logging.StreamHandler(stream or sys.stderr)
+        self.output.setFormatter(StructuredFormatter(json_output=json_output))
+        self.listener = logging.handlers.QueueListener(self.queue, self.output, respect_handler_level=False)
+
+        root = logging.getLogger()
+        root.addHandler(self.handler)
+        root.setLevel(level)
+
+        self.listener.start()
+        atexit.register(self.stop)
+
+    def configure(self, settings: dict):
+        """Apply the logging_pipeline config section (format, sampling, truncation)"""
+        self.sampling.rates = dict(settings.get('sampling', {}) or {})
+        formatter = self.output.formatter
+        formatter.json_output = settings.get('format', 'json' if formatter.json_output else 'text') == 'json'
+        formatter.max_field_length = settings.get('max_field_length', formatter.max_field_length)
+        formatter.max_message_length = settings.get('max_message_length', formatter.max_message_length)
+        if 'redact_fields' in settings:
+            formatter.redact_fields = tuple(settings['redact_fields'])
+
+    @property
+    def dropped(self) -> int:
+        return self.handler.dropped
+
+    def stop(self):
+        """Flush queued records and stop the listener thread"""
+        if self.listener._thread is not None:
+            self.listener.stop()
+
+
+_pipeline: Optional[LogPipeline] = None
+
+
+def setup_logging(level: int = logging.INFO, json_output: bool = False, queue_size: int = 10000) -> LogPipeline:
+    """Install the pipeline once per process"""
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = LogPipeline(level=level, json_output=json_output, queue_size=queue_size)
+    return _pipeline
+
+
+def get_pipeline() -> Optional[LogPipeline]:
+    return _pipeline
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Mattermost Payloads
+Typed decoding of Mattermost post and user responses, keeping only the fields the server reads
+"""
+
+import json
+from typing import List, Dict, Optional, Any
+
+try:
+    import msgspec
+except ImportError:  # Falls back to orjson/json loads into the same record classes
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Fields read from a post; everything else (props, metadata, embeds, file_ids...) is skipped while decoding
+POST_FIELDS = [
+    ('id', str, ""),
+    ('user_id', str, ""),
+    ('channel_id', str, ""),
+    ('root_id', str, ""),
+    ('message', str, ""),
+    ('type', str, ""),
+    ('create_at', int, 0),
+    ('update_at', int, 0),
+    ('delete_at', int, 0),
+    ('reply_count', Optional[int], None),
+    ('username', Optional[str], None),  # Filled in from the user cache, never sent by Mattermost
+]
+
+USER_FIELDS = [
+    ('id', str, ""),
+    ('username', str, "unknown"),
+]
+
+
+class _Record:
+    """Dict-style access so decoded records drop into code written against raw JSON dicts"""
+
+    __slots__ = ()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = getattr(self, key, None)
+        return default if value is None else value
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key: str, value: Any):
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return getattr(self, key, None) is not None
+
+
+def _fallback_record(name: str, fields: list) -> type:
+    """Slotted record class with the same fields and defaults, used when msgspec is missing"""
+    names = tuple(field for field, _, _ in fields)
+    defaults = {field: default for field, _, default in fields}
+
+    def __init__(self, **values):
+        for field in names:
+            setattr(self, field, values.get(field, defaults[field]))
+
+    def __repr__(self):
+        return f"{name}({', '.join(f'{field}={getattr(self, field)!r}' for field in names)})"
+
+    def __eq__(self, other):
+        return type(other) is type(self) and all(getattr(self, f) == getattr(other, f) for f in names)
+
+    return type(name, (_Record,), {'__slots__': names, '__init__': __init__, '__repr__': __repr__,
+                                   '__eq__': __eq__, '__struct_fields__': names})
+
+
+if msgspec is not None:
+    Post = msgspec.defstruct("Post", POST_FIELDS, bases=(_Record,))
+    User = msgspec.defstruct("User", USER_FIELDS, bases=(_Record,))
+    PostList = msgspec.defstruct("PostList", [('order', List[str], []), ('posts', Dict[str, Post], {})])
+
+    _post_list_decoder = msgspec.json.Decoder(PostList)
+    _user_decoder = msgspec.json.Decoder(User)
+else:
+    Post = _fallback_record("Post", POST_FIELDS)
+    User = _fallback_record("User", USER_FIELDS)
+    PostList = None
+
+
+def _loads(raw) -> Any:
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+def _build(record_type: type, data: Dict[str, Any]):
+    return record_type(**{field: data[field] for field in record_type.__struct_fields__ if field in data})
+
+
+def _raw_body(response):
+    """Undecoded response body, or None for responses that only offer .json() (mocks, replays)"""
+    content = getattr(response, 'content', None)
+    if isinstance(content, (bytes, bytearray, str)) and content:
+        return content
+    return None
+
+
+def _order_posts(order: List[str], posts: Dict[str, Any]) -> List[Any]:
+    if not order:
+        # Older servers and hand-built payloads omit 'order'; match Mattermost's newest-first ordering
+        order = sorted(posts, key=lambda post_id: posts[post_id].create_at, reverse=True)
+    ordered = []
+    for post_id in order:
+        post = posts.get(post_id)
+        if post is None:
+            continue
+        if not post.id:
+            post.id = post_id
+        ordered.append(post)
+    return ordered
+
+
+def decode_post_list(response) -> List[Any]:
+    """Posts from a Mattermost post list response, newest first as given by its 'order' array"""
+    raw = _raw_body(response)
+    if msgspec is not None:
+        if raw is not None:
+            post_list = _post_list_decoder.decode(raw)
+        else:
+            post_list = msgspec.convert(response.json(), PostList)
+        return _order_posts(post_list.order, post_list.posts)
+
+    data = _loads(raw) if raw is not None else response.json()
+    posts = {post_id: _build(Post, post) for post_id, post in (data.get('posts') or {}).items()}
+    return _order_posts(data.get('order') or [], posts)
+
+
+def decode_user(response):
+    """User record from a Mattermost user response"""
+    raw = _raw_body(response)
+    if msgspec is not None:
+        return _user_decoder.decode(raw) if raw is not None else msgspec.convert(response.json(), User)
+    return _build(User, _loads(raw) if raw is not None else response.json())
@@ -7,25 +7,77 @@ MVP implementation for single-team collaborative AI discussions
 import os
 import sys
 import asyncio
+import argparse
 import yaml
 import time
 import random
 import logging
-from typing import List, Dict, Optional, Any, Callable
+from typing import List, Dict, Optional, Any, Callable, Awaitable
 from datetime import datetime
-
-# Set up logging to stderr to avoid interfering with stdio
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[logging.StreamHandler(sys.stderr)]
-)
-logger = logging.getLogger(__name__)
+from contextlib import nullcontext, contextmanager, aclosing
 
 # MCP imports
 from mcp.server import Server
 from mcp.server.models import InitializationOptions
-from mcp.types import Tool, TextContent, ServerCapabilities
+from mcp.types import Tool, TextContent, ServerCapabilities, Resource, ResourcesCapability
+from mcp.server.lowlevel.helper_types import ReadResourceContents
+
+# Local subsystems (relative when imported as src.mcp_server, flat when src/ is on sys.path)
+try:
+    from .engagement_router import EngagementRouter, OPTIONAL, OBSERVE
+    from .model_routing import ModelRouter, TRIAGE, ESCALATED, PASS_REPLY, ESCALATE_REPLY
+    from .batch_jobs import BatchJobManager, BatchStore, FakeBatchClient
+    from .search_index import SearchIndex
+    from .semantic_index import EmbeddingIndex, make_embedder, timed_search, select_within_budget, estimate_tokens, np
+    from .redundancy import RedundancyDetector, REDUNDANT, CIRCULAR
+    from .budget import BudgetGovernor, OK as BUDGET_OK, SHRINK, EXHAUSTED
+    from .log_pipeline import setup_logging
+    from .tracing import Tracer, span, detached_task, STATUS_ERROR
+    from .profiling import ToolProfiler, LoopLagMonitor, install_uvloop
+    from .cassette import CassetteRecorder
+    from .outbox import Outbox, OutboxStore, DeliveryError, pending_post_id
+    from .speculation import Speculator, draft_fingerprint
+    from .mattermost_payloads import decode_post_list, decode_user
+    from .resources import ResourceHub, channel_uri, parse_channel_uri
+    from .output_formats import render_posts, clip, FORMATS, TEXT
+    from .tool_batch import plan_batch, run_batch, format_batch_results
+    from .providers import ProviderPool, Completion
+    from .channel_analytics import ChannelAnalytics
+    from .diagnostics import process_rss_bytes, measure_loop_lag_ms, tracemalloc_report, format_stats, format_bytes
+    from .decision_index import DecisionExtractor, DecisionStore, KINDS as DECISION_KINDS
+    from .context_bridge import BridgeClassifier, BRIDGE
+    from .bot_registry import BotRegistry
+except ImportError:
+    from engagement_router import EngagementRouter, OPTIONAL, OBSERVE
+    from model_routing import ModelRouter, TRIAGE, ESCALATED, PASS_REPLY, ESCALATE_REPLY
+    from batch_jobs import BatchJobManager, BatchStore, FakeBatchClient
+    from search_index import SearchIndex
+    from semantic_index import EmbeddingIndex, make_embedder, timed_search, select_within_budget, estimate_tokens, np
+    from redundancy import RedundancyDetector, REDUNDANT, CIRCULAR
+    from budget import BudgetGovernor, OK as BUDGET_OK, SHRINK, EXHAUSTED
+    from log_pipeline import setup_logging
+    from tracing import Tracer, span, detached_task, STATUS_ERROR
+    from profiling import ToolProfiler, LoopLagMonitor, install_uvloop
+    from cassette import CassetteRecorder
+    from outbox import Outbox, OutboxStore, DeliveryError, pending_post_id
+    from speculation import Speculator, draft_fingerprint
+    from mattermost_payloads import decode_post_list, decode_user
+    from resources import ResourceHub, channel_uri, parse_channel_uri
+    from output_formats import render_posts, clip, FORMATS, TEXT
+    from tool_batch import plan_batch, run_batch, format_batch_results
+    from providers import ProviderPool, Completion
+    from channel_analytics import ChannelAnalytics
+    from diagnostics import process_rss_bytes, measure_loop_lag_ms, tracemalloc_report, format_stats, format_bytes
+    from decision_index import DecisionExtractor, DecisionStore, KINDS as DECISION_KINDS
+    from context_bridge import BridgeClassifier, BRIDGE
+    from bot_registry import BotRegistry
+
+# Log to stderr (stdout carries MCP stdio) through a background queue so tool calls never wait on I/O
+log_pipeline = setup_logging(
+    level=getattr(logging, os.getenv("MCP_LOG_LEVEL", "INFO").upper(), logging.INFO),
+    json_output=os.getenv("MCP_LOG_FORMAT", "text").lower() == "json"
+)
+logger = logging.getLogger(__name__)
 
 class RetryHandler:
     """Handles exponential backoff and retry logic for API calls"""
@@ -34,17 +86,22 @@ class RetryHandler:
         self.max_retries = max_retries
         self.base_delay = base_delay
         self.max_delay = max_delay
+        self.stats = {'calls': 0, 'retries': 0, 'exhausted': 0, 'last_error': None}
     
     async def retry_with_backoff(self, func: Callable, *args, **kwargs):
         """Execute function with exponential backoff retry"""
         last_exception = None
+        self.stats['calls'] += 1
         
         for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.stats['retries'] += 1
             try:
-                if asyncio.iscoroutinefunction(func):
-                    return await func(*args, **kwargs)
-                else:
-                    return func(*args, **kwargs)
+                with span("retry.attempt", attempt=attempt + 1, max_attempts=self.max_retries + 1):
+                    if asyncio.iscoroutinefunction(func):
+                        return await func(*args, **kwargs)
+                    else:
+                        return func(*args, **kwargs)
             except Exception as e:
                 last_exception = e
                 
@@ -57,9 +114,15 @@ class RetryHandler:
                     self.max_delay
                 )
                 
-                logger.warning(f"API call failed (attempt {attempt + 1}/{self.max_retries + 1}), retrying in {delay:.2f}s: {str(e)}")
+                logger.warning(
+                    "API call failed (attempt %d/%d), retrying in %.2fs: %s",
+                    attempt + 1, self.max_retries + 1, delay, e,
+                    extra={'event': 'retry', 'fields': {'error_type': type(e).__name__}}
+                )
                 await asyncio.sleep(delay)
         
+        self.stats['exhausted'] += 1
+        self.stats['last_error'] = f"{type(last_exception).__name__}: {str(last_exception)[:200]}"
         raise last_exception
 
 class MessageCache:
@@ -69,6 +132,8 @@ class MessageCache:
         self.cache = {}
         self.cache_duration = cache_duration_seconds
         self.last_fetch_times = {}
+        self.hits = 0
+        self.misses = 0
     
     def is_cache_valid(self, key: str) -> bool:
         """Check if cache entry is still valid"""
@@ -80,9 +145,14 @@ class MessageCache:
     
     def get_cached_messages(self, key: str) -> Optional[Dict]:
         """Get cached messages if valid"""
-        if self.is_cache_valid(key):
-            return self.cache.get(key)
-        return None
+        with span("cache.lookup", **{'cache.key': key}) as lookup:
+            hit = self.is_cache_valid(key)
+            lookup.set_attribute('cache.hit', hit)
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return self.cache.get(key) if hit else None
     
     def cache_messages(self, key: str, messages: Dict):
         """Cache messages with timestamp"""
@@ -98,25 +168,47 @@ class MessageCache:
             self.cache.clear()
             self.last_fetch_times.clear()
 
+    def stats(self) -> Dict[str, Any]:
+        """Entry counts, approximate payload bytes and hit ratio"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.cache),
+            'valid': sum(1 for key in self.cache if self.is_cache_valid(key)),
+            'bytes': format_bytes(sum(len(value.encode('utf-8')) if isinstance(value, str) else sys.getsizeof(value)
+                                      for value in self.cache.values())),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 3) if lookups else None
+        }
+
 class ConversationContext:
     """Manages conversation history and context for team discussions"""
     
-    def __init__(self, team: str, channel: str, max_context: int = 50):
+    def __init__(self, team: str, channel: str, max_context: int = 50, memory: "EmbeddingIndex" = None):
         self.team = team
         self.channel = channel
         self.messages: List[Dict[str, Any]] = []
         self.max_context = max_context
+
+        # Optional embedding index that keeps every message, including ones aged out of the window
+        self.memory = memory
+        self.remembered_ids = set()
+        self.last_retrieval_ms: Optional[float] = None
         
     def add_message(self, author: str, content: str, timestamp: datetime = None):
         """Add message with automatic truncation"""
         if timestamp is None:
             timestamp = datetime.now()
             
-        self.messages.append({
+        message = {
             'author': author,
             'content': content[:200],  # Truncate long messages
             'timestamp': timestamp
-        })
+        }
+        self.messages.append(message)
+
+        if self.memory is not None:
+            self.memory.submit([message])
         
         # Keep only recent messages
         if len(self.messages) > self.max_context:
@@ -140,6 +232,35 @@ class ConversationContext:
         """Get recent messages for analysis"""
         return self.messages[-limit:] if self.messages else []
 
+    def remember(self, messages: List[Dict[str, Any]]):
+        """Add synced channel messages to semantic memory only (dicts with id, author, content, timestamp)"""
+        if self.memory is None:
+            return
+
+        recent_contents = {msg['content'] for msg in self.messages}
+        fresh = []
+        for msg in messages:
+            content = msg['content'][:200]
+            if msg['id'] in self.remembered_ids or content in recent_contents:
+                continue
+            self.remembered_ids.add(msg['id'])
+            fresh.append({'author': msg['author'], 'content': content, 'timestamp': msg['timestamp']})
+
+        self.memory.submit(fresh)
+
+    def get_relevant_messages(self, query: str, k: int = 4, token_budget: int = 300,
+                              skip_recent: int = 6, min_score: float = 0.15) -> List[Dict[str, Any]]:
+        """Recall the older messages most similar to the query, within a token budget; the last `skip_recent`
+        messages are already in the prompt and are not recalled again"""
+        if self.memory is None:
+            return []
+
+        in_prompt = {msg['content'] for msg in self.messages[-skip_recent:]} if skip_recent else set()
+        matches, self.last_retrieval_ms = timed_search(
+            self.memory, query, k=k, min_score=min_score, exclude=in_prompt
+        )
+        return select_within_budget(matches, token_budget)
+
 # Mattermost integration
 import anthropic
 
@@ -147,7 +268,25 @@ import anthropic
 from dotenv import load_dotenv
 load_dotenv()
 
+def parse_time_ms(value) -> Optional[int]:
+    """Parse epoch milliseconds or an ISO 8601 timestamp into epoch milliseconds"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)) or str(value).isdigit():
+        return int(value)
+    text = str(value)
+    if text[-1:] in ("Z", "z"):
+        # fromisoformat only accepts a "Z" suffix from 3.11
+        text = text[:-1] + "+00:00"
+    try:
+        return int(datetime.fromisoformat(text).timestamp() * 1000)
+    except ValueError:
+        raise ValueError(f"Invalid time {value!r}: use ISO 8601 or epoch milliseconds")
+
 class MultiModelMCPServer:
+    # Authors treated as AI participants for autonomous tracking
+    AI_PARTICIPANTS = ['Claude-Research', 'Kiro', 'claude_research', 'kiro']
+
     def __init__(self, config_file: str = "config/chat_coordination_rules.yaml"):
         """Initialize MCP server with configuration"""
         self.config_file = config_file
@@ -178,12 +317,69 @@ class MultiModelMCPServer:
         
         # Message caching for better performance
         self.message_cache = MessageCache(cache_duration_seconds=300)  # 5 minute cache
+        self.thread_cache = MessageCache(cache_duration_seconds=300)  # Expanded threads, fetched on demand
+
+        # Local state (SQLite stores) lives under the data directory
+        self.data_dir = os.getenv("MCP_DATA_DIR", "data")
+
+        # Offline bulk generation, created on first use
+        self.batch_jobs = None
+
+        # Write-behind delivery for contribute (delivery="async"), created on first use
+        self.outbox = None
+
+        # Profiling mode (--profile): per-tool-call stack samples and a loop-lag watchdog
+        self.profiler = None
+        self.lag_monitor = None
+
+        # Record (--record) or replay (src/cassette.py) upstream traffic and tool calls
+        self.cassette = None
+        self.replay = None
+
+        # Upstream calls currently waiting on Mattermost / model providers (get_server_stats)
+        self.in_flight = {'mattermost': 0, 'anthropic': 0}
+        self.started_at = time.time()
+
+        # Channel history sync: full-text index, per-channel cursors and post listeners
+        self.search_index = None
+        self.sync_cursors: Dict[str, int] = {}
+        self.synced_at: Dict[str, float] = {}  # wall-clock time of each channel's last completed sync
+        self.post_listeners: List[Callable] = []
+        self.usernames: Dict[str, str] = {}
+        self.subscriptions: Dict[str, asyncio.Task] = {}
+        self.notification_channels: set = set()  # channels watched for subscribe_notifications
+        self.backfills: Dict[str, asyncio.Task] = {}
+        self.channel_id = "f9pna31wginu3nuwezi6boeura"  # Multi-Model channel
         
         # MCP Server setup
         self.server = Server("multi-model-debate")
         
         # Load configuration
         self.load_config()
+
+        # Semantic recall of older messages into persona context
+        self.conversation_context.memory = self.build_semantic_memory()
+        self.post_listeners.append(self.remember_synced_posts)
+        self.post_listeners.append(self.invalidate_synced_threads)
+        self.post_listeners.append(self.speculate_on_posts)
+        self.last_human_post_at: Dict[str, int] = {}
+        self.post_listeners.append(self.track_human_posts)
+
+        # Participation, reply latency and AI streaks per channel (channel_stats, autonomous limits)
+        self.analytics = ChannelAnalytics(
+            self.is_ai_author,
+            recent_posts=self.config.get('history_sync', {}).get('analytics_window', 5000),
+            history=self.channel_history
+        )
+        self.post_listeners.append(self.analytics.add_posts)
+
+        # Decisions, action items and open questions extracted as posts sync (get_decisions)
+        self.decisions = None
+        self.post_listeners.append(self.extract_decisions)
+
+        # Channel transcripts as MCP resources, pushed to subscribed clients as posts sync
+        self.resources = ResourceHub.from_config(self.config, on_channel_released=self.release_watch)
+        self.post_listeners.append(self.publish_resource_updates)
         
         # Initialize Mattermost connection (optional in Docker mode)
         try:
@@ -192,8 +388,9 @@ class MultiModelMCPServer:
             logger.warning(f"Mattermost connection failed, running in offline mode: {e}")
             self.mattermost = None
         
-        # Register MCP tools
+        # Register MCP tools and resources
         self.register_tools()
+        self.register_resources()
     
     def load_config(self):
         """Load configuration from YAML file"""
@@ -205,6 +402,7 @@ class MultiModelMCPServer:
                 self.collaboration_rules = self.config.get('autonomous_collaboration', {})
                 logger.info(f"Configuration loaded from {self.config_file}")
                 logger.info(f"Autonomous collaboration: {self.collaboration_rules.get('enabled', False)}")
+                log_pipeline.configure(self.config.get('logging_pipeline', {}) or {})
                 
         except Exception as e:
             print(f"ERROR: Error loading config: {e}")
@@ -223,6 +421,22 @@ class MultiModelMCPServer:
                 }
             }
             self.collaboration_rules = self.config.get('autonomous_collaboration', {})
+
+        # Compile engagement rules into a local router so silent personas cost no model calls
+        self.engagement_router = EngagementRouter.from_config(self.config)
+        self.bridge_classifier = BridgeClassifier.from_config(self.config)
+        self.model_router = ModelRouter.from_config(self.config)
+        self.providers = ProviderPool.from_config(
+            self.config, lambda **params: self.create_message(**params),
+            transport=lambda provider, params, request: self.model_call(provider, params, request),
+            on_discarded=self.charge_discarded_completion,
+            anthropic_available=lambda: self.anthropic_client is not None or self.replay is not None
+        )
+        self.redundancy_detector = RedundancyDetector.from_config(self.collaboration_rules)
+        self.budget_governor = BudgetGovernor.from_config(self.config)
+        self.tracer = Tracer.from_config(self.config, self.data_dir)
+        self.speculator = Speculator.from_config(self.config, self.speculate_reply)
+        self.bots = BotRegistry.from_config(self.config)
     
     def init_mattermost(self):
         """Initialize Mattermost connection using bot token"""
@@ -256,6 +470,7 @@ class MultiModelMCPServer:
                 self.mattermost = True  # Flag to indicate Mattermost is configured
             else:
                 raise Exception(f"Authentication failed: {response.status_code} - {response.text}")
+            self.identify_bots(user)
 
             # Get channel ID (hardcoded for MVP)
             self.channel_id = "f9pna31wginu3nuwezi6boeura"  # Multi-Model channel
@@ -270,6 +485,21 @@ class MultiModelMCPServer:
                 logger.warning(f"Mattermost connection disabled: {str(e)[:100]}")
             self.mattermost = None
     
+    def identify_bots(self, server_user: dict):
+        """Check each persona bot's token once at startup and cache its user ID and username"""
+        self.bots.remember_user(self.bots.default, server_user)
+        for bot in self.bots.identities():
+            if bot.user_id is None:
+                try:
+                    response = bot.session.get(f"{self.mattermost_base_url}/users/me", timeout=10)
+                    if response.status_code != 200:
+                        raise Exception(f"{response.status_code} - {response.text[:100]}")
+                    self.bots.remember_user(bot, response.json())
+                except Exception as e:
+                    logger.warning(f"Bot for {', '.join(bot.personas)} failed authentication: {str(e)[:100]}")
+                    continue
+            self.usernames[bot.user_id] = bot.username
+
     def register_tools(self):
         """Register MCP tools for multi-model collaboration"""
         
@@ -287,10 +517,56 @@ class MultiModelMCPServer:
                                 "type": "integer",
                                 "description": "Number of recent messages to retrieve",
                                 "default": 10
+                            },
+                            "mode": {
+                                "type": "string",
+                                "description": "'flat' lists every post; 'threads' lists root posts with reply counts (expand with read_thread)",
+                                "enum": ["flat", "threads"],
+                                "default": "flat"
+                            },
+                            "before": {
+                                "type": "string",
+                                "description": "Cursor: return posts older than this post ID (use the returned continuation cursor)"
+                            },
+                            "after": {
+                                "type": "string",
+                                "description": "Cursor: return posts newer than this post ID"
+                            },
+                            "since": {
+                                "type": "string",
+                                "description": "Only posts at or after this time (ISO 8601 or epoch milliseconds)"
+                            },
+                            "until": {
+                                "type": "string",
+                                "description": "Only posts at or before this time (ISO 8601 or epoch milliseconds)"
+                            },
+                            "format": {
+                                "type": "string",
+                                "description": "'text' lines; 'compact' uses author aliases and delta timestamps; 'json' is structured",
+                                "enum": FORMATS,
+                                "default": TEXT
+                            },
+                            "max_tokens": {
+                                "type": "integer",
+                                "description": "Cap on the rendered size; the oldest posts are dropped first"
                             }
                         }
                     }
                 ),
+                Tool(
+                    name="read_thread",
+                    description="Read the replies of one thread (root post ID from read_discussion mode='threads')",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "root_id": {
+                                "type": "string",
+                                "description": "Post ID of the thread's root post"
+                            }
+                        },
+                        "required": ["root_id"]
+                    }
+                ),
                 Tool(
                     name="contribute",
                     description="Contribute to team discussion as a specific persona",
@@ -310,6 +586,11 @@ class MultiModelMCPServer:
                                 "type": "boolean",
                                 "description": "Whether this is an autonomous AI-to-AI contribution",
                                 "default": False
+                            },
+                            "delivery": {
+                                "type": "string",
+                                "enum": ["sync", "async"],
+                                "description": "sync posts before returning; async queues the reply in a durable outbox and returns a delivery ID"
                             }
                         },
                         "required": ["message"]
@@ -318,11 +599,130 @@ class MultiModelMCPServer:
                 Tool(
                     name="get_conversation_context",
                     description="Get structured conversation context and summary",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "format": {
+                                "type": "string",
+                                "description": "'text' summary; 'compact' or 'json' render the recent posts with authors",
+                                "enum": FORMATS,
+                                "default": TEXT
+                            },
+                            "max_tokens": {
+                                "type": "integer",
+                                "description": "Cap on the rendered size; the oldest posts are dropped first"
+                            }
+                        }
+                    }
+                ),
+                Tool(
+                    name="search_discussion",
+                    description="Full-text search over the channel history; returns ranked snippets with post IDs and timestamps",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "query": {
+                                "type": "string",
+                                "description": "Words to search for (append * for prefix search)"
+                            },
+                            "limit": {
+                                "type": "integer",
+                                "description": "Maximum number of matches to return",
+                                "default": 10
+                            },
+                            "channel_id": {
+                                "type": "string",
+                                "description": "Channel to search (defaults to the debate channel)"
+                            }
+                        },
+                        "required": ["query"]
+                    }
+                ),
+                Tool(
+                    name="get_budget_status",
+                    description="Show current token burn against the per-channel and per-persona budgets",
                     inputSchema={
                         "type": "object",
                         "properties": {}
                     }
                 ),
+                Tool(
+                    name="route_message",
+                    description="Classify a message as mandatory/optional/observe for each persona without calling the model",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "message": {
+                                "type": "string",
+                                "description": "The incoming message to route"
+                            },
+                            "author": {
+                                "type": "string",
+                                "description": "Author of the message (personas never respond to themselves)"
+                            }
+                        },
+                        "required": ["message"]
+                    }
+                ),
+                Tool(
+                    name="submit_batch_job",
+                    description="Queue many prompts for offline generation through the Message Batches API (batch pricing, no interactive latency)",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "prompts": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "description": "Prompts to generate responses for"
+                            },
+                            "instruction": {
+                                "type": "string",
+                                "description": "Instruction prepended to every prompt (e.g. 'Summarize this transcript')"
+                            },
+                            "persona": {
+                                "type": "string",
+                                "description": "Persona whose model tier settings to use"
+                            },
+                            "tier": {
+                                "type": "string",
+                                "description": "Model tier to use ('triage' or 'escalated')",
+                                "default": "triage"
+                            }
+                        },
+                        "required": ["prompts"]
+                    }
+                ),
+                Tool(
+                    name="get_delivery_status",
+                    description="Get the status of a contribute post queued with delivery=async",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "delivery_id": {
+                                "type": "string",
+                                "description": "Delivery ID returned by contribute"
+                            }
+                        },
+                        "required": ["delivery_id"]
+                    }
+                ),
+                Tool(
+                    name="get_batch_job",
+                    description="Get the status of a batch job, or a stored result by prompt hash",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "batch_id": {
+                                "type": "string",
+                                "description": "Batch ID returned by submit_batch_job"
+                            },
+                            "prompt_hash": {
+                                "type": "string",
+                                "description": "Prompt hash returned by submit_batch_job"
+                            }
+                        }
+                    }
+                ),
                 Tool(
                     name="subscribe_notifications",
                     description="Subscribe to real-time notifications from Mattermost channel",
@@ -344,6 +744,126 @@ class MultiModelMCPServer:
                         "type": "object",
                         "properties": {}
                     }
+                ),
+                Tool(
+                    name="channel_stats",
+                    description="Participation stats for a synced channel: posts per author, AI/human share, persona reply latency, AI streaks",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "channel_id": {
+                                "type": "string",
+                                "description": "Channel to report (defaults to the configured channel)"
+                            }
+                        }
+                    }
+                ),
+                Tool(
+                    name="get_decisions",
+                    description="Decisions, action items and open questions extracted from synced posts, with source post IDs (no model call)",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "channel_id": {
+                                "type": "string",
+                                "description": "Channel to report (defaults to the configured channel)"
+                            },
+                            "kind": {
+                                "type": "string",
+                                "description": "Which items to return",
+                                "enum": ["decision", "action", "question", "all"],
+                                "default": "all"
+                            },
+                            "status": {
+                                "type": "string",
+                                "description": "'open' hides questions already answered by a decision in their thread",
+                                "enum": ["open", "resolved"]
+                            },
+                            "since_minutes": {
+                                "type": "integer",
+                                "description": "Only items from posts created in the last N minutes"
+                            },
+                            "limit": {
+                                "type": "integer",
+                                "description": "Maximum items per kind",
+                                "default": 20
+                            }
+                        }
+                    }
+                ),
+                Tool(
+                    name="should_bridge",
+                    description="Decide locally (no model call) whether IDE text belongs in team chat; returns the bridge message when it does",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "text": {
+                                "type": "string",
+                                "description": "IDE discussion text to route"
+                            },
+                            "summary": {
+                                "type": "string",
+                                "description": "Summary for the bridge message (defaults to the sentence with the first trigger phrase)"
+                            }
+                        },
+                        "required": ["text"]
+                    }
+                ),
+                Tool(
+                    name="get_server_stats",
+                    description="Diagnostics: caches, in-flight upstream calls, retries, context sizes, loop lag, RSS",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "tracemalloc": {
+                                "type": "string",
+                                "description": "'start' begins allocation tracing, 'snapshot' lists the top allocation sites, 'stop' ends tracing",
+                                "enum": ["start", "snapshot", "stop"]
+                            },
+                            "top": {
+                                "type": "integer",
+                                "description": "Allocation sites listed in a tracemalloc snapshot",
+                                "default": 10
+                            }
+                        }
+                    }
+                ),
+                Tool(
+                    name="batch",
+                    description="Run several tool calls in one request; independent operations run concurrently",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "operations": {
+                                "type": "array",
+                                "description": "Tool calls to run; results come back in the same order",
+                                "items": {
+                                    "type": "object",
+                                    "properties": {
+                                        "id": {
+                                            "type": "string",
+                                            "description": "Name other operations use in depends_on (default op1, op2, ...)"
+                                        },
+                                        "tool": {
+                                            "type": "string",
+                                            "description": "Tool name, e.g. read_discussion or contribute"
+                                        },
+                                        "arguments": {
+                                            "type": "object",
+                                            "description": "Arguments for the tool"
+                                        },
+                                        "depends_on": {
+                                            "type": "array",
+                                            "items": {"type": "string"},
+                                            "description": "Operation ids that must succeed first; otherwise this one is skipped"
+                                        }
+                                    },
+                                    "required": ["tool"]
+                                }
+                            }
+                        },
+                        "required": ["operations"]
+                    }
                 )
             ]
         
@@ -351,82 +871,183 @@ class MultiModelMCPServer:
         @self.server.call_tool()
         async def call_tool_handler(name: str, arguments: dict) -> List[TextContent]:
             """Universal tool handler that routes to specific implementations"""
-            logger.info(f"Tool called: name={name}, arguments={arguments}")
-            
-            if name == "read_discussion":
-                return await self.handle_read_discussion(arguments)
-            elif name == "contribute":
-                return await self.handle_contribute(arguments)
-            elif name == "get_conversation_context":
-                return await self.handle_get_conversation_context(arguments)
-            elif name == "subscribe_notifications":
-                return await self.handle_subscribe_notifications(arguments)
-            elif name == "unsubscribe_notifications":
-                return await self.handle_unsubscribe_notifications(arguments)
-            else:
-                return [TextContent(type="text", text=f"ERROR: Unknown tool {name}")]
+            logger.info("Tool called: %s", name,
+                        extra={'event': 'tool_call', 'fields': {'tool': name, 'arguments': arguments}})
+
+            with self.tracer.start_span(f"tool/{name}", root=True, **{'mcp.tool': name}) as tool_span:
+                start = time.perf_counter()
+                with self.profiler.profile(name) if self.profiler else nullcontext():
+                    result = await self.dispatch_tool(name, arguments)
+                if self.cassette:
+                    self.cassette.record_tool(name, arguments, result, (time.perf_counter() - start) * 1000)
+                if result and result[0].text.startswith("ERROR"):
+                    tool_span.set_status(STATUS_ERROR, result[0].text[:200])
+                return result
+
+    def register_resources(self):
+        """Register channel transcript resources (mattermost://channel/{id}) with subscribe support"""
+
+        @self.server.list_resources()
+        async def list_resources() -> List[Resource]:
+            channels = [self.channel_id] + [c for c in self.resources.subscribed_channels() if c != self.channel_id]
+            return [
+                Resource(
+                    uri=channel_uri(channel_id),
+                    name=f"channel-{channel_id}",
+                    description="Channel transcript; append ?since=<cursor> to read only newer posts",
+                    mimeType="text/plain"
+                )
+                for channel_id in channels
+            ]
+
+        @self.server.read_resource()
+        async def read_resource(uri) -> List[ReadResourceContents]:
+            return [ReadResourceContents(content=await self.read_channel_resource(str(uri)), mime_type="text/plain")]
+
+        @self.server.subscribe_resource()
+        async def subscribe_resource(uri):
+            session = self.server.request_context.session
+            channel_id, _ = parse_channel_uri(str(uri))
+            self.resources.subscribe(session, str(uri), session.send_resource_updated)
+            self.watch(channel_id)
+            logger.info(f"Resource subscription for channel {channel_id}")
+
+        @self.server.unsubscribe_resource()
+        async def unsubscribe_resource(uri):
+            self.resources.unsubscribe(self.server.request_context.session, str(uri))
+
+    async def read_channel_resource(self, uri: str) -> str:
+        """Render a channel transcript, or only posts changed after the URI's since cursor"""
+        channel_id, since = parse_channel_uri(uri)
+        transcript = self.resources.transcript(channel_id)
+        if not transcript.posts:
+            # Transcripts live in memory while the sync cursor is persisted: after a restart an incremental
+            # sync returns nothing, so seed from the index first
+            transcript.add(self.get_search_index().recent_posts(channel_id, transcript.max_posts))
+            if self.mattermost:
+                await self.sync_channel_posts(channel_id)
+
+        lines = transcript.render(since)
+        if not lines:
+            lines = ["No new messages" if since is not None else "No messages synced for this channel"]
+        lines.append(f"Next: {channel_uri(channel_id, transcript.cursor or since or 0)}")
+        return "\n".join(lines)
+
+    async def dispatch_tool(self, name: str, arguments: dict) -> List[TextContent]:
+        """Route a tool call to its handler"""
+        if name == "read_discussion":
+            return await self.handle_read_discussion(arguments)
+        elif name == "read_thread":
+            return await self.handle_read_thread(arguments)
+        elif name == "contribute":
+            return await self.handle_contribute(arguments)
+        elif name == "get_conversation_context":
+            return await self.handle_get_conversation_context(arguments)
+        elif name == "search_discussion":
+            return await self.handle_search_discussion(arguments)
+        elif name == "get_budget_status":
+            return await self.handle_get_budget_status(arguments)
+        elif name == "route_message":
+            return await self.handle_route_message(arguments)
+        elif name == "submit_batch_job":
+            return await self.handle_submit_batch_job(arguments)
+        elif name == "get_batch_job":
+            return await self.handle_get_batch_job(arguments)
+        elif name == "get_delivery_status":
+            return await self.handle_get_delivery_status(arguments)
+        elif name == "subscribe_notifications":
+            return await self.handle_subscribe_notifications(arguments)
+        elif name == "unsubscribe_notifications":
+            return await self.handle_unsubscribe_notifications(arguments)
+        elif name == "batch":
+            return await self.handle_batch(arguments)
+        elif name == "get_server_stats":
+            return await self.handle_get_server_stats(arguments)
+        elif name == "channel_stats":
+            return await self.handle_channel_stats(arguments)
+        elif name == "get_decisions":
+            return await self.handle_get_decisions(arguments)
+        elif name == "should_bridge":
+            return await self.handle_should_bridge(arguments)
+        else:
+            return [TextContent(type="text", text=f"ERROR: Unknown tool {name}")]
     
     async def handle_read_discussion(self, arguments: dict) -> List[TextContent]:
         """Handle read_discussion tool calls"""
         limit = arguments.get("limit", 10)
+        mode = arguments.get("mode", "flat")
+        fmt = arguments.get("format", TEXT)
+        max_tokens = arguments.get("max_tokens")
+
+        if mode not in ("flat", "threads"):
+            return [TextContent(type="text", text=f"ERROR: Unknown mode {mode}")]
+        if fmt not in FORMATS:
+            return [TextContent(type="text", text=f"ERROR: Unknown format {fmt}")]
 
         if not self.mattermost:
             return [TextContent(type="text", text="ERROR: Mattermost connection not available")]
 
+        # Cursors, time ranges and windows larger than one page walk the history page by page
+        page_size = self.config.get('history_sync', {}).get('page_size', 200)
+        if limit > page_size or any(arguments.get(key) for key in ("before", "after", "since", "until")):
+            return await self.read_discussion_window(arguments)
+
         try:
             # Check cache first
             cache_key = f"channel_{self.channel_id}_limit_{limit}"
+            if mode == "threads":
+                cache_key += "_threads"
+            if fmt != TEXT or max_tokens is not None:
+                cache_key += f"_{fmt}_{max_tokens}"
             cached_result = self.message_cache.get_cached_messages(cache_key)
 
             if cached_result:
                 return [TextContent(type="text", text=cached_result)]
 
             # Get recent posts from channel using direct API call
-            import requests
-            headers = {"Authorization": f"Bearer {self.mattermost_token}"}
-            response = requests.get(
-                f"{self.mattermost_base_url}/channels/{self.channel_id}/posts",
-                headers=headers,
-                params={"per_page": limit},
-                timeout=10
+            params = {"per_page": limit}
+            if mode == "threads":
+                # Collapsed threads: Mattermost returns root posts with reply_count
+                params["collapsedThreads"] = "true"
+            response = await self.mattermost_request(
+                "GET", f"/channels/{self.channel_id}/posts", params=params
             )
 
             if response.status_code != 200:
                 return [TextContent(type="text", text=f"ERROR: Failed to fetch posts: {response.status_code}")]
 
-            posts_data = response.json()
-            messages = []
-
-            # Sort posts by creation time
-            posts_list = sorted(posts_data['posts'].items(),
-                              key=lambda x: x[1]['create_at'],
-                              reverse=True)[:limit]
+            # Mattermost's 'order' is already newest first
+            posts_list = decode_post_list(response)
+            entries = []
 
-            for post_id, post in posts_list:
-                user_id = post['user_id']
-                message = post.get('message', '')
+            if mode == "threads":
+                # Servers without collapsed threads still send replies; count them and keep roots only
+                page_reply_counts = {}
+                for post in posts_list:
+                    if post.root_id:
+                        page_reply_counts[post.root_id] = page_reply_counts.get(post.root_id, 0) + 1
+                posts_list = [post for post in posts_list if not post.root_id]
 
-                # Get username for display
-                try:
-                    user_response = requests.get(
-                        f"{self.mattermost_base_url}/users/{user_id}",
-                        headers=headers,
-                        timeout=5
-                    )
-                    if user_response.status_code == 200:
-                        user = user_response.json()
-                        username = user.get('username', 'unknown')
-                    else:
-                        username = 'unknown'
-                except:
-                    username = 'unknown'
-
-                timestamp = datetime.fromtimestamp(post['create_at'] / 1000)
-                messages.append(f"[{timestamp.strftime('%H:%M')}] {username}: {message}")
+            for post in posts_list[:limit]:
+                post_id = post.id
+                entry = {
+                    'id': post_id,
+                    'author': await self.get_username(post['user_id']),
+                    'create_at': post['create_at'],
+                    'message': post.get('message', '')
+                }
+                if mode == "threads":
+                    entry['replies'] = post.get('reply_count', page_reply_counts.get(post_id, 0))
+                entries.append(entry)
 
             # Reverse to show chronological order
-            messages.reverse()
-            result_text = "\n".join(messages) if messages else "No recent messages found"
+            entries.reverse()
+            # The latest posts a client reads count as fresh human input even when no watch is syncing them
+            self.track_human_posts(self.channel_id, [
+                {'username': entry['author'], 'create_at': entry['create_at'], 'message': entry['message']}
+                for entry in entries
+            ])
+            result_text = render_posts(entries, fmt, max_tokens) if entries else "No recent messages found"
 
             # Cache the result
             self.message_cache.cache_messages(cache_key, result_text)
@@ -436,57 +1057,244 @@ class MultiModelMCPServer:
         except Exception as e:
             return [TextContent(type="text", text=f"ERROR: Error reading discussion: {str(e)}")]
     
+    async def read_discussion_window(self, arguments: dict) -> List[TextContent]:
+        """Paginated read_discussion: streams pages and returns at most `limit` posts plus a continuation cursor"""
+        max_limit = self.config.get('history_sync', {}).get('max_read_limit', 500)
+        limit = min(arguments.get("limit", 10), max_limit)
+        mode = arguments.get("mode", "flat")
+        fmt = arguments.get("format", TEXT)
+        max_tokens = arguments.get("max_tokens")
+        before = arguments.get("before")
+        after = arguments.get("after")
+
+        try:
+            since_ms = parse_time_ms(arguments.get("since"))
+            until_ms = parse_time_ms(arguments.get("until"))
+        except ValueError as e:
+            return [TextContent(type="text", text=f"ERROR: {str(e)}")]
+
+        if before and after:
+            return [TextContent(type="text", text="ERROR: Use either before or after, not both")]
+
+        try:
+            forward = bool(after) or (since_ms is not None and not before and until_ms is None)
+            cursor = after if forward else before
+            if cursor is None and not forward and until_ms is not None:
+                # Start from the first indexed post after the window instead of paging down from the newest post
+                cursor = self.get_search_index().first_post_after(self.channel_id, until_ms)
+
+            entries = []
+            last_post_id = None
+            exhausted = True
+            used_tokens = 0
+            async with aclosing(self.iter_channel_posts(self.channel_id, cursor=cursor, forward=forward,
+                                                        since_ms=since_ms, until_ms=until_ms)) as posts:
+                async for post in posts:
+                    if mode == "threads" and post.get('root_id'):
+                        continue
+                    # The token cap ends the page early so the continuation cursor never skips a post
+                    cost = estimate_tokens(post.get('message', '')) + 8
+                    if len(entries) == limit or (max_tokens is not None and entries and used_tokens + cost > max_tokens):
+                        exhausted = False
+                        break
+
+                    entries.append({
+                        'id': post['id'],
+                        'author': await self.get_username(post['user_id']),
+                        'create_at': post['create_at'],
+                        'message': post.get('message', ''),
+                        'replies': post.get('reply_count') if mode == "threads" else None
+                    })
+                    used_tokens += cost
+                    last_post_id = post['id']
+
+            if not forward:
+                entries.reverse()
+
+            if not entries:
+                return [TextContent(type="text", text="No messages found in this range")]
+
+            if exhausted:
+                trailer = "(end of history in this direction)"
+            else:
+                trailer = f"Next cursor: {'after' if forward else 'before'}={last_post_id}"
+
+            result_text = render_posts(entries, fmt, time_format='%Y-%m-%d %H:%M', trailer=trailer,
+                                       report_tokens=fmt != TEXT or max_tokens is not None)
+            return [TextContent(type="text", text=result_text)]
+
+        except Exception as e:
+            return [TextContent(type="text", text=f"ERROR: Error reading discussion: {str(e)}")]
+
+    async def iter_channel_posts(self, channel_id: str, cursor: str = None, forward: bool = False,
+                                 since_ms: int = None, until_ms: int = None):
+        """Yield posts one page at a time: newest-to-oldest from `before` cursor, or oldest-to-newest with `forward`"""
+        page_size = self.config.get('history_sync', {}).get('page_size', 200)
+
+        while True:
+            params = {"per_page": page_size}
+            if cursor:
+                params["after" if forward else "before"] = cursor
+            elif forward and since_ms is not None:
+                # No starting post: 'since' returns everything changed after that time
+                params = {"since": since_ms}
+
+            response = await self.mattermost_request("GET", f"/channels/{channel_id}/posts", params=params)
+            if response.status_code != 200:
+                raise Exception(f"Failed to fetch posts: {response.status_code}")
+
+            # Mattermost orders newest first
+            order = decode_post_list(response)
+            if not order:
+                return
+
+            if forward:
+                order.reverse()
+
+            for post in order:
+                if post.delete_at:
+                    continue
+                if since_ms is not None and post['create_at'] < since_ms:
+                    if forward:
+                        continue
+                    return
+                if until_ms is not None and post['create_at'] > until_ms:
+                    if forward:
+                        return
+                    continue
+                yield post
+
+            if "since" in params or len(order) < page_size:
+                return
+            cursor = order[-1].id
+
+    async def handle_read_thread(self, arguments: dict) -> List[TextContent]:
+        """Handle read_thread tool calls"""
+        root_id = arguments.get("root_id", "")
+
+        if not root_id:
+            return [TextContent(type="text", text="ERROR: root_id is required")]
+
+        if not self.mattermost:
+            return [TextContent(type="text", text="ERROR: Mattermost connection not available")]
+
+        try:
+            # Thread bodies are cached separately so main-channel reads stay small
+            cache_key = f"thread_{root_id}"
+            cached_result = self.thread_cache.get_cached_messages(cache_key)
+
+            if cached_result:
+                return [TextContent(type="text", text=cached_result)]
+
+            response = await self.mattermost_request("GET", f"/posts/{root_id}/thread")
+
+            if response.status_code != 200:
+                return [TextContent(type="text", text=f"ERROR: Failed to fetch thread: {response.status_code}")]
+
+            # Thread 'order' is newest first; show it chronologically
+            posts = decode_post_list(response)[::-1]
+            messages = [f"Thread {root_id} ({max(len(posts) - 1, 0)} replies):"]
+
+            for post in posts:
+                username = await self.get_username(post['user_id'])
+                timestamp = datetime.fromtimestamp(post['create_at'] / 1000)
+                messages.append(f"[{timestamp.strftime('%H:%M')}] {username}: {post.get('message', '')}")
+
+            result_text = "\n".join(messages)
+            self.thread_cache.cache_messages(cache_key, result_text)
+
+            return [TextContent(type="text", text=result_text)]
+
+        except Exception as e:
+            return [TextContent(type="text", text=f"ERROR: Error reading thread: {str(e)}")]
+
     async def handle_contribute(self, arguments: dict) -> List[TextContent]:
         """Handle contribute tool calls"""
         message = arguments.get("message", "")
         persona = arguments.get("persona", "claude_research")
+        # Config key from here on, so config lookups and draft fingerprints match speculate_reply
+        persona = self.engagement_router.resolve(persona) or persona
         autonomous = arguments.get("autonomous", False)
+        delivery = arguments.get("delivery", self.config.get('outbox', {}).get('default_delivery', "sync"))
 
         if not message:
             return [TextContent(type="text", text="ERROR: Message cannot be empty")]
 
+        if delivery not in ("sync", "async"):
+            return [TextContent(type="text", text=f"ERROR: Unknown delivery mode {delivery}")]
+
         if not self.mattermost:
             return [TextContent(type="text", text="ERROR: Mattermost connection not available")]
         
         # Check autonomous collaboration rules
         if autonomous and not self.should_allow_autonomous_contribution(persona):
             return [TextContent(type="text", text="PAUSED: Autonomous contribution limit reached. Waiting for human input.")]
+
+        # Autonomous turns only go to the model when the engagement rules say the persona should speak
+        engagement = self.get_engagement_level(message, persona)
+        if autonomous and engagement == OBSERVE:
+            return [TextContent(type="text", text=f"SKIPPED: {persona} is observing this message - no response generated")]
         
+        # Refuse before any model call once the channel or persona budget is spent
+        budget_state, utilization = self.budget_governor.assess(self.channel_id, persona)
+        if budget_state == EXHAUSTED:
+            return [TextContent(type="text", text=f"PAUSED: Token budget exhausted ({utilization:.0%} of window). Try again later.")]
+
         try:
             # Get persona configuration
             persona_config = self.config.get('personas', {}).get(persona, {})
             
             # Generate contextual response using existing logic
-            context = await self.build_context(persona)
+            with span("build_context", persona=persona):
+                context = await self.build_context(persona, query=message)
             
             # Add autonomous context if applicable
             if autonomous:
                 autonomous_status = self.get_autonomous_context()
                 context += f"\n\nAutonomous collaboration status: {autonomous_status}"
             
-            ai_response = await self.generate_response(message, persona_config, context)
+            # A speculative draft built from exactly this input skips generation
+            ai_response = None
+            if self.speculator:
+                ai_response = self.speculator.take(
+                    draft_fingerprint(message, persona_config, context, engagement, autonomous)
+                )
 
-            # Post to Mattermost with retry using direct API
-            import requests
+            if ai_response is None:
+                with span("generate_response", persona=persona, engagement=engagement):
+                    ai_response = await self.generate_response(
+                        message, persona_config, context,
+                        persona=persona, engagement=engagement, allow_pass=autonomous
+                    )
 
-            # Use the appropriate bot token based on persona
-            if persona.lower() == 'kiro':
-                bot_token = os.getenv("KIRO_BOT_TOKEN", self.mattermost_token)
-            else:
-                bot_token = self.mattermost_token  # Default to Claude-Research token
+            if not ai_response:
+                return [TextContent(type="text", text=f"SKIPPED: {persona_config.get('name', persona)} had nothing to add - nothing posted")]
+
+            # Drop drafts that repeat the recent discussion; pause exchanges that have gone circular
+            if autonomous:
+                conversation_id = f"{self.conversation_context.team}_{self.conversation_context.channel}"
+                verdict, score = self.redundancy_detector.check(conversation_id, ai_response)
+                if verdict == REDUNDANT:
+                    return [TextContent(type="text", text=f"SKIPPED: Draft repeats the recent discussion (similarity {score:.2f}) - not posted")]
+                if verdict == CIRCULAR:
+                    self.pause_autonomous_collaboration(f"circular discussion (similarity {score:.2f})")
+                    return [TextContent(type="text", text="PAUSED: Discussion is going in circles. Waiting for human input.")]
+
+            author = persona_config.get('name', persona)
 
-            headers = {"Authorization": f"Bearer {bot_token}"}
+            # Write-behind: persist the reply and let the outbox post it, retrying through Mattermost outages
+            if delivery == "async":
+                # History (persona context, redundancy fingerprints) is recorded once the outbox confirms delivery
+                delivery_id = self.get_outbox().enqueue(self.channel_id, persona, author, ai_response)
+                return [TextContent(type="text", text=f"QUEUED: Reply from {author} queued for delivery (delivery_id={delivery_id}): {ai_response[:100]}...")]
+
+            # Post to Mattermost using direct API
             post_data = {
                 'channel_id': self.channel_id,
                 'message': ai_response
             }
 
-            post_response = requests.post(
-                f"{self.mattermost_base_url}/posts",
-                json=post_data,
-                headers=headers,
-                timeout=10
-            )
+            post_response = await self.mattermost_request("POST", "/posts", bot=self.bots.for_persona(persona), json=post_data)
 
             if post_response.status_code not in [200, 201]:
                 return [TextContent(type="text", text=f"ERROR: Failed to post message: {post_response.status_code} - {post_response.text}")]
@@ -509,26 +1317,350 @@ class MultiModelMCPServer:
 
         try:
             # Get recent discussion using direct API call
-            import requests
-            headers = {"Authorization": f"Bearer {self.mattermost_token}"}
-            response = requests.get(
-                f"{self.mattermost_base_url}/channels/{self.channel_id}/posts",
-                headers=headers,
-                params={"per_page": 10},
-                timeout=10
+            response = await self.mattermost_request(
+                "GET", f"/channels/{self.channel_id}/posts", params={"per_page": 10}
             )
 
             if response.status_code != 200:
                 return [TextContent(type="text", text=f"ERROR: Failed to fetch posts: {response.status_code}")]
 
-            posts_data = response.json()
-            context_summary = await self.analyze_conversation_context(posts_data)
+            posts = decode_post_list(response)
+            fmt = arguments.get("format", TEXT)
+            if fmt not in FORMATS:
+                return [TextContent(type="text", text=f"ERROR: Unknown format {fmt}")]
 
-            return [TextContent(type="text", text=f"Conversation Context Analysis:\n{context_summary}")]
+            if fmt != TEXT:
+                # Structured formats carry the recent posts themselves (with authors) instead of the prose summary
+                entries = [
+                    {'id': post.id, 'author': await self.get_username(post.user_id),
+                     'create_at': post.create_at, 'message': post.message}
+                    for post in reversed([post for post in posts[:10] if post.message][:5])
+                ]
+                return [TextContent(type="text", text=render_posts(entries, fmt, arguments.get("max_tokens")))]
+
+            context_summary = await self.analyze_conversation_context(posts)
+            result_text = f"Conversation Context Analysis:\n{context_summary}"
+            if arguments.get("max_tokens") is not None:
+                result_text = clip(result_text, arguments["max_tokens"] * 4)
+                result_text += f"\n[~{estimate_tokens(result_text)} tokens]"
+            return [TextContent(type="text", text=result_text)]
 
         except Exception as e:
             return [TextContent(type="text", text=f"ERROR: Error analyzing conversation context: {str(e)}")]
 
+    async def handle_search_discussion(self, arguments: dict) -> List[TextContent]:
+        """Handle search_discussion tool calls"""
+        query = arguments.get("query", "")
+        limit = arguments.get("limit", 10)
+        channel_id = arguments.get("channel_id") or self.channel_id
+
+        if not query.strip():
+            return [TextContent(type="text", text="ERROR: Query cannot be empty")]
+
+        try:
+            # Pull anything posted since the last sync; offline mode searches what is already indexed
+            if self.mattermost:
+                await self.sync_channel_posts(channel_id)
+
+            start = time.perf_counter()
+            index = self.get_search_index()
+            matches = index.search(channel_id, query, limit=limit)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            # Say so when older history is not indexed yet, rather than presenting a partial index as complete
+            progress = index.backfill_progress(channel_id)
+            note = None
+            if progress and not progress['complete']:
+                note = (f"Note: older history not indexed yet ({index.count(channel_id)} posts indexed); "
+                        f"backfill continues in the background")
+
+            if not matches:
+                return [TextContent(type="text", text="\n".join(filter(None, [f"No matches for '{query}'", note])))]
+
+            lines = [f"{len(matches)} matches for '{query}' ({elapsed_ms:.1f} ms):"]
+            for match in matches:
+                timestamp = datetime.fromtimestamp(match['create_at'] / 1000)
+                lines.append(f"[{match['post_id']}] {timestamp.strftime('%Y-%m-%d %H:%M')} {match['username']}: {match['snippet']}")
+            if note:
+                lines.append(note)
+            return [TextContent(type="text", text="\n".join(lines))]
+
+        except Exception as e:
+            return [TextContent(type="text", text=f"ERROR: Error searching discussion: {str(e)}")]
+
+    async def handle_get_budget_status(self, arguments: dict) -> List[TextContent]:
+        """Handle get_budget_status tool calls"""
+        governor = self.budget_governor
+        if not governor.enabled:
+            lines = ["Budgets disabled"]
+        else:
+            lines = [f"Token budgets (window {governor.window_seconds}s, degrade at {governor.degrade_at:.0%}, shrink at {governor.shrink_at:.0%}):"]
+            for scope, burn in governor.snapshot().items():
+                lines.append(
+                    f"{scope}: {burn['tokens_in_window']}/{burn['capacity']} tokens ({burn['utilization']:.0%}), "
+                    f"{burn['total_tokens']} total"
+                )
+            if len(lines) == 1:
+                lines.append("No model usage recorded yet")
+
+        routing = self.model_router.summary()
+        if routing:
+            lines.append(f"Model routing (last {len(self.model_router.history)} calls):")
+            for tier, figures in routing.items():
+                unpriced = f", {figures['unpriced_calls']} unpriced" if figures['unpriced_calls'] else ""
+                lines.append(
+                    f"{tier}: {figures['calls']} calls, median {figures['median_latency_ms']}ms, "
+                    f"{figures['input_tokens']}/{figures['output_tokens']} tokens in/out, "
+                    f"${figures['cost_usd']:.4f}{unpriced}"
+                )
+        return [TextContent(type="text", text="\n".join(lines))]
+
+    async def handle_route_message(self, arguments: dict) -> List[TextContent]:
+        """Handle route_message tool calls"""
+        message = arguments.get("message", "")
+        author = arguments.get("author")
+
+        if not message:
+            return [TextContent(type="text", text="ERROR: Message cannot be empty")]
+
+        levels = self.engagement_router.classify(message, author)
+        lines = [f"{persona}: {level}" for persona, level in levels.items()]
+        responders = self.engagement_router.responders(message, author, levels=levels)
+        lines.append(f"Responders: {', '.join(responders) if responders else 'none'}")
+        return [TextContent(type="text", text="Engagement routing:\n" + "\n".join(lines))]
+
+    async def handle_submit_batch_job(self, arguments: dict) -> List[TextContent]:
+        """Handle submit_batch_job tool calls"""
+        prompts = arguments.get("prompts", [])
+        instruction = arguments.get("instruction")
+        persona = self.engagement_router.resolve(arguments.get("persona", ""))
+        tier = arguments.get("tier", TRIAGE)
+
+        if not prompts:
+            return [TextContent(type="text", text="ERROR: No prompts given")]
+
+        batch_jobs = self.get_batch_jobs()
+        if not batch_jobs:
+            return [TextContent(type="text", text="ERROR: Batch processing not available (no Anthropic client)")]
+
+        # Batches spend the same channel and persona budgets as live replies, and degrade the same way
+        budget_state, utilization = self.budget_governor.assess(self.channel_id, persona)
+        if budget_state == EXHAUSTED:
+            return [TextContent(type="text", text=f"PAUSED: Token budget exhausted ({utilization:.0%} of window). Try again later.")]
+
+        try:
+            params = self.model_router.tier_params(persona, TRIAGE if budget_state != BUDGET_OK else tier)
+            max_tokens = params['max_tokens']
+            if budget_state == SHRINK:
+                max_tokens = min(max_tokens, self.budget_governor.shrunk_max_tokens)
+            requests = [
+                {
+                    'model': params['model'],
+                    'max_tokens': max_tokens,
+                    'messages': [{"role": "user", "content": f"{instruction}\n\n{prompt}" if instruction else prompt}]
+                }
+                for prompt in prompts
+            ]
+            submitted = await batch_jobs.submit(requests, channel_id=self.channel_id, persona=persona)
+
+            lines = [f"OK: {len(prompts)} prompts queued ({submitted['reused']} already known)"]
+            lines.extend(f"batch: {batch_id}" for batch_id in submitted['batch_ids'])
+            lines.extend(f"prompt_hash: {key}" for key in submitted['prompt_hashes'])
+            return [TextContent(type="text", text="\n".join(lines))]
+
+        except Exception as e:
+            return [TextContent(type="text", text=f"ERROR: Error submitting batch job: {str(e)}")]
+
+    async def handle_get_batch_job(self, arguments: dict) -> List[TextContent]:
+        """Handle get_batch_job tool calls"""
+        batch_id = arguments.get("batch_id")
+        key = arguments.get("prompt_hash")
+
+        batch_jobs = self.get_batch_jobs()
+        if not batch_jobs:
+            return [TextContent(type="text", text="ERROR: Batch processing not available (no Anthropic client)")]
+
+        if key:
+            result = batch_jobs.get_result(key)
+            if not result:
+                return [TextContent(type="text", text=f"ERROR: Unknown prompt hash {key}")]
+            return [TextContent(type="text", text=f"Result {key} ({result['status']}):\n{result['text'] or ''}")]
+
+        if batch_id:
+            batch = batch_jobs.get_batch(batch_id)
+            if not batch:
+                return [TextContent(type="text", text=f"ERROR: Unknown batch {batch_id}")]
+            counts = ", ".join(f"{status}={count}" for status, count in sorted(batch['results'].items()))
+            return [TextContent(type="text", text=f"Batch {batch_id}: {batch['status']} ({batch['request_count']} requests; {counts})")]
+
+        return [TextContent(type="text", text="ERROR: batch_id or prompt_hash is required")]
+
+    async def handle_get_delivery_status(self, arguments: dict) -> List[TextContent]:
+        """Handle get_delivery_status tool calls"""
+        delivery_id = arguments.get("delivery_id")
+        if not delivery_id:
+            return [TextContent(type="text", text="ERROR: delivery_id is required")]
+
+        entry = self.get_outbox().get(delivery_id)
+        if not entry:
+            return [TextContent(type="text", text=f"ERROR: Unknown delivery {delivery_id}")]
+
+        status_text = f"Delivery {delivery_id}: {entry['status']} ({entry['attempts']} attempts)"
+        if entry['post_id']:
+            status_text += f"\nPost ID: {entry['post_id']}"
+        if entry['last_error']:
+            status_text += f"\nLast error: {entry['last_error']}"
+        return [TextContent(type="text", text=status_text)]
+
+    async def handle_batch(self, arguments: dict) -> List[TextContent]:
+        """Handle batch tool calls"""
+        batch_config = self.config.get('tool_batch', {})
+        try:
+            operations = plan_batch(arguments.get("operations") or [],
+                                    max_operations=batch_config.get('max_operations', 20))
+        except ValueError as e:
+            return [TextContent(type="text", text=f"ERROR: {str(e)}")]
+
+        async def call(tool: str, tool_arguments: dict) -> List[TextContent]:
+            with span(f"batch/{tool}", **{'mcp.tool': tool}):
+                return await self.dispatch_tool(tool, tool_arguments)
+
+        start = time.perf_counter()
+        results = await run_batch(operations, call, max_concurrency=batch_config.get('max_concurrency', 8))
+        return [TextContent(type="text", text=format_batch_results(results, (time.perf_counter() - start) * 1000))]
+
+    async def handle_channel_stats(self, arguments: dict) -> List[TextContent]:
+        """Handle channel_stats tool calls"""
+        channel_id = arguments.get("channel_id") or self.channel_id
+        stats = self.analytics.snapshot(channel_id)
+        if stats is None:
+            return [TextContent(type="text", text=f"No synced posts for channel {channel_id} yet (subscribe_notifications or search_discussion sync it)")]
+
+        max_exchanges = self.collaboration_rules.get('max_consecutive_ai_exchanges', 3)
+        lines = [
+            f"Channel {channel_id}: {stats['posts']} posts, {stats['human_posts']} human / {stats['ai_posts']} AI"
+            + (f" (AI share {stats['ai_share']:.0%})" if stats['ai_share'] is not None else ""),
+            "By author: " + ", ".join(f"{author}={count}" for author, count in stats['by_author'].items())
+        ]
+        for persona, latency in stats['reply_latency'].items():
+            lines.append(f"Reply latency {persona}: {latency['replies']} replies, mean {latency['mean_s']}s, "
+                         f"p50 {latency['p50_s']}s, p95 {latency['p95_s']}s")
+        lines.append(
+            f"AI streaks: current {stats['current_ai_streak']}, longest {stats['longest_ai_streak']}, "
+            f"mean {stats['mean_ai_streak'] if stats['mean_ai_streak'] is not None else '-'} "
+            f"(autonomous limit {max_exchanges})"
+        )
+        return [TextContent(type="text", text="\n".join(lines))]
+
+    async def handle_get_decisions(self, arguments: dict) -> List[TextContent]:
+        """Handle get_decisions tool calls"""
+        channel_id = arguments.get("channel_id") or self.channel_id
+        kind = arguments.get("kind") or "all"
+        if kind != "all" and kind not in DECISION_KINDS:
+            return [TextContent(type="text", text=f"ERROR: Unknown kind {kind}")]
+        status = arguments.get("status")
+        limit = arguments.get("limit", 20)
+        since_ms = None
+        if arguments.get("since_minutes"):
+            since_ms = int((time.time() - arguments["since_minutes"] * 60) * 1000)
+
+        extractor = self.get_decision_extractor()
+        await extractor.wait()
+        titles = {'decision': "Decisions", 'action': "Action items", 'question': "Open questions"}
+        lines = []
+        for item_kind in (DECISION_KINDS if kind == "all" else [kind]):
+            items = extractor.store.query(channel_id, [item_kind], status=status, since_ms=since_ms, limit=limit)
+            if not items:
+                continue
+            lines.append(f"{titles[item_kind]} ({len(items)}):")
+            for item in items:
+                when = datetime.fromtimestamp(item['create_at'] / 1000).strftime('%m-%d %H:%M')
+                extras = [f"post {item['post_id']}"]
+                if item['assignee']:
+                    extras.append(f"owner @{item['assignee']}")
+                if item['kind'] == 'question' and item['status'] == 'resolved':
+                    extras.append("resolved")
+                lines.append(f"- [{when}] {item['author'] or 'unknown'}: {item['text']} ({', '.join(extras)})")
+
+        if not lines:
+            return [TextContent(type="text", text=f"No decisions, action items or open questions extracted for channel {channel_id} yet")]
+        return [TextContent(type="text", text="\n".join(lines))]
+
+    async def handle_should_bridge(self, arguments: dict) -> List[TextContent]:
+        """Handle should_bridge tool calls"""
+        text = arguments.get("text") or ""
+        if not text.strip():
+            return [TextContent(type="text", text="ERROR: text is required")]
+
+        result = self.bridge_classifier.classify(text, arguments.get("summary"))
+        matched = ", ".join(result['triggers'] + [f"-{phrase}" for phrase in result['keep_local']]) or "none"
+        details = f"(score {result['score']}, matched: {matched}, {result['elapsed_us']:.0f}µs)"
+        if result['decision'] == BRIDGE:
+            return [TextContent(type="text", text=f"BRIDGE: {result['message']}\n{details}")]
+        return [TextContent(type="text", text=f"KEEP_LOCAL: keep this in the IDE {details}")]
+
+    async def handle_get_server_stats(self, arguments: dict) -> List[TextContent]:
+        """Handle get_server_stats tool calls"""
+        action = arguments.get("tracemalloc")
+        if action and action not in ("start", "snapshot", "stop"):
+            return [TextContent(type="text", text=f"ERROR: Unknown tracemalloc action {action}")]
+
+        stats = {
+            'process': {
+                'pid': os.getpid(),
+                'uptime_s': round(time.time() - self.started_at),
+                'rss': format_bytes(process_rss_bytes()),
+                'asyncio_tasks': len(asyncio.all_tasks())
+            },
+            'event_loop': {
+                'lag_ms': await measure_loop_lag_ms(),
+                'max_lag_ms': self.lag_monitor.max_lag_ms if self.lag_monitor else None
+            },
+            'in_flight': dict(self.in_flight),
+            'retry': dict(self.retry_handler.stats, max_retries=self.retry_handler.max_retries),
+            'providers': {
+                name: dict(counters, p95_ms=self.providers.latency[name].percentile(95))
+                for name, counters in self.providers.stats.items()
+            },
+            'message_cache': self.message_cache.stats(),
+            'thread_cache': self.thread_cache.stats(),
+            'conversation_context': {
+                f"{self.conversation_context.team}/{self.conversation_context.channel}":
+                    f"{len(self.conversation_context.messages)}/{self.conversation_context.max_context} messages, "
+                    f"{len(self.conversation_context.memory) if self.conversation_context.memory is not None else 0} remembered"
+            },
+            'autonomous_exchanges': {
+                conversation_id: {
+                    'exchanges': tracking['exchanges'],
+                    'participants': sorted(tracking['participants']),
+                    'last_human': tracking['last_human_message_time'].strftime('%H:%M:%S'),
+                    'paused': tracking.get('paused')
+                }
+                for conversation_id, tracking in self.autonomous_exchanges.items()
+            },
+            'channels': {
+                channel_id: f"synced to {self.sync_cursors.get(channel_id)}, "
+                            f"{len(getattr(self.resources.transcripts.get(channel_id), 'posts', ()))} in transcript, "
+                            f"watching={channel_id in self.subscriptions and not self.subscriptions[channel_id].done()}, "
+                            f"backfilling={channel_id in self.backfills}"
+                for channel_id in sorted(set(self.sync_cursors) | set(self.subscriptions))
+            },
+            'resource_subscribers': {
+                str(id(client)): queue.stats for client, queue in self.resources.subscribers.items()
+            },
+            'bots': {bot.name: bot.stats() for bot in self.bots.identities()},
+            'outbox': self.outbox.store.counts() if self.outbox else {}
+        }
+        if action:
+            report = tracemalloc_report(action, arguments.get("top", 10))
+            top = report.pop('top', None)
+            stats['tracemalloc'] = report
+            if top is not None:
+                stats['top_allocations'] = [f"{format_bytes(site['bytes'])} in {site['count']} blocks at {site['site']}"
+                                            for site in top]
+
+        return [TextContent(type="text", text=format_stats(stats))]
+
     async def handle_subscribe_notifications(self, arguments: dict) -> List[TextContent]:
         """Handle subscribe_notifications tool calls"""
         channel_id = arguments.get("channel_id", self.channel_id)
@@ -537,8 +1669,9 @@ class MultiModelMCPServer:
             return [TextContent(type="text", text="ERROR: Mattermost connection not available")]
 
         try:
-            # For now, just acknowledge the subscription request
-            # Real WebSocket implementation would go here
+            # Poll the channel through the incremental sync; new posts reach the post listeners
+            self.notification_channels.add(channel_id)
+            self.watch(channel_id)
             logger.info(f"Subscribed to notifications for channel {channel_id}")
             return [TextContent(type="text", text=f"OK: Subscribed to notifications for channel {channel_id}")]
 
@@ -551,21 +1684,446 @@ class MultiModelMCPServer:
             return [TextContent(type="text", text="ERROR: Mattermost connection not available")]
 
         try:
-            # For now, just acknowledge the unsubscription request
-            # Real WebSocket implementation would go here
+            channels = list(self.notification_channels)
+            self.notification_channels.clear()
+            # Channels with resource subscribers keep their watch
+            for channel_id in channels:
+                self.release_watch(channel_id)
             logger.info("Unsubscribed from notifications")
             return [TextContent(type="text", text="OK: Unsubscribed from notifications")]
 
         except Exception as e:
             return [TextContent(type="text", text=f"ERROR: Error unsubscribing from notifications: {str(e)}")]
 
-    async def build_context(self, persona: str = "claude_research") -> str:
-        """Build conversation context from ConversationContext"""
-        return self.conversation_context.get_context_for_persona(persona)
+    def get_engagement_level(self, message: str, persona: str, author: str = None) -> str:
+        """Engagement level of a persona for a message (unknown personas are never gated)"""
+        persona_key = self.engagement_router.resolve(persona)
+        if persona_key is None:
+            return OPTIONAL
+        return self.engagement_router.classify(message, author)[persona_key]
+
+    @contextmanager
+    def track_in_flight(self, upstream: str):
+        self.in_flight[upstream] = self.in_flight.get(upstream, 0) + 1
+        try:
+            yield
+        finally:
+            self.in_flight[upstream] -= 1
+
+    async def mattermost_request(self, method: str, path: str, bot=None, timeout: float = 10, **kwargs):
+        """Call the Mattermost REST API as a bot (the server bot by default) in a worker thread"""
+        bot = bot or self.bots.default
+        # Bots with their own token have it on their session; the server bot's may be set after startup
+        headers = {} if bot.token else {"Authorization": f"Bearer {self.mattermost_token}"}
+        with span("mattermost.request", **{'http.request.method': method, 'url.path': path}) as request_span:
+            if self.replay:
+                response = await self.replay.mattermost(method, path, **kwargs)
+            else:
+                await bot.bucket.acquire()
+                bot.requests += 1
+                start = time.perf_counter()
+                try:
+                    with self.track_in_flight('mattermost'):
+                        response = await asyncio.to_thread(
+                            bot.session.request, method, f"{self.mattermost_base_url}{path}",
+                            headers=headers, timeout=timeout, **kwargs
+                        )
+                except Exception as e:
+                    if self.cassette:
+                        self.cassette.record_mattermost(method, path, kwargs, error=e,
+                                                        duration_ms=(time.perf_counter() - start) * 1000)
+                    raise
+                if self.cassette:
+                    self.cassette.record_mattermost(method, path, kwargs, response,
+                                                    duration_ms=(time.perf_counter() - start) * 1000)
+            request_span.set_attribute('http.response.status_code', getattr(response, 'status_code', None))
+            return response
+
+    async def get_username(self, user_id: str) -> str:
+        """Resolve a user ID to a username, cached for the life of the server"""
+        if user_id in self.usernames:
+            return self.usernames[user_id]
+
+        try:
+            response = await self.mattermost_request("GET", f"/users/{user_id}", timeout=5)
+            if response.status_code != 200:
+                return 'unknown'
+            username = decode_user(response).username
+        except Exception:
+            return 'unknown'
+
+        self.usernames[user_id] = username
+        return username
+
+    def get_search_index(self) -> SearchIndex:
+        """Open the channel history index on first use"""
+        if self.search_index is None:
+            os.makedirs(self.data_dir, exist_ok=True)
+            self.search_index = SearchIndex(os.path.join(self.data_dir, "search_index.db"))
+        return self.search_index
+
+    async def sync_channel_posts(self, channel_id: str) -> List[Dict[str, Any]]:
+        """Fetch posts created, edited or deleted since the last sync and hand them to the index and listeners"""
+        sync_config = self.config.get('history_sync', {})
+        page_size = sync_config.get('page_size', 200)
+        since = self.sync_cursors.get(channel_id)
+        if since is None:
+            since = self.get_search_index().last_synced(channel_id)
+
+        synced = []
+        if since is None:
+            # First sync of this channel: the newest page now, older history in a background backfill
+            response = await self.mattermost_request(
+                "GET", f"/channels/{channel_id}/posts", params={"per_page": page_size}
+            )
+            if response.status_code != 200:
+                raise Exception(f"Failed to fetch posts: {response.status_code}")
+            synced = decode_post_list(response)
+            oldest = min(synced, key=lambda post: post['create_at'])['id'] if synced else None
+            self.get_search_index().record_backfill(channel_id, oldest, 1, complete=len(synced) < page_size)
+        else:
+            # Mattermost returns at most 1000 posts per 'since' query
+            while True:
+                response = await self.mattermost_request(
+                    "GET", f"/channels/{channel_id}/posts", params={"since": since}
+                )
+                if response.status_code != 200:
+                    raise Exception(f"Failed to fetch posts: {response.status_code}")
+                posts = decode_post_list(response)
+                synced.extend(posts)
+                newest = max((p.get('update_at') or p['create_at'] for p in posts), default=since)
+                if len(posts) < 1000 or newest <= since:
+                    break
+                since = newest
+
+        for post in synced:
+            post['username'] = await self.get_username(post['user_id'])
+
+        self.ingest_posts(channel_id, synced)
+        self.synced_at[channel_id] = time.time()
+        self.resume_backfill(channel_id)
+        return synced
+
+    def resume_backfill(self, channel_id: str):
+        """Continue indexing older history in the background while the channel's backfill is incomplete"""
+        progress = self.get_search_index().backfill_progress(channel_id)
+        task = self.backfills.get(channel_id)
+        if progress and not progress['complete'] and (task is None or task.done()):
+            self.backfills[channel_id] = detached_task(self.backfill_channel(channel_id))
+
+    async def backfill_channel(self, channel_id: str):
+        """Index pages older than the oldest fetched post, up to backfill_max_pages per run; the cursor is
+        persisted, so a later sync resumes where this run stopped"""
+        sync_config = self.config.get('history_sync', {})
+        page_size = sync_config.get('page_size', 200)
+        max_pages = sync_config.get('backfill_max_pages', 50)
+        index = self.get_search_index()
+        progress = index.backfill_progress(channel_id)
+        pages = 0
+        try:
+            while not progress['complete'] and pages < max_pages:
+                response = await self.mattermost_request(
+                    "GET", f"/channels/{channel_id}/posts",
+                    params={"before": progress['before_post_id'], "per_page": page_size}
+                )
+                if response.status_code != 200:
+                    raise Exception(f"Failed to fetch posts: {response.status_code}")
+                posts = decode_post_list(response)
+                for post in posts:
+                    post['username'] = await self.get_username(post['user_id'])
+                self.ingest_posts(channel_id, posts)
+
+                pages += 1
+                progress = {
+                    'before_post_id': min(posts, key=lambda post: post['create_at'])['id'] if posts else progress['before_post_id'],
+                    'pages': progress['pages'] + 1,
+                    'complete': len(posts) < page_size
+                }
+                index.record_backfill(channel_id, **progress)
+
+            if not progress['complete']:
+                logger.warning(f"Backfill of channel {channel_id} paused after {progress['pages']} pages "
+                               f"({index.count(channel_id)} posts indexed); older history resumes on the next sync")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Backfill of channel {channel_id} failed, resumes on the next sync: {str(e)[:200]}")
+        finally:
+            if self.backfills.get(channel_id) is asyncio.current_task():
+                self.backfills.pop(channel_id, None)
+
+    def ingest_posts(self, channel_id: str, posts: List[Dict[str, Any]]):
+        """Index fetched posts, advance the channel's sync cursor and notify listeners"""
+        if not posts:
+            return
+
+        self.get_search_index().add_posts(channel_id, posts)
+        newest = max(p.get('update_at') or p['create_at'] for p in posts)
+        self.sync_cursors[channel_id] = max(self.sync_cursors.get(channel_id, 0), newest)
+        self.synced_at[channel_id] = time.time()
+
+        for listener in self.post_listeners:
+            try:
+                listener(channel_id, posts)
+            except Exception as e:
+                logger.warning(f"Post listener failed: {e}")
+
+    def watch(self, channel_id: str):
+        """Start polling a channel unless it is already watched"""
+        task = self.subscriptions.get(channel_id)
+        if task is None or task.done():
+            self.subscriptions[channel_id] = detached_task(self.watch_channel(channel_id))
+
+    def release_watch(self, channel_id: str):
+        """Stop polling a channel once neither subscribe_notifications nor a resource subscriber needs it"""
+        if channel_id in self.notification_channels or channel_id in self.resources.subscriptions:
+            return
+        task = self.subscriptions.pop(channel_id, None)
+        if task is not None:
+            task.cancel()
+            logger.info(f"Stopped watching channel {channel_id}")
+
+    async def watch_channel(self, channel_id: str):
+        """Sync a subscribed channel on an interval until unsubscribed"""
+        poll_interval = self.config.get('history_sync', {}).get('poll_interval', 15)
+        while True:
+            try:
+                # Each poll is its own trace rather than a child of the subscribing tool call
+                with self.tracer.start_span("sync/watch", root=True, channel_id=channel_id):
+                    await self.sync_channel_posts(channel_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Sync of subscribed channel {channel_id} failed: {str(e)[:200]}")
+            await asyncio.sleep(poll_interval)
+
+    def get_batch_jobs(self) -> Optional[BatchJobManager]:
+        """Create the batch job manager on first use (fake endpoint when ANTHROPIC_BATCH_BACKEND=fake)"""
+        if self.batch_jobs is None:
+            if os.getenv("ANTHROPIC_BATCH_BACKEND") == "fake":
+                client = FakeBatchClient()
+            else:
+                client = self.anthropic_client
+            if client is None:
+                return None
+
+            batch_config = self.config.get('batch_jobs', {})
+            os.makedirs(self.data_dir, exist_ok=True)
+            self.batch_jobs = BatchJobManager(
+                client,
+                BatchStore(os.path.join(self.data_dir, "batch_jobs.db")),
+                poll_interval=batch_config.get('poll_interval', 30),
+                max_batch_size=batch_config.get('max_batch_size', 10000),
+                max_poll_failures=batch_config.get('max_poll_failures', 10),
+                retry_base_delay=batch_config.get('retry_base_delay', 1.0),
+                retry_max_delay=batch_config.get('retry_max_delay', 300.0),
+                on_usage=self.charge_batch_usage
+            )
+        return self.batch_jobs
+
+    def charge_batch_usage(self, channel_id: Optional[str], persona: Optional[str], input_tokens: int, output_tokens: int):
+        """Charge a finished batch's usage to the budgets of the channel and persona it was submitted for"""
+        self.budget_governor.record(channel_id or self.channel_id, persona, input_tokens, output_tokens)
+        logger.info("Batch usage charged: channel=%s persona=%s tokens=%d/%d",
+                    channel_id, persona, input_tokens, output_tokens, extra={'event': 'batch_usage'})
+
+    def get_decision_extractor(self) -> DecisionExtractor:
+        """Open the decision index on first use"""
+        if self.decisions is None:
+            os.makedirs(self.data_dir, exist_ok=True)
+            self.decisions = DecisionExtractor.from_config(
+                self.config, DecisionStore(os.path.join(self.data_dir, "decisions.db"))
+            )
+        return self.decisions
+
+    def get_outbox(self) -> Outbox:
+        """Create the contribute outbox on first use"""
+        if self.outbox is None:
+            outbox_config = self.config.get('outbox', {})
+            os.makedirs(self.data_dir, exist_ok=True)
+            self.outbox = Outbox(
+                OutboxStore(os.path.join(self.data_dir, "outbox.db")),
+                self.deliver_outbox_entry,
+                max_attempts=outbox_config.get('max_attempts', 8),
+                base_delay=outbox_config.get('base_delay', 1.0),
+                max_delay=outbox_config.get('max_delay', 60.0),
+                on_delivered=self.record_delivered_reply
+            )
+        return self.outbox
+
+    def record_delivered_reply(self, entry: Dict[str, Any]):
+        """Add an async reply to the conversation history once it is actually posted"""
+        if entry['channel_id'] == self.channel_id:
+            self.add_to_history(entry['author'], entry['message'])
+
+    async def deliver_outbox_entry(self, entry: Dict[str, Any]) -> Optional[str]:
+        """Post one queued reply; rate limits and server errors are retriable, other rejections are not"""
+        response = await self.mattermost_request(
+            "POST", "/posts", bot=self.bots.for_persona(entry['persona']),
+            json={'channel_id': entry['channel_id'], 'message': entry['message'],
+                  'pending_post_id': pending_post_id(entry['delivery_id'])}
+        )
+        if response.status_code not in [200, 201]:
+            retriable = response.status_code == 429 or response.status_code >= 500
+            raise DeliveryError(f"{response.status_code} - {response.text[:200]}", retriable=retriable)
+
+        self.message_cache.invalidate_cache()
+        try:
+            return response.json().get('id')
+        except ValueError:
+            return None
+
+    def build_semantic_memory(self) -> Optional[EmbeddingIndex]:
+        """Create the embedding index for the conversation, if enabled and NumPy is installed"""
+        memory_config = self.config.get('semantic_memory', {})
+        if not memory_config.get('enabled', True):
+            return None
+        if np is None:
+            logger.warning("NumPy not installed - semantic recall of older messages disabled")
+            return None
+
+        embedder = make_embedder(memory_config.get('embedding_model'), memory_config.get('dimensions', 512))
+        return EmbeddingIndex(embedder, max_items=memory_config.get('max_items', 5000))
+
+    def remember_synced_posts(self, channel_id: str, posts: List[Dict[str, Any]]):
+        """Post listener feeding synced channel history into semantic memory"""
+        if channel_id != self.channel_id:
+            return
+
+        self.conversation_context.remember([
+            {
+                'id': post['id'],
+                'author': post.get('username', 'unknown'),
+                'content': post['message'],
+                'timestamp': datetime.fromtimestamp(post['create_at'] / 1000)
+            }
+            for post in posts
+            if post.get('message') and not post.get('delete_at')
+        ])
+
+    def invalidate_synced_threads(self, channel_id: str, posts: List[Dict[str, Any]]):
+        """Post listener dropping cached threads that received new replies"""
+        for post in posts:
+            if post.get('root_id'):
+                self.thread_cache.invalidate_cache(f"thread_{post['root_id']}")
+
+    def is_ai_author(self, author: Optional[str]) -> bool:
+        """Whether a post author is one of the persona bots"""
+        return author in self.AI_PARTICIPANTS or bool(self.engagement_router.resolve(author))
+
+    def track_human_posts(self, channel_id: str, posts: List[Dict[str, Any]]):
+        """Post listener (also fed by read_discussion) passing new human posts in the active channel to
+        redundancy and autonomous tracking"""
+        if channel_id != self.channel_id or not posts:
+            return
+
+        conversation_id = f"{self.conversation_context.team}_{self.conversation_context.channel}"
+        watermark = self.last_human_post_at.get(channel_id)
+        if watermark is None:
+            # First posts seen for the channel are history: they seed the watermark instead of being replayed,
+            # except posts made after a running pause, which are the human input that lifts it
+            tracking = self.autonomous_exchanges.get(conversation_id) or {}
+            if tracking.get('paused'):
+                watermark = int(tracking['paused_at'] * 1000)
+            else:
+                watermark = max(post['create_at'] for post in posts)
+        for post in sorted(posts, key=lambda post: post['create_at']):
+            author = post.get('username')
+            # Only posts newer than the last one seen: edits and backfilled history are not fresh human input
+            if post['create_at'] <= watermark or not post.get('message') or post.get('delete_at') or self.is_ai_author(author):
+                continue
+            watermark = post['create_at']
+            self.redundancy_detector.add(conversation_id, post['message'], from_ai=False)
+            tracking = self.autonomous_exchanges.get(conversation_id) or {}
+            # A pause is only lifted by a human post made after it
+            if post['create_at'] / 1000 >= tracking.get('paused_at', 0):
+                self.update_autonomous_tracking(author or "unknown", post['message'])
+        self.last_human_post_at[channel_id] = watermark
+
+    def speculate_on_posts(self, channel_id: str, posts: List[Dict[str, Any]]):
+        """Post listener starting speculative drafts for a fresh human post in the active channel"""
+        if not self.speculator or channel_id != self.channel_id:
+            return
+
+        live = [post for post in posts if post.get('message') and not post.get('delete_at')]
+        if not live:
+            return
+        newest = max(live, key=lambda post: post['create_at'])
+        self.speculator.channel_moved(channel_id, newest['create_at'])
+
+        author = newest.get('username')
+        if self.is_ai_author(author):
+            return
+
+        levels = self.engagement_router.classify(newest['message'], author)
+        personas = [persona for persona, level in levels.items()
+                    if level in self.speculator.levels and self.providers.usable(persona)]
+        if personas:
+            self.speculator.schedule(channel_id, newest, personas)
+
+    def channel_history(self, channel_id: str, limit: int):
+        """Indexed posts per author and the newest posts of a channel, to rebuild its analytics after a restart"""
+        index = self.get_search_index()
+        return index.author_counts(channel_id), index.recent_posts(channel_id, limit)
+
+    def extract_decisions(self, channel_id: str, posts: List[Dict[str, Any]]):
+        """Post listener: queue synced posts for background decision extraction"""
+        self.get_decision_extractor().submit(channel_id, posts)
+
+    def publish_resource_updates(self, channel_id: str, posts: List[Dict[str, Any]]):
+        """Fold synced posts into the channel resource and notify its subscribers"""
+        self.resources.publish(channel_id, posts)
+
+    async def speculate_reply(self, persona: str, post: Dict[str, Any]):
+        """Draft the reply contribute would generate for this post, with its input fingerprint"""
+        message = post['message']
+        persona_config = self.config.get('personas', {}).get(persona, {})
+        engagement = self.get_engagement_level(message, persona)
+        context = await self.build_context(persona, query=message)
+
+        fingerprint = draft_fingerprint(message, persona_config, context, engagement, False)
+        text = await self.generate_response(message, persona_config, context, persona=persona, engagement=engagement,
+                                            speculative=True)
+        if not text:
+            return None
+        return fingerprint, text, estimate_tokens(context + message + text)
+
+    async def build_context(self, persona: str = "claude_research", query: str = None) -> str:
+        """Build conversation context from ConversationContext, plus relevant older messages for the query"""
+        context = self.conversation_context.get_context_for_persona(persona)
+
+        if query and self.conversation_context.memory is not None:
+            memory_config = self.config.get('semantic_memory', {})
+            with span("semantic.retrieve") as retrieval:
+                # Messages still being embedded would make recall (and draft fingerprints) depend on timing
+                await self.conversation_context.memory.wait()
+                relevant = await asyncio.to_thread(
+                    self.conversation_context.get_relevant_messages,
+                    query,
+                    k=memory_config.get('top_k', 4),
+                    token_budget=memory_config.get('token_budget', 300),
+                    min_score=memory_config.get('min_score', 0.15)
+                )
+                retrieval.set_attribute('retrieval.results', len(relevant))
+            logger.info(
+                "Semantic retrieval: %d messages in %.2fms (%d indexed)",
+                len(relevant), self.conversation_context.last_retrieval_ms, len(self.conversation_context.memory),
+                extra={'event': 'semantic_retrieval'}
+            )
+
+            if relevant:
+                lines = [f"[{msg['timestamp'].strftime('%H:%M')}] {msg['author']}: {msg['content']}" for msg in relevant]
+                context += "\n\nRelevant earlier messages:\n" + "\n".join(lines)
+
+        return context
     
     def add_to_history(self, author: str, content: str):
         """Add message to conversation history using ConversationContext"""
         self.conversation_context.add_message(author, content)
+
+        # Fingerprint every message so repeated points can be spotted
+        conversation_id = f"{self.conversation_context.team}_{self.conversation_context.channel}"
+        self.redundancy_detector.add(conversation_id, content, from_ai=author in self.AI_PARTICIPANTS)
         
         # Track autonomous collaboration if enabled
         if self.collaboration_rules.get('enabled', False):
@@ -574,9 +2132,7 @@ class MultiModelMCPServer:
     def update_autonomous_tracking(self, author: str, content: str):
         """Update autonomous collaboration tracking"""
         # Check if this is an AI participant
-        ai_participants = ['Claude-Research', 'Kiro', 'claude_research', 'kiro']
-        
-        if author in ai_participants:
+        if author in self.AI_PARTICIPANTS:
             conversation_id = f"{self.conversation_context.team}_{self.conversation_context.channel}"
             
             if conversation_id not in self.autonomous_exchanges:
@@ -595,7 +2151,31 @@ class MultiModelMCPServer:
             if conversation_id in self.autonomous_exchanges:
                 self.autonomous_exchanges[conversation_id]['last_human_message_time'] = datetime.now()
                 # Don't reset exchanges here, just mark human activity
+                # Human input does lift a redundancy pause
+                self.autonomous_exchanges[conversation_id].pop('paused', None)
+                self.autonomous_exchanges[conversation_id].pop('paused_at', None)
+
+    def pause_autonomous_collaboration(self, reason: str):
+        """Stop autonomous exchanges until a human posts"""
+        conversation_id = f"{self.conversation_context.team}_{self.conversation_context.channel}"
+        tracking = self.autonomous_exchanges.setdefault(conversation_id, {
+            'exchanges': 0,
+            'last_human_message_time': datetime.now(),
+            'participants': set()
+        })
+        tracking['paused'] = reason
+        tracking['paused_at'] = time.time()
+        logger.info(f"Autonomous collaboration paused: {reason}")
     
+    def synced_history_is_current(self, channel_id: str) -> bool:
+        """Whether a channel is watched or was synced recently enough to trust its analytics"""
+        task = self.subscriptions.get(channel_id)
+        if task is not None and not task.done():
+            return True
+        sync_config = self.config.get('history_sync', {})
+        max_age = sync_config.get('max_streak_age', 2 * sync_config.get('poll_interval', 15))
+        return time.time() - self.synced_at.get(channel_id, 0) <= max_age
+
     def should_allow_autonomous_contribution(self, persona: str) -> bool:
         """Check if autonomous collaboration is allowed"""
         if not self.collaboration_rules.get('enabled', False):
@@ -604,10 +2184,20 @@ class MultiModelMCPServer:
         conversation_id = f"{self.conversation_context.team}_{self.conversation_context.channel}"
         max_exchanges = self.collaboration_rules.get('max_consecutive_ai_exchanges', 3)
         
+        # Synced channel history also counts persona posts that did not go through this server,
+        # but only while it is current; a stale streak would block turns after a human reply it never saw
+        if self.synced_history_is_current(self.channel_id) and \
+                self.analytics.current_ai_streak(self.channel_id) >= max_exchanges:
+            return False
+
         if conversation_id not in self.autonomous_exchanges:
             return True
         
         tracking = self.autonomous_exchanges[conversation_id]
+
+        # Paused by the redundancy detector
+        if tracking.get('paused'):
+            return False
         
         # Check if too many AI exchanges without human input
         if tracking['exchanges'] >= max_exchanges:
@@ -627,10 +2217,19 @@ class MultiModelMCPServer:
         
         return f"Autonomous exchanges: {tracking['exchanges']}/{max_exchanges}, Participants: {', '.join(tracking['participants'])}"
     
-    async def generate_response(self, message: str, persona_config: dict, context: str) -> str:
-        """Generate AI response using persona and context"""
-        # Check if Anthropic client is available
-        if not self.anthropic_client:
+    async def generate_response(self, message: str, persona_config: dict, context: str,
+                                persona: str = None, engagement: str = None, allow_pass: bool = False,
+                                speculative: bool = False) -> Optional[str]:
+        """Generate AI response using persona and context, routed through the configured model tiers
+
+        Speculative drafts are paid for by the speculator's own bucket, not the channel/persona budgets,
+        and return None (or raise) instead of a fallback message so nothing unusable is cached as a draft.
+        """
+        # Check the persona's model backend is available (a local endpoint works without an Anthropic key)
+        persona_key = self.engagement_router.resolve(persona) if persona else None
+        if not self.providers.usable(persona_key):
+            if speculative:
+                return None
             return f"I'm {persona_config.get('name', 'Assistant')} but I don't have access to AI generation right now. Here's a basic response to: {message}"
         
         try:
@@ -643,21 +2242,126 @@ class MultiModelMCPServer:
             )
             
             # Add context
-            full_prompt = f"{prompt}\n\nContext:\n{context}\n\nUser message: {message}\n\nResponse:"
-            
-            # Generate response using Claude
-            response = self.anthropic_client.messages.create(
-                model="claude-3-haiku-20240307",  # Using fastest model for demo
-                max_tokens=300,
-                messages=[{"role": "user", "content": full_prompt}]
-            )
-            
-            return response.content[0].text
+            base_prompt = f"{prompt}\n\nContext:\n{context}\n\nUser message: {message}"
+            tier, reason = self.model_router.choose_tier(message, engagement)
+
+            # As budgets tighten, stay on the cheap tier and then shorten replies
+            budget_state, utilization = self.budget_governor.assess(self.channel_id, persona_key)
+            max_tokens_cap = None
+            if budget_state != BUDGET_OK:
+                tier, reason = TRIAGE, f"budget {budget_state} ({utilization:.0%})"
+                if budget_state == SHRINK:
+                    max_tokens_cap = self.budget_governor.shrunk_max_tokens
+
+            if tier == TRIAGE:
+                # Cheap pass decides whether to answer and drafts short replies itself
+                instructions = []
+                if budget_state == BUDGET_OK:
+                    instructions.append(f"If this needs deeper analysis than a short reply, respond with exactly {ESCALATE_REPLY}.")
+                if allow_pass:
+                    instructions.append(f"If you cannot add meaningful value, respond with exactly {PASS_REPLY}.")
+                instructions.append("Otherwise reply briefly.")
+
+                draft = await self.routed_completion(
+                    persona_key, TRIAGE, reason,
+                    f"{base_prompt}\n\n{' '.join(instructions)}\n\nResponse:",
+                    max_tokens_cap=max_tokens_cap, charge_budget=not speculative
+                )
+                if draft == PASS_REPLY and allow_pass:
+                    return ""
+                if draft not in (PASS_REPLY, ESCALATE_REPLY):
+                    return draft
+                if budget_state != BUDGET_OK:
+                    return ""
+                reason = "triage requested escalation"
+
+            return await self.routed_completion(persona_key, ESCALATED, reason, f"{base_prompt}\n\nResponse:",
+                                                charge_budget=not speculative)
             
         except Exception as e:
+            if speculative:
+                raise
             logger.error(f"Error generating response: {e}")
             return f"I'm {persona_config.get('name', 'Assistant')} but I encountered an error generating a response: {str(e)}"
+
+    async def routed_completion(self, persona: Optional[str], tier: str, reason: str, prompt: str,
+                                max_tokens_cap: int = None, charge_budget: bool = True) -> str:
+        """Run one completion on a model tier, record the routing decision and charge the budget (unless told not to)"""
+        params = self.model_router.tier_params(persona, tier)
+        max_tokens = min(params['max_tokens'], max_tokens_cap) if max_tokens_cap else params['max_tokens']
+        start = time.perf_counter()
+
+        with span("model.completion", persona=persona, tier=tier, reason=reason) as completion_span:
+            provider, response = await self.providers.complete(persona, {
+                'model': params['model'],
+                'max_tokens': max_tokens,
+                'messages': [{"role": "user", "content": prompt}]
+            }, charge_discarded=charge_budget)
+            completion_span.set_attribute('gen_ai.system', provider)
+
+        latency_ms = (time.perf_counter() - start) * 1000
+        text = response.content[0].text.strip()
+        usage = getattr(response, 'usage', None)
+        outcome = {PASS_REPLY: "pass", ESCALATE_REPLY: "escalate"}.get(text, "draft")
+        model = response.model if isinstance(response, Completion) and response.model else params['model']
+
+        entry = self.model_router.record(
+            persona, tier, model, reason, latency_ms,
+            input_tokens=getattr(usage, 'input_tokens', 0) or 0,
+            output_tokens=getattr(usage, 'output_tokens', 0) or 0,
+            outcome=outcome
+        )
+        if charge_budget:
+            self.budget_governor.record(self.channel_id, persona, entry['input_tokens'], entry['output_tokens'])
+        logger.info(
+            "Model routing: persona=%s tier=%s provider=%s model=%s reason=%s latency=%sms tokens=%d/%d outcome=%s",
+            persona, tier, provider, model, reason, entry['latency_ms'],
+            entry['input_tokens'], entry['output_tokens'], outcome,
+            extra={'event': 'model_routing'}
+        )
+        return text
+
+    async def create_message(self, **params):
+        """Call the Anthropic Messages API without blocking the event loop, retrying transient failures"""
+        async def request():
+            return await asyncio.to_thread(self.anthropic_client.messages.create, **params)
+
+        return await self.model_call('anthropic', params, request)
+
+    async def model_call(self, provider: str, params: dict, request: Callable[[], Awaitable[Any]]):
+        """Upstream seam for every model backend: replay, cassette recording, span, in-flight count and retries"""
+        span_name = "anthropic.messages.create" if provider == 'anthropic' else f"{provider}.chat.completions"
+        with span(span_name, **{'gen_ai.system': provider, 'gen_ai.request.model': params.get('model'),
+                                'gen_ai.request.max_tokens': params.get('max_tokens')}) as call_span:
+            if self.replay:
+                response = await self.replay.anthropic(params)
+            else:
+                start = time.perf_counter()
+                try:
+                    with self.track_in_flight(provider):
+                        response = await self.retry_handler.retry_with_backoff(request)
+                except Exception as e:
+                    if self.cassette:
+                        self.cassette.record_anthropic(params, error=e, duration_ms=(time.perf_counter() - start) * 1000,
+                                                       provider=provider)
+                    raise
+                if self.cassette:
+                    self.cassette.record_anthropic(params, response, duration_ms=(time.perf_counter() - start) * 1000,
+                                                   provider=provider)
+            usage = getattr(response, 'usage', None)
+            call_span.set_attribute('gen_ai.usage.input_tokens', getattr(usage, 'input_tokens', None))
+            call_span.set_attribute('gen_ai.usage.output_tokens', getattr(usage, 'output_tokens', None))
+            return response
     
+    def charge_discarded_completion(self, persona: Optional[str], provider: str, response):
+        """Hedge losers still consumed tokens; charge them to the budget"""
+        usage = getattr(response, 'usage', None)
+        input_tokens = getattr(usage, 'input_tokens', 0) or 0
+        output_tokens = getattr(usage, 'output_tokens', 0) or 0
+        self.budget_governor.record(self.channel_id, persona, input_tokens, output_tokens)
+        logger.info("Discarded hedged completion: persona=%s provider=%s tokens=%d/%d",
+                    persona, provider, input_tokens, output_tokens, extra={'event': 'hedge_discarded'})
+
     def build_persona_prompt(self, role: str, description: str, behaviors: list, avoid_list: list) -> str:
         """Build persona-specific prompt from configuration"""
         prompt_parts = [
@@ -686,16 +2390,13 @@ class MultiModelMCPServer:
         
         return "\n".join(prompt_parts)
     
-    async def analyze_conversation_context(self, posts: dict) -> str:
-        """Analyze conversation for context summary"""
+    async def analyze_conversation_context(self, posts: list) -> str:
+        """Analyze conversation for context summary (posts newest first)"""
         # Simple implementation for MVP - just return recent key topics
         try:
             recent_messages = []
-            post_list = sorted(posts['posts'].items(), 
-                             key=lambda x: x[1]['create_at'], 
-                             reverse=True)[:10]
             
-            for post_id, post in post_list:
+            for post in posts[:10]:
                 message = post.get('message', '')
                 if message:
                     recent_messages.append(message)
@@ -709,14 +2410,35 @@ class MultiModelMCPServer:
         except Exception as e:
             return f"Error analyzing context: {str(e)}"
     
+    def start_recording(self, path: str):
+        """Capture every upstream request/response and tool call into a cassette"""
+        self.cassette = CassetteRecorder(path)
+        logger.info(f"Recording session to {path}")
+
+    def enable_profiling(self, output_dir: str = None, sample_rate: float = 1.0, lag_threshold_ms: float = 100.0):
+        """Sample tool-call stacks and watch the event loop for blocking callbacks"""
+        output_dir = output_dir or os.path.join(self.data_dir, "profiles")
+        self.profiler = ToolProfiler(output_dir, sample_rate=sample_rate)
+        self.lag_monitor = LoopLagMonitor(output_dir, threshold_ms=lag_threshold_ms)
+        logger.info(f"Profiling enabled: writing folded stacks to {output_dir}")
+
     async def run(self):
         """Run the MCP server"""
         try:
+            if self.lag_monitor:
+                self.lag_monitor.start()
+
             logger.info("Multi-Model Debate MCP Server starting...")
             logger.info(f"Configuration: {self.config_file}")
             logger.info(f"Personas loaded: {list(self.config.get('personas', {}).keys())}")
             logger.info("Ready for MCP client connections!")
             
+            # Pick up batches that were still running before a restart
+            batch_jobs = self.get_batch_jobs()
+            if batch_jobs:
+                batch_jobs.resume()
+            self.get_outbox().resume()
+
             # For now, run in stdio mode for Claude Code integration
             from mcp.server.stdio import stdio_server
             async with stdio_server() as (read_stream, write_stream):
@@ -725,19 +2447,52 @@ class MultiModelMCPServer:
                     server_name="multi-model-debate",
                     server_version="1.0.0",
                     capabilities=ServerCapabilities(
-                        tools={}  # Tools are registered via decorators
+                        tools={},  # Tools are registered via decorators
+                        resources=ResourcesCapability(subscribe=True, listChanged=False)
                     )
                 )
-                await self.server.run(read_stream, write_stream, init_options)
+                try:
+                    await self.server.run(read_stream, write_stream, init_options)
+                finally:
+                    # The session is gone; so are its resource subscriptions
+                    self.resources.close()
                 
         except Exception as e:
             logger.error(f"Server error: {e}")
             raise
+        finally:
+            if self.lag_monitor:
+                self.lag_monitor.stop()
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    """Command-line options shared by main.py and python -m src.mcp_server"""
+    parser = argparse.ArgumentParser(description="Multi-Model Debate MCP Server")
+    parser.add_argument("--profile", action="store_true",
+                        help="write per-tool-call stack profiles and event-loop stall reports")
+    parser.add_argument("--profile-dir", default=None,
+                        help="output directory for profiles (default: <MCP_DATA_DIR>/profiles)")
+    parser.add_argument("--profile-sample-rate", type=float, default=1.0,
+                        help="fraction of tool calls to profile")
+    parser.add_argument("--lag-threshold-ms", type=float, default=100.0,
+                        help="report callbacks that block the event loop longer than this")
+    parser.add_argument("--uvloop", action="store_true",
+                        help="run on the uvloop event loop when installed")
+    parser.add_argument("--record", metavar="CASSETTE", default=None,
+                        help="record upstream traffic and tool calls (replay with python -m src.cassette)")
+    return parser.parse_args(argv)
 
-async def main():
+async def main(args: argparse.Namespace = None):
     """Main entry point"""
+    args = args or parse_args()
     server = MultiModelMCPServer()
+    if args.profile:
+        server.enable_profiling(args.profile_dir, args.profile_sample_rate, args.lag_threshold_ms)
+    if args.record:
+        server.start_recording(args.record)
     await server.run()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    args = parse_args()
+    if args.uvloop:
+        install_uvloop()
+    asyncio.run(main(args))
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Model Routing
+Tiered model selection: cheap triage pass first, stronger model only when warranted
+"""
+
+import time
+import statistics
+from collections import deque
+from typing import List, Dict, Optional, Any, Tuple
+
+try:
+    from .engagement_router import PhraseMatcher, MANDATORY
+except ImportError:
+    from engagement_router import PhraseMatcher, MANDATORY
+
+TRIAGE = "triage"
+ESCALATED = "escalated"
+
+# Sentinel replies the triage model may give instead of a draft
+PASS_REPLY = "PASS"
+ESCALATE_REPLY = "ESCALATE"
+
+DEFAULT_TIERS = {
+    TRIAGE: {
+        'model': "claude-3-haiku-20240307",
+        'max_tokens': 300,
+        'input_cost_per_mtok': 0.25,
+        'output_cost_per_mtok': 1.25
+    },
+    ESCALATED: {
+        'model': "claude-3-5-sonnet-20241022",
+        'max_tokens': 800,
+        'input_cost_per_mtok': 3.0,
+        'output_cost_per_mtok': 15.0
+    }
+}
+
+DEFAULT_COMPLEXITY_PHRASES = [
+    "architecture", "design", "trade-off", "trade-offs", "compare", "pros/cons",
+    "evaluate", "in depth", "step by step", "why does", "root cause", "strategy"
+]
+
+
+class ModelRouter:
+    """Chooses a model tier per persona and message, and records every routing decision"""
+
+    def __init__(self, routing_config: dict = None, personas: dict = None):
+        routing_config = routing_config or {}
+        self.personas = personas or {}
+        self.tiers = {name: dict(params) for name, params in DEFAULT_TIERS.items()}
+        for name, params in (routing_config.get('tiers') or {}).items():
+            self.tiers.setdefault(name, {}).update(params or {})
+
+        escalate_when = routing_config.get('escalate_when') or {}
+        self.escalate_engagement = set(escalate_when.get('engagement', [MANDATORY]))
+        self.min_complex_words = escalate_when.get('min_message_words', 80)
+        self.complexity_matcher = PhraseMatcher(
+            (phrase, phrase) for phrase in escalate_when.get('complexity_phrases', DEFAULT_COMPLEXITY_PHRASES)
+        )
+
+        # USD per million tokens by model name: tier models, explicit `prices`, then persona overrides naming a model
+        self.prices: Dict[str, Dict[str, float]] = {}
+        for params in self.tiers.values():
+            self._add_price(params)
+        for model, price in (routing_config.get('prices') or {}).items():
+            self._add_price(dict(price, model=model))
+        for persona_config in self.personas.values():
+            for params in ((persona_config or {}).get('model_tiers') or {}).values():
+                self._add_price(params or {})
+
+        self.history = deque(maxlen=routing_config.get('history_size', 200))
+
+    def _add_price(self, params: Dict[str, Any]):
+        if params.get('model') and 'input_cost_per_mtok' in params:
+            self.prices[params['model']] = {
+                'input_cost_per_mtok': params['input_cost_per_mtok'],
+                'output_cost_per_mtok': params.get('output_cost_per_mtok', 0)
+            }
+
+    @classmethod
+    def from_config(cls, config: dict) -> "ModelRouter":
+        """Build a router from the coordination rules config"""
+        return cls(config.get('model_routing', {}), config.get('personas', {}))
+
+    def tier_params(self, persona: Optional[str], tier: str) -> Dict[str, Any]:
+        """Model parameters for a tier, with per-persona overrides from `model_tiers`"""
+        params = dict(self.tiers.get(tier) or self.tiers[TRIAGE])
+        persona_tiers = (self.personas.get(persona) or {}).get('model_tiers') or {}
+        params.update(persona_tiers.get(tier) or {})
+        return params
+
+    def choose_tier(self, message: str, engagement: Optional[str] = None) -> Tuple[str, str]:
+        """Pick the starting tier for a message and explain why"""
+        if engagement in self.escalate_engagement:
+            return ESCALATED, f"engagement={engagement}"
+
+        if len(message.split()) >= self.min_complex_words:
+            return ESCALATED, "long request"
+
+        complexity_hits = set(self.complexity_matcher.payloads(message))
+        if len(complexity_hits) >= 2:
+            return ESCALATED, f"complex request ({', '.join(sorted(complexity_hits))})"
+
+        return TRIAGE, "default triage"
+
+    def record(self, persona: str, tier: str, model: str, reason: str, latency_ms: float,
+               input_tokens: int = 0, output_tokens: int = 0, outcome: str = "draft") -> Dict[str, Any]:
+        """Record a routing decision with its latency and token cost (None for a model without a known price)"""
+        price = self.prices.get(model)
+        cost = None
+        if price is not None:
+            cost = round((
+                input_tokens * price['input_cost_per_mtok'] +
+                output_tokens * price['output_cost_per_mtok']
+            ) / 1_000_000, 6)
+
+        entry = {
+            'timestamp': time.time(),
+            'persona': persona,
+            'tier': tier,
+            'model': model,
+            'reason': reason,
+            'latency_ms': round(latency_ms, 1),
+            'input_tokens': input_tokens,
+            'output_tokens': output_tokens,
+            'cost_usd': cost,
+            'outcome': outcome
+        }
+        self.history.append(entry)
+        return entry
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Per-tier call counts, median latency and token spend over the recorded history; calls on models
+        without a known price are counted in `unpriced_calls` and left out of `cost_usd`"""
+        per_tier: Dict[str, List[Dict[str, Any]]] = {}
+        for entry in self.history:
+            per_tier.setdefault(entry['tier'], []).append(entry)
+
+        return {
+            tier: {
+                'calls': len(entries),
+                'median_latency_ms': round(statistics.median(e['latency_ms'] for e in entries), 1),
+                'input_tokens': sum(e['input_tokens'] for e in entries),
+                'output_tokens': sum(e['output_tokens'] for e in entries),
+                'cost_usd': round(sum(e['cost_usd'] for e in entries if e['cost_usd'] is not None), 6),
+                'unpriced_calls': sum(1 for e in entries if e['cost_usd'] is None)
+            }
+            for tier, entries in per_tier.items()
+        }
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Outbox
+Durable write-behind queue for contribute posts, delivered in order per channel with retry
+"""
+
+import time
+import uuid
+import random
+import sqlite3
+import asyncio
+import logging
+from typing import List, Dict, Optional, Any, Callable, Awaitable
+
+try:
+    from .tracing import detached_task
+except ImportError:
+    from tracing import detached_task
+
+logger = logging.getLogger(__name__)
+
+# Delivery states
+QUEUED = "queued"
+DELIVERED = "delivered"
+FAILED = "failed"
+
+FIELDS = ('delivery_id', 'channel_id', 'persona', 'author', 'message', 'status', 'attempts',
+          'last_error', 'post_id', 'created_at', 'updated_at')
+
+
+def pending_post_id(delivery_id: str) -> str:
+    """Mattermost pending_post_id for a delivery; identical on every attempt, so the server drops a resend
+    of a post that landed before the attempt was recorded"""
+    return f"outbox:{delivery_id}"
+
+
+class DeliveryError(Exception):
+    """A failed post; retriable errors are tried again, others fail the delivery"""
+
+    def __init__(self, message: str, retriable: bool = True):
+        super().__init__(message)
+        self.retriable = retriable
+
+
+class OutboxStore:
+    """SQLite persistence for queued posts; seq preserves enqueue order"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS outbox (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                delivery_id TEXT UNIQUE NOT NULL,
+                channel_id TEXT NOT NULL,
+                persona TEXT NOT NULL,
+                author TEXT NOT NULL,
+                message TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER DEFAULT 0,
+                last_error TEXT,
+                post_id TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS outbox_by_channel ON outbox(channel_id, status, seq);
+        ''')
+        self.conn.commit()
+
+    def enqueue(self, channel_id: str, persona: str, author: str, message: str) -> str:
+        delivery_id = f"dlv_{uuid.uuid4().hex[:16]}"
+        now = time.time()
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO outbox (delivery_id, channel_id, persona, author, message, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (delivery_id, channel_id, persona, author, message, QUEUED, now, now)
+            )
+        return delivery_id
+
+    def next_queued(self, channel_id: str) -> Optional[Dict[str, Any]]:
+        """Oldest undelivered post for a channel (head of line)"""
+        row = self.conn.execute(
+            f"SELECT {', '.join(FIELDS)} FROM outbox WHERE channel_id = ? AND status = ? ORDER BY seq LIMIT 1",
+            (channel_id, QUEUED)
+        ).fetchone()
+        return dict(zip(FIELDS, row)) if row else None
+
+    def queued_channels(self) -> List[str]:
+        rows = self.conn.execute("SELECT DISTINCT channel_id FROM outbox WHERE status = ?", (QUEUED,)).fetchall()
+        return [row[0] for row in rows]
+
+    def mark_delivered(self, delivery_id: str, post_id: Optional[str]):
+        with self.conn:
+            self.conn.execute(
+                "UPDATE outbox SET status = ?, post_id = ?, attempts = attempts + 1, last_error = NULL, updated_at = ? "
+                "WHERE delivery_id = ?",
+                (DELIVERED, post_id, time.time(), delivery_id)
+            )
+
+    def mark_attempt_failed(self, delivery_id: str, error: str, final: bool = False):
+        with self.conn:
+            self.conn.execute(
+                "UPDATE outbox SET status = ?, attempts = attempts + 1, last_error = ?, updated_at = ? "
+                "WHERE delivery_id = ?",
+                (FAILED if final else QUEUED, error[:500], time.time(), delivery_id)
+            )
+
+    def get(self, delivery_id: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute(
+            f"SELECT {', '.join(FIELDS)} FROM outbox WHERE delivery_id = ?", (delivery_id,)
+        ).fetchone()
+        return dict(zip(FIELDS, row)) if row else None
+
+    def counts(self) -> Dict[str, int]:
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+
+    def close(self):
+        self.conn.close()
+
+
+class Outbox:
+    """One delivery worker per channel; the head post is retried until it lands, keeping channel order"""
+
+    def __init__(self, store: OutboxStore, poster: Callable[[Dict[str, Any]], Awaitable[Optional[str]]],
+                 max_attempts: int = 8, base_delay: float = 1.0, max_delay: float = 60.0,
+                 on_delivered: Callable[[Dict[str, Any]], None] = None):
+        self.store = store
+        self.poster = poster
+        # Called with the entry once Mattermost has accepted it (never for posts that fail permanently)
+        self.on_delivered = on_delivered
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.workers: Dict[str, asyncio.Task] = {}
+
+    def enqueue(self, channel_id: str, persona: str, author: str, message: str) -> str:
+        """Persist a post and make sure its channel has a delivery worker"""
+        delivery_id = self.store.enqueue(channel_id, persona, author, message)
+        self.kick(channel_id)
+        return delivery_id
+
+    def kick(self, channel_id: str):
+        task = self.workers.get(channel_id)
+        if task is None or task.done():
+            self.workers[channel_id] = detached_task(self.deliver_channel(channel_id))
+
+    async def deliver_channel(self, channel_id: str):
+        """Drain a channel's queue in order"""
+        try:
+            while True:
+                entry = self.store.next_queued(channel_id)
+                if entry is None:
+                    return
+
+                try:
+                    post_id = await self.poster(entry)
+                except Exception as e:
+                    retriable = getattr(e, 'retriable', True)
+                    final = not retriable or entry['attempts'] + 1 >= self.max_attempts
+                    self.store.mark_attempt_failed(entry['delivery_id'], f"{type(e).__name__}: {e}", final=final)
+                    if final:
+                        logger.warning(f"Outbox delivery {entry['delivery_id']} failed permanently: {str(e)[:200]}")
+                        continue
+                    delay = min(self.base_delay * (2 ** entry['attempts']) + random.uniform(0, 1), self.max_delay)
+                    logger.warning(f"Outbox delivery {entry['delivery_id']} failed, retrying in {delay:.2f}s: {str(e)[:200]}")
+                    await asyncio.sleep(delay)
+                    continue
+
+                self.store.mark_delivered(entry['delivery_id'], post_id)
+                if self.on_delivered is not None:
+                    try:
+                        self.on_delivered(entry)
+                    except Exception as e:
+                        logger.warning(f"Outbox delivery callback for {entry['delivery_id']} failed: {str(e)[:200]}")
+        finally:
+            if self.workers.get(channel_id) is asyncio.current_task():
+                self.workers.pop(channel_id, None)
+
+    def resume(self) -> List[str]:
+        """Restart delivery for posts still queued before a restart"""
+        channels = self.store.queued_channels()
+        for channel_id in channels:
+            self.kick(channel_id)
+        if channels:
+            logger.info(f"Resumed outbox delivery for {len(channels)} channels")
+        return channels
+
+    async def wait(self):
+        """Wait for all delivery workers (used by tests and shutdown)"""
+        while self.workers:
+            await asyncio.gather(*list(self.workers.values()), return_exceptions=True)
+
+    def get(self, delivery_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.get(delivery_id)
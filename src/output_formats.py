@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Output Formats
+Render channel posts for read tools as text, compact (author aliases, delta timestamps) or JSON within a token cap
+"""
+
+import json
+from datetime import datetime
+from typing import List, Dict, Optional, Any
+
+try:
+    from .semantic_index import estimate_tokens
+except ImportError:
+    from semantic_index import estimate_tokens
+
+TEXT = "text"
+COMPACT = "compact"
+JSON = "json"
+FORMATS = [TEXT, COMPACT, JSON]
+
+
+def author_aliases(authors: List[str]) -> Dict[str, str]:
+    """Short stable aliases in order of first appearance: alice -> A, alex -> A2"""
+    aliases = {}
+    taken = set()
+    for author in authors:
+        if author in aliases:
+            continue
+        initial = (author[:1] or "?").upper()
+        alias, n = initial, 1
+        while alias in taken:
+            n += 1
+            alias = f"{initial}{n}"
+        aliases[author] = alias
+        taken.add(alias)
+    return aliases
+
+
+def format_delta(ms: int) -> str:
+    seconds = max(0, ms) // 1000
+    if seconds < 60:
+        return f"+{seconds}s"
+    if seconds < 3600:
+        return f"+{seconds // 60}m"
+    if seconds < 86400:
+        return f"+{seconds // 3600}h"
+    return f"+{seconds // 86400}d"
+
+
+def clip(text: str, max_chars: int) -> str:
+    return text if len(text) <= max_chars else text[:max(0, max_chars - 1)] + "…"
+
+
+def _render(entries: List[Dict[str, Any]], fmt: str, time_format: str, omitted: int, trailer: Optional[str],
+            report_tokens: bool) -> str:
+    if fmt == JSON:
+        payload = {
+            'posts': [
+                dict({'id': entry.get('id'), 'author': entry['author'], 'ts': entry['create_at'],
+                      'text': entry['message']}, **({'replies': entry['replies']} if entry.get('replies') else {}))
+                for entry in entries
+            ],
+            'omitted': omitted
+        }
+        if trailer:
+            payload['next'] = trailer
+        rendered = json.dumps(payload, separators=(',', ':'), ensure_ascii=False)
+        if report_tokens:
+            # Second pass so the count includes the tokens field itself
+            for _ in range(2):
+                payload['tokens'] = estimate_tokens(rendered)
+                rendered = json.dumps(payload, separators=(',', ':'), ensure_ascii=False)
+        return rendered
+
+    lines = []
+    if fmt == COMPACT:
+        aliases = author_aliases([entry['author'] for entry in entries])
+        if entries:
+            start = datetime.fromtimestamp(entries[0]['create_at'] / 1000).strftime('%Y-%m-%d %H:%M')
+            lines.append(f"authors {' '.join(f'{alias}={author}' for author, alias in aliases.items())} | start {start}")
+        if omitted:
+            lines.append(f"({omitted} earlier omitted)")
+        previous = entries[0]['create_at'] if entries else 0
+        for entry in entries:
+            line = f"{format_delta(entry['create_at'] - previous)} {aliases[entry['author']]}: {' '.join(entry['message'].split())}"
+            if entry.get('replies'):
+                line += f" [{entry['replies']} replies:{entry['id']}]"
+            lines.append(line)
+            previous = entry['create_at']
+    else:
+        if omitted:
+            lines.append(f"({omitted} earlier messages omitted)")
+        for entry in entries:
+            timestamp = datetime.fromtimestamp(entry['create_at'] / 1000)
+            line = f"[{timestamp.strftime(time_format)}] {entry['author']}: {entry['message']}"
+            if entry.get('replies'):
+                line += f" [{entry['replies']} replies, thread {entry['id']}]"
+            lines.append(line)
+
+    if trailer:
+        lines.append(trailer)
+    rendered = "\n".join(lines)
+    if report_tokens:
+        rendered += f"\n[~{estimate_tokens(rendered)} tokens]"
+    return rendered
+
+
+def render_posts(entries: List[Dict[str, Any]], fmt: str = TEXT, max_tokens: Optional[int] = None,
+                 time_format: str = '%H:%M', trailer: Optional[str] = None, report_tokens: bool = None) -> str:
+    """Render chronological entries (id, author, create_at, message, optional replies), newest kept under max_tokens
+
+    Over the cap, the oldest posts are dropped first; a single newest post that still does not fit is clipped.
+    The estimated token count is appended for compact/json output and whenever a cap is given, unless overridden.
+    """
+    if report_tokens is None:
+        report_tokens = fmt != TEXT or max_tokens is not None
+    if max_tokens is None:
+        return _render(entries, fmt, time_format, 0, trailer, report_tokens)
+
+    # Cheap lower bound first so long windows are not re-rendered once per dropped post
+    kept = list(entries)
+    message_tokens = sum(estimate_tokens(entry['message']) for entry in kept)
+    while len(kept) > 1 and message_tokens > max_tokens:
+        message_tokens -= estimate_tokens(kept.pop(0)['message'])
+
+    while True:
+        omitted = len(entries) - len(kept)
+        rendered = _render(kept, fmt, time_format, omitted, trailer, report_tokens)
+        overflow = estimate_tokens(rendered) - max_tokens
+        if overflow <= 0 or not kept:
+            return rendered
+        if len(kept) > 1:
+            kept.pop(0)
+            continue
+        # Only the newest post is left: clip its message to what the cap allows
+        message = kept[0]['message']
+        if len(message) <= 1:
+            return rendered
+        kept = [dict(kept[0], message=clip(message, len(message) - overflow * 4 - 1))]
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Profiling
+Sampled per-tool-call stack profiles and an event-loop lag watchdog, written as folded stacks
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Dict, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+
+def folded_stack(frame) -> str:
+    """Root-first 'func (file:line);...' string, the input format of flamegraph.pl and speedscope"""
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(frames))
+
+
+def write_folded(path: str, stacks: Counter):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, 'w') as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+
+
+# Folded frame for loop-thread samples taken while the profiled task was not running
+OUTSIDE_TASK = "[outside tool: other tasks or idle loop]"
+
+
+def runs_under(frame, anchor) -> bool:
+    while frame is not None:
+        if frame is anchor:
+            return True
+        frame = frame.f_back
+    return False
+
+
+class StackSampler:
+    """Background thread that samples one thread's stack at a fixed interval.
+
+    With an `anchor` frame, only samples whose stack passes through it are kept as-is; the rest (other
+    tasks, the idle loop) are counted under OUTSIDE_TASK so they are visible but not mixed into the tool's stacks.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005, anchor=None):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.anchor = anchor
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            if self.anchor is not None and not runs_under(frame, self.anchor):
+                self.stacks[OUTSIDE_TASK] += 1
+            else:
+                self.stacks[folded_stack(frame)] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.stacks
+
+
+class ToolProfiler:
+    """Samples stacks for a fraction of tool calls and writes one folded file per call"""
+
+    def __init__(self, output_dir: str, sample_rate: float = 1.0, interval: float = 0.005):
+        self.output_dir = output_dir
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.active: Optional[StackSampler] = None
+        self.profiled = 0
+        self.skipped = 0
+
+    @contextmanager
+    def profile(self, tool_name: str):
+        """Profile one tool call (skipped when unsampled or another call is already being sampled).
+
+        Inside a task, samples are attributed to the task's coroutine; time the loop spends on other tasks
+        or waiting is folded into OUTSIDE_TASK.
+        """
+        if self.active is not None or random.random() >= self.sample_rate:
+            self.skipped += 1
+            yield None
+            return
+
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        anchor = task.get_coro().cr_frame if task is not None else None
+        sampler = StackSampler(threading.get_ident(), self.interval, anchor)
+        self.active = sampler
+        sampler.start()
+        start = time.perf_counter()
+        try:
+            yield sampler
+        finally:
+            stacks = sampler.stop()
+            self.active = None
+            self.profiled += 1
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+            path = os.path.join(self.output_dir, f"tool-{tool_name}-{stamp}.folded")
+            write_folded(path, stacks)
+            logger.info("Profiled %s in %.1fms (%d samples, %d outside the tool) -> %s", tool_name, elapsed_ms,
+                        sum(stacks.values()), stacks[OUTSIDE_TASK], path, extra={'event': 'profile'})
+
+
+class LoopLagMonitor:
+    """Heartbeat task on the loop plus a watchdog thread that captures the stack of anything blocking it"""
+
+    def __init__(self, output_dir: str, threshold_ms: float = 100.0, interval: float = 0.05):
+        self.output_dir = output_dir
+        self.threshold = threshold_ms / 1000
+        self.interval = interval
+        self.last_beat = time.monotonic()
+        self.max_lag_ms = 0.0
+        self.stalls: List[Dict[str, Any]] = []
+        self.stall_stacks: Counter = Counter()
+        self._loop_thread_id: Optional[int] = None
+        self._reported_beat: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    async def _heartbeat(self):
+        while True:
+            before = time.monotonic()
+            self.last_beat = before
+            await asyncio.sleep(self.interval)
+            lag_ms = (time.monotonic() - before - self.interval) * 1000
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+
+    def _watch(self):
+        while not self._stop.wait(self.interval / 2):
+            beat = self.last_beat
+            stalled_for = time.monotonic() - beat - self.interval
+            if stalled_for < self.threshold or self._reported_beat == beat:
+                continue
+
+            # The loop thread is still inside the blocking callback, so its current stack names the culprit
+            self._reported_beat = beat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = folded_stack(frame) if frame is not None else ""
+            self.record_stall(stalled_for * 1000, stack)
+
+    def record_stall(self, lag_ms: float, stack: str):
+        stall = {'at': datetime.now().isoformat(), 'lag_ms': round(lag_ms, 1), 'stack': stack.split(";")}
+        self.stalls.append(stall)
+        self.stall_stacks[stack] += 1
+        logger.warning("Event loop blocked for %.0fms in %s", lag_ms, stall['stack'][-1] if stack else "?",
+                       extra={'event': 'loop_stall'})
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        with open(os.path.join(self.output_dir, "loop_stalls.jsonl"), 'a') as f:
+            f.write(json.dumps(stall) + "\n")
+        write_folded(os.path.join(self.output_dir, "loop_stalls.folded"), self.stall_stacks)
+
+    def start(self):
+        """Start monitoring the running loop (call from inside it)"""
+        self._loop_thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+        if self._watchdog is not None:
+            self._watchdog.join()
+
+
+def install_uvloop() -> bool:
+    """Switch asyncio to the uvloop event loop when it is installed"""
+    try:
+        import uvloop
+    except ImportError:
+        logger.warning("uvloop not installed - using the default asyncio event loop")
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
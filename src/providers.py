@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Model Providers
+Per-persona completion backends (Anthropic, OpenAI-compatible endpoints) with adaptive hedged requests
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from types import SimpleNamespace
+from typing import List, Dict, Optional, Any, Callable, Awaitable, Tuple
+
+import requests
+
+try:
+    from .semantic_index import estimate_tokens
+except ImportError:
+    from semantic_index import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+ANTHROPIC = "anthropic"
+OPENAI_COMPATIBLE = "openai_compatible"
+
+
+class ProviderError(Exception):
+    """A provider request that failed before producing a completion"""
+
+
+class Completion:
+    """Provider-neutral completion shaped like an Anthropic Messages response (content[0].text, usage)"""
+
+    def __init__(self, text: str, input_tokens: int = 0, output_tokens: int = 0, model: str = None):
+        self.content = [SimpleNamespace(text=text)]
+        self.usage = SimpleNamespace(input_tokens=input_tokens, output_tokens=output_tokens)
+        self.model = model
+
+
+class LatencyTracker:
+    """Rolling first-token latencies of one provider"""
+
+    def __init__(self, window: int = 200):
+        self.samples = deque(maxlen=window)
+
+    def record(self, latency_ms: float):
+        self.samples.append(latency_ms)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+class AnthropicProvider:
+    """Anthropic Messages API through the server's create_message (retries, tracing, cassettes)"""
+
+    kind = ANTHROPIC
+
+    def __init__(self, name: str, create: Callable[..., Awaitable[Any]], available: Callable[[], bool] = None):
+        self.name = name
+        self.create = create
+        # False while the server has no Anthropic client (no API key) and is not replaying a cassette
+        self.is_available = available or (lambda: True)
+
+    def available(self) -> bool:
+        return self.is_available()
+
+    async def complete(self, params: Dict[str, Any], on_first_token: Callable[[], None],
+                       abandoned: threading.Event = None) -> Any:
+        # Non-streaming: the first token arrives with the whole (short) reply, and an abandoned call still completes
+        response = await self.create(**params)
+        on_first_token()
+        return response
+
+
+class OpenAICompatibleProvider:
+    """Any /v1/chat/completions endpoint (vLLM, Ollama, llama.cpp server...), streamed for first-token timing"""
+
+    kind = OPENAI_COMPATIBLE
+
+    def __init__(self, name: str, base_url: str, model: str = None, api_key: str = None, timeout: float = 60,
+                 transport: Callable[[str, Dict[str, Any], Callable[[], Awaitable[Any]]], Awaitable[Any]] = None):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.api_key = api_key
+        self.timeout = timeout
+        # The server's upstream seam (cassette record/replay, span, in-flight count, retries); direct when None
+        self.transport = transport
+
+    def available(self) -> bool:
+        # A configured endpoint is tried; connection errors surface per request
+        return True
+
+    def request_body(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        messages = list(params.get('messages') or [])
+        if params.get('system'):
+            messages.insert(0, {'role': "system", 'content': params['system']})
+        return {
+            'model': self.model or params.get('model'),
+            'max_tokens': params.get('max_tokens'),
+            'messages': messages,
+            'stream': True,
+            'stream_options': {'include_usage': True}
+        }
+
+    def stream(self, params: Dict[str, Any], on_first_token: Callable[[], None],
+               abandoned: threading.Event = None) -> Completion:
+        """Blocking SSE read; runs in a worker thread and stops early (closing the connection) once abandoned"""
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        body = self.request_body(params)
+        parts: List[str] = []
+        usage = {}
+        with requests.post(f"{self.base_url}/chat/completions", json=body, headers=headers,
+                           stream=True, timeout=self.timeout) as response:
+            if response.status_code != 200:
+                raise ProviderError(f"{self.name}: {response.status_code} - {response.text[:200]}")
+            for line in response.iter_lines():
+                if abandoned is not None and abandoned.is_set():
+                    break
+                if not line or not line.startswith(b"data:"):
+                    continue
+                data = line[5:].strip()
+                if data == b"[DONE]":
+                    break
+                chunk = json.loads(data)
+                usage = chunk.get('usage') or usage
+                for choice in chunk.get('choices') or []:
+                    delta = (choice.get('delta') or {}).get('content')
+                    if delta:
+                        if not parts:
+                            on_first_token()
+                        parts.append(delta)
+
+        text = "".join(parts)
+        prompt = " ".join(str(message.get('content', '')) for message in body['messages'])
+        return Completion(
+            text,
+            input_tokens=usage.get('prompt_tokens') or estimate_tokens(prompt),
+            output_tokens=usage.get('completion_tokens') or estimate_tokens(text),
+            model=body['model']
+        )
+
+    async def complete(self, params: Dict[str, Any], on_first_token: Callable[[], None],
+                       abandoned: threading.Event = None) -> Completion:
+        loop = asyncio.get_running_loop()
+
+        async def request() -> Completion:
+            return await asyncio.to_thread(self.stream, params, lambda: loop.call_soon_threadsafe(on_first_token),
+                                           abandoned)
+
+        if self.transport is None:
+            return await request()
+        return await self.transport(self.name, params, request)
+
+
+class ProviderPool:
+    """Provider per persona, with an optional backup fired when the primary is slower than its usual p95"""
+
+    def __init__(self, providers: Dict[str, Any], default: str = ANTHROPIC, personas: Dict[str, Any] = None,
+                 hedging: Dict[str, Any] = None,
+                 on_discarded: Callable[[Optional[str], str, Any], None] = None):
+        self.providers = providers
+        # Called with (persona, provider name, response) for hedge losers, so their tokens are still charged
+        self.on_discarded = on_discarded
+        self.default = default
+        self.personas = personas or {}
+        hedging = hedging or {}
+        self.hedging_enabled = hedging.get('enabled', False)
+        self.default_backup = hedging.get('backup')
+        self.percentile = hedging.get('percentile', 95)
+        self.default_threshold_ms = hedging.get('default_threshold_ms', 2500)
+        self.min_samples = hedging.get('min_samples', 20)
+        self.latency = {name: LatencyTracker(hedging.get('window', 200)) for name in providers}
+        self.stats = {name: {'requests': 0, 'wins': 0, 'hedged': 0, 'errors': 0, 'discarded': 0} for name in providers}
+
+    @classmethod
+    def from_config(cls, config: dict, anthropic_create: Callable[..., Awaitable[Any]], transport=None,
+                    on_discarded: Callable[[Optional[str], str, Any], None] = None,
+                    anthropic_available: Callable[[], bool] = None) -> "ProviderPool":
+        settings = config.get('model_providers', {}) or {}
+        providers = {ANTHROPIC: AnthropicProvider(ANTHROPIC, anthropic_create, anthropic_available)}
+        for name, backend in (settings.get('backends') or {}).items():
+            kind = backend.get('type', ANTHROPIC)
+            if kind == ANTHROPIC:
+                providers[name] = AnthropicProvider(name, anthropic_create, anthropic_available)
+            elif kind == OPENAI_COMPATIBLE:
+                providers[name] = OpenAICompatibleProvider(
+                    name,
+                    os.getenv(backend.get('base_url_env', ''), backend.get('base_url', "http://localhost:11434/v1")),
+                    model=backend.get('model'),
+                    api_key=os.getenv(backend.get('api_key_env', '')) if backend.get('api_key_env') else None,
+                    timeout=backend.get('timeout', 60),
+                    transport=transport
+                )
+            else:
+                logger.warning(f"Unknown model provider type {kind} for {name}; skipped")
+        return cls(providers, settings.get('default', ANTHROPIC), config.get('personas', {}), settings.get('hedging'),
+                   on_discarded)
+
+    def for_persona(self, persona: Optional[str]) -> Tuple[Any, Optional[Any]]:
+        """Primary and backup provider for a persona (backup is None when hedging is off)"""
+        persona_config = self.personas.get(persona) or {}
+        primary = self.providers.get(persona_config.get('provider') or self.default) or self.providers[ANTHROPIC]
+        backup = None
+        if self.hedging_enabled:
+            backup = self.providers.get(persona_config.get('backup_provider') or self.default_backup or primary.name)
+        return primary, backup
+
+    def usable(self, persona: Optional[str]) -> bool:
+        """Whether the persona's primary provider can take requests (Anthropic cannot without an API key)"""
+        primary, _ = self.for_persona(persona)
+        return primary.available()
+
+    def hedge_threshold_ms(self, provider_name: str) -> float:
+        """Adaptive hedge delay: the provider's recent p95 first-token latency once enough samples exist"""
+        tracker = self.latency[provider_name]
+        if len(tracker.samples) < self.min_samples:
+            return self.default_threshold_ms
+        return tracker.percentile(self.percentile)
+
+    def _start(self, provider, params: Dict[str, Any]) -> Tuple[asyncio.Task, asyncio.Event, threading.Event]:
+        first_token = asyncio.Event()
+        abandoned = threading.Event()
+        start = time.perf_counter()
+
+        def mark_first_token():
+            if not first_token.is_set():
+                first_token.set()
+                self.latency[provider.name].record((time.perf_counter() - start) * 1000)
+
+        self.stats[provider.name]['requests'] += 1
+        return asyncio.create_task(provider.complete(params, mark_first_token, abandoned)), first_token, abandoned
+
+    async def complete(self, persona: Optional[str], params: Dict[str, Any],
+                       charge_discarded: bool = True) -> Tuple[str, Any]:
+        """Run a completion for a persona; returns (provider name, response)
+
+        charge_discarded=False skips on_discarded for hedge losers (callers paying from their own budget).
+        """
+        primary, backup = self.for_persona(persona)
+        primary_task, first_token, primary_abandoned = self._start(primary, params)
+        if backup is None:
+            return primary.name, await self._result(primary, primary_task)
+
+        token_wait = asyncio.create_task(first_token.wait())
+        try:
+            await asyncio.wait({primary_task, token_wait}, timeout=self.hedge_threshold_ms(primary.name) / 1000,
+                               return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            token_wait.cancel()
+        if first_token.is_set() or primary_task.done():
+            return primary.name, await self._result(primary, primary_task)
+
+        # Primary is slower than usual: race a backup request and keep whichever finishes first
+        self.stats[primary.name]['hedged'] += 1
+        logger.info("Hedging %s request with %s after %.0fms", primary.name, backup.name,
+                    self.hedge_threshold_ms(primary.name), extra={'event': 'hedge'})
+        backup_task, _, backup_abandoned = self._start(backup, params)
+        racers = {primary_task: (primary, primary_abandoned), backup_task: (backup, backup_abandoned)}
+        pending = set(racers)
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    for loser in pending:
+                        self._abandon(persona, *racers[loser], loser, charge_discarded)
+                    return racers[task][0].name, await self._result(racers[task][0], task)
+                self.stats[racers[task][0].name]['errors'] += 1
+                error = task.exception()
+        raise error
+
+    def _abandon(self, persona: Optional[str], provider, abandoned: threading.Event, task: asyncio.Task,
+                 charge_discarded: bool = True):
+        """Stop a hedge loser early where the provider can (streams close) and charge whatever it consumed"""
+        abandoned.set()
+
+        def charge(finished: asyncio.Task):
+            if finished.cancelled() or finished.exception() is not None:
+                return
+            self.stats[provider.name]['discarded'] += 1
+            if self.on_discarded is not None and charge_discarded:
+                self.on_discarded(persona, provider.name, finished.result())
+
+        task.add_done_callback(charge)
+
+    async def _result(self, provider, task: asyncio.Task) -> Any:
+        try:
+            response = await task
+        except Exception:
+            self.stats[provider.name]['errors'] += 1
+            raise
+        self.stats[provider.name]['wins'] += 1
+        return response
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Redundancy Detection
+SimHash near-duplicate scoring to catch repeated drafts and circular AI-to-AI exchanges
+"""
+
+import re
+import hashlib
+from collections import deque
+from typing import List, Dict, Tuple
+
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+NOVEL = "novel"
+REDUNDANT = "redundant"
+CIRCULAR = "circular"
+
+
+def shingles(text: str, size: int = 3) -> List[str]:
+    """Overlapping word n-grams (whole text as one shingle when shorter than n)"""
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) <= size:
+        return [" ".join(words)] if words else []
+    return [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+
+def simhash(text: str, bits: int = 64) -> int:
+    """Charikar SimHash fingerprint over word shingles"""
+    weights = [0] * bits
+    for shingle in shingles(text):
+        value = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=bits // 8).digest(), 'big')
+        for bit in range(bits):
+            weights[bit] += 1 if value >> bit & 1 else -1
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def similarity(a: int, b: int, bits: int = 64) -> float:
+    """1.0 for identical fingerprints, ~0.5 for unrelated text"""
+    return 1.0 - bin(a ^ b).count('1') / bits
+
+
+class RedundancyDetector:
+    """Scores new messages against a fixed recent window per conversation"""
+
+    def __init__(self, window: int = 8, duplicate_threshold: float = 0.9,
+                 circular_threshold: float = 0.8, circular_limit: int = 2):
+        self.window = window
+        self.duplicate_threshold = duplicate_threshold
+        self.circular_threshold = circular_threshold
+        self.circular_limit = circular_limit
+        self.recent: Dict[str, deque] = {}
+        self.streaks: Dict[str, int] = {}
+
+    @classmethod
+    def from_config(cls, collaboration_rules: dict) -> "RedundancyDetector":
+        """Build a detector from autonomous_collaboration.redundancy"""
+        settings = collaboration_rules.get('redundancy', {}) or {}
+        return cls(
+            window=settings.get('window', 8),
+            duplicate_threshold=settings.get('duplicate_threshold', 0.9),
+            circular_threshold=settings.get('circular_threshold', 0.8),
+            circular_limit=settings.get('circular_limit', 2)
+        )
+
+    def score(self, conversation_id: str, text: str) -> Tuple[float, int]:
+        """Highest similarity to the recent window, plus the fingerprint used"""
+        fingerprint = simhash(text)
+        recent = self.recent.get(conversation_id, ())
+        best = max((similarity(fingerprint, other) for other in recent), default=0.0)
+        return best, fingerprint
+
+    def check(self, conversation_id: str, text: str) -> Tuple[str, float]:
+        """Classify a draft as novel, redundant (drop it) or circular (pause the exchange)"""
+        score, _ = self.score(conversation_id, text)
+        if score >= self.duplicate_threshold:
+            return REDUNDANT, score
+        if score >= self.circular_threshold and self.streaks.get(conversation_id, 0) + 1 >= self.circular_limit:
+            return CIRCULAR, score
+        return NOVEL, score
+
+    def add(self, conversation_id: str, text: str, from_ai: bool = True) -> float:
+        """Record a posted message; AI messages close to the window extend the circular streak"""
+        score, fingerprint = self.score(conversation_id, text)
+
+        if not from_ai:
+            self.streaks[conversation_id] = 0
+        elif score >= self.circular_threshold:
+            self.streaks[conversation_id] = self.streaks.get(conversation_id, 0) + 1
+        else:
+            self.streaks[conversation_id] = 0
+
+        self.recent.setdefault(conversation_id, deque(maxlen=self.window)).append(fingerprint)
+        return score
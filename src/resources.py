@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Channel Resources
+Channel transcripts exposed as MCP resources, with coalesced per-subscriber update notifications
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Dict, Optional, Any, Callable, Awaitable, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+try:
+    from .tracing import detached_task
+except ImportError:
+    from tracing import detached_task
+
+try:
+    from anyio import BrokenResourceError, ClosedResourceError
+    # Raised by a session's write stream once its client has disconnected
+    CLOSED_STREAM_ERRORS: Tuple[type, ...] = (BrokenResourceError, ClosedResourceError, BrokenPipeError)
+except ImportError:
+    CLOSED_STREAM_ERRORS = (BrokenPipeError,)
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_URI_PREFIX = "mattermost://channel/"
+
+
+def channel_uri(channel_id: str, since: Optional[int] = None) -> str:
+    uri = f"{CHANNEL_URI_PREFIX}{channel_id}"
+    return f"{uri}?since={since}" if since is not None else uri
+
+
+def parse_channel_uri(uri: str) -> Tuple[str, Optional[int]]:
+    """Channel ID and optional 'since' cursor (ms) from a channel resource URI"""
+    parts = urlsplit(str(uri))
+    if parts.scheme != "mattermost" or parts.netloc != "channel" or not parts.path.strip("/"):
+        raise ValueError(f"Unknown resource {uri}")
+    since = parse_qs(parts.query).get('since')
+    try:
+        return parts.path.strip("/"), int(since[0]) if since else None
+    except ValueError:
+        raise ValueError(f"Invalid since cursor in {uri}") from None
+
+
+def changed_at(post: Dict[str, Any]) -> int:
+    return post.get('update_at') or post['create_at']
+
+
+class ChannelTranscript:
+    """Most recent synced posts of one channel, keyed by post ID so edits replace the original"""
+
+    def __init__(self, max_posts: int = 200):
+        self.max_posts = max_posts
+        self.posts: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.cursor = 0
+
+    def add(self, posts: List[Dict[str, Any]]) -> int:
+        """Apply synced posts (deletes remove); returns how many changed the transcript"""
+        changed = 0
+        for post in posts:
+            self.cursor = max(self.cursor, changed_at(post))
+            if post.get('delete_at'):
+                changed += self.posts.pop(post['id'], None) is not None
+                continue
+            self.posts.pop(post['id'], None)
+            self.posts[post['id']] = {
+                'id': post['id'], 'username': post.get('username') or post.get('user_id'),
+                'create_at': post['create_at'], 'changed_at': changed_at(post), 'message': post.get('message', '')
+            }
+            changed += 1
+
+        # Backfilled pages arrive after newer posts, so evict by creation time rather than arrival
+        while len(self.posts) > self.max_posts:
+            del self.posts[min(self.posts, key=lambda post_id: self.posts[post_id]['create_at'])]
+        return changed
+
+    def render(self, since: Optional[int] = None) -> List[str]:
+        """Transcript lines in chronological order, only posts changed after `since` when given"""
+        posts = sorted(self.posts.values(), key=lambda post: post['create_at'])
+        if since is not None:
+            posts = [post for post in posts if post['changed_at'] > since]
+        return [
+            f"[{datetime.fromtimestamp(post['create_at'] / 1000).strftime('%Y-%m-%d %H:%M')}] "
+            f"{post['username']}: {post['message']}"
+            for post in posts
+        ]
+
+
+class SubscriberQueue:
+    """Pending update URIs for one client; repeated updates to a URI coalesce into one notification"""
+
+    def __init__(self, send: Callable[[str], Awaitable[None]], max_pending: int = 64,
+                 on_closed: Optional[Callable[[], None]] = None):
+        self.send = send
+        self.max_pending = max_pending
+        self.on_closed = on_closed
+        self.pending: "OrderedDict[str, None]" = OrderedDict()
+        self.task: Optional[asyncio.Task] = None
+        self.stats = {'queued': 0, 'coalesced': 0, 'dropped': 0, 'sent': 0}
+
+    def push(self, uri: str):
+        if uri in self.pending:
+            self.stats['coalesced'] += 1
+            return
+        if len(self.pending) >= self.max_pending:
+            # Bounded: a client this far behind loses the oldest pending URI, not server memory
+            self.pending.popitem(last=False)
+            self.stats['dropped'] += 1
+        self.pending[uri] = None
+        self.stats['queued'] += 1
+        if self.task is None or self.task.done():
+            self.task = detached_task(self.drain())
+
+    async def drain(self):
+        """Send pending notifications one at a time; updates arriving meanwhile coalesce"""
+        while self.pending:
+            uri, _ = self.pending.popitem(last=False)
+            try:
+                await self.send(uri)
+            except CLOSED_STREAM_ERRORS:
+                logger.info("Resource subscriber disconnected, dropping its subscriptions")
+                self.pending.clear()
+                if self.on_closed:
+                    self.on_closed()
+                return
+            except Exception as e:
+                logger.warning(f"Resource update for {uri} not delivered: {str(e)[:200]}")
+                continue
+            self.stats['sent'] += 1
+
+    def close(self):
+        if self.task and not self.task.done() and self.task is not asyncio.current_task():
+            self.task.cancel()
+        self.pending.clear()
+
+
+class ResourceHub:
+    """Channel transcripts plus the clients subscribed to each channel resource"""
+
+    def __init__(self, max_posts: int = 200, max_pending: int = 64,
+                 on_channel_released: Optional[Callable[[str], None]] = None):
+        self.max_posts = max_posts
+        self.max_pending = max_pending
+        self.transcripts: Dict[str, ChannelTranscript] = {}
+        self.subscribers: Dict[Any, SubscriberQueue] = {}
+        self.subscriptions: Dict[str, set] = {}
+        # Called with a channel ID when its last subscriber leaves (the server stops that channel's watch)
+        self.on_channel_released = on_channel_released
+
+    @classmethod
+    def from_config(cls, config: dict, on_channel_released: Optional[Callable[[str], None]] = None) -> "ResourceHub":
+        settings = config.get('resources', {}) or {}
+        return cls(max_posts=settings.get('max_transcript_posts', 200),
+                   max_pending=settings.get('max_pending_updates', 64),
+                   on_channel_released=on_channel_released)
+
+    def transcript(self, channel_id: str) -> ChannelTranscript:
+        if channel_id not in self.transcripts:
+            self.transcripts[channel_id] = ChannelTranscript(self.max_posts)
+        return self.transcripts[channel_id]
+
+    def subscribe(self, client: Any, uri: str, send: Callable[[str], Awaitable[None]]):
+        channel_id, _ = parse_channel_uri(uri)
+        if client not in self.subscribers:
+            self.subscribers[client] = SubscriberQueue(send, self.max_pending,
+                                                       on_closed=lambda: self.remove_client(client))
+        self.subscriptions.setdefault(channel_id, set()).add(client)
+
+    def unsubscribe(self, client: Any, uri: str):
+        channel_id, _ = parse_channel_uri(uri)
+        self.leave(client, channel_id)
+        if not any(client in clients for clients in self.subscriptions.values()):
+            self.remove_client(client)
+
+    def leave(self, client: Any, channel_id: str):
+        """Drop one channel subscription, releasing the channel when it was the last one"""
+        clients = self.subscriptions.get(channel_id)
+        if not clients or client not in clients:
+            return
+        clients.discard(client)
+        if not clients:
+            del self.subscriptions[channel_id]
+            if self.on_channel_released:
+                self.on_channel_released(channel_id)
+
+    def remove_client(self, client: Any):
+        """Forget a client and all its subscriptions (disconnected or its session ended)"""
+        for channel_id in [channel_id for channel_id, clients in self.subscriptions.items() if client in clients]:
+            self.leave(client, channel_id)
+        queue = self.subscribers.pop(client, None)
+        if queue:
+            queue.close()
+
+    def close(self):
+        """Drop every client, e.g. when the server's session ends"""
+        for client in list(self.subscribers):
+            self.remove_client(client)
+
+    def subscribed_channels(self) -> List[str]:
+        return [channel_id for channel_id, clients in self.subscriptions.items() if clients]
+
+    def publish(self, channel_id: str, posts: List[Dict[str, Any]]) -> int:
+        """Fold synced posts into the transcript and queue an update for each subscriber"""
+        if not self.transcript(channel_id).add(posts):
+            return 0
+        clients = self.subscriptions.get(channel_id, set())
+        for client in clients:
+            self.subscribers[client].push(channel_uri(channel_id))
+        return len(clients)
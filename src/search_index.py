@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Search Index
+Incrementally maintained SQLite FTS5 index over channel history
+"""
+
+import re
+import sqlite3
+import threading
+from typing import List, Dict, Optional, Any
+
+
+class SearchIndex:
+    """Full-text index of channel posts with per-channel sync checkpoints"""
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS posts (
+                post_id TEXT PRIMARY KEY,
+                channel_id TEXT NOT NULL,
+                root_id TEXT,
+                username TEXT,
+                create_at INTEGER NOT NULL,
+                message TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS posts_by_channel ON posts(channel_id, create_at);
+
+            CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+                message, username,
+                content='posts', content_rowid='rowid',
+                tokenize='porter unicode61'
+            );
+
+            CREATE TRIGGER IF NOT EXISTS posts_ai AFTER INSERT ON posts BEGIN
+                INSERT INTO posts_fts(rowid, message, username) VALUES (new.rowid, new.message, new.username);
+            END;
+            CREATE TRIGGER IF NOT EXISTS posts_ad AFTER DELETE ON posts BEGIN
+                INSERT INTO posts_fts(posts_fts, rowid, message, username) VALUES ('delete', old.rowid, old.message, old.username);
+            END;
+            CREATE TRIGGER IF NOT EXISTS posts_au AFTER UPDATE ON posts BEGIN
+                INSERT INTO posts_fts(posts_fts, rowid, message, username) VALUES ('delete', old.rowid, old.message, old.username);
+                INSERT INTO posts_fts(rowid, message, username) VALUES (new.rowid, new.message, new.username);
+            END;
+
+            CREATE TABLE IF NOT EXISTS sync_state (
+                channel_id TEXT PRIMARY KEY,
+                last_update_at INTEGER NOT NULL
+            );
+
+            CREATE TABLE IF NOT EXISTS backfill_state (
+                channel_id TEXT PRIMARY KEY,
+                before_post_id TEXT,
+                pages INTEGER NOT NULL DEFAULT 0,
+                complete INTEGER NOT NULL DEFAULT 0
+            );
+        ''')
+        self.conn.commit()
+
+    def add_posts(self, channel_id: str, posts: List[Dict[str, Any]]) -> int:
+        """Upsert synced posts (dicts with id, user/username, create_at, message); deleted posts are removed"""
+        upserts = []
+        deletes = []
+        latest = 0
+        for post in posts:
+            latest = max(latest, post.get('update_at') or post.get('create_at') or 0)
+            if post.get('delete_at'):
+                deletes.append((post['id'],))
+            elif post.get('message'):
+                upserts.append((
+                    post['id'], channel_id, post.get('root_id') or None,
+                    post.get('username') or post.get('user_id'), post['create_at'], post['message']
+                ))
+
+        with self.lock, self.conn:
+            self.conn.executemany("DELETE FROM posts WHERE post_id = ?", deletes)
+            self.conn.executemany(
+                '''INSERT INTO posts (post_id, channel_id, root_id, username, create_at, message)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(post_id) DO UPDATE SET message = excluded.message, username = excluded.username''',
+                upserts
+            )
+            if latest:
+                self.conn.execute(
+                    '''INSERT INTO sync_state VALUES (?, ?)
+                       ON CONFLICT(channel_id) DO UPDATE SET last_update_at = MAX(last_update_at, excluded.last_update_at)''',
+                    (channel_id, latest)
+                )
+        return len(upserts)
+
+    def last_synced(self, channel_id: str) -> Optional[int]:
+        """Latest post update time (ms) indexed for a channel"""
+        row = self.conn.execute("SELECT last_update_at FROM sync_state WHERE channel_id = ?", (channel_id,)).fetchone()
+        return row[0] if row else None
+
+    def backfill_progress(self, channel_id: str) -> Optional[Dict[str, Any]]:
+        """Where the history backfill of a channel stands: the oldest post fetched so far (older pages start
+        before it), pages fetched and whether the start of the channel was reached"""
+        row = self.conn.execute(
+            "SELECT before_post_id, pages, complete FROM backfill_state WHERE channel_id = ?", (channel_id,)
+        ).fetchone()
+        if not row:
+            return None
+        return {'before_post_id': row[0], 'pages': row[1], 'complete': bool(row[2])}
+
+    def record_backfill(self, channel_id: str, before_post_id: Optional[str], pages: int, complete: bool):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO backfill_state VALUES (?, ?, ?, ?)",
+                (channel_id, before_post_id, pages, int(complete))
+            )
+
+    def recent_posts(self, channel_id: str, limit: int = 200) -> List[Dict[str, Any]]:
+        """Newest indexed posts of a channel, shaped like synced posts"""
+        rows = self.conn.execute(
+            "SELECT post_id, username, create_at, message FROM posts WHERE channel_id = ? ORDER BY create_at DESC LIMIT ?",
+            (channel_id, limit)
+        ).fetchall()
+        return [dict(zip(('id', 'username', 'create_at', 'message'), row)) for row in rows]
+
+    def first_post_after(self, channel_id: str, at_ms: int) -> Optional[str]:
+        """Id of the oldest indexed post created after a time, a `before` cursor for reading up to that time"""
+        row = self.conn.execute(
+            "SELECT post_id FROM posts WHERE channel_id = ? AND create_at > ? ORDER BY create_at LIMIT 1",
+            (channel_id, at_ms)
+        ).fetchone()
+        return row[0] if row else None
+
+    def author_counts(self, channel_id: str) -> Dict[str, int]:
+        """Indexed posts per author of a channel"""
+        rows = self.conn.execute(
+            "SELECT username, COUNT(*) FROM posts WHERE channel_id = ? GROUP BY username", (channel_id,)
+        ).fetchall()
+        return {username or "unknown": count for username, count in rows}
+
+    def count(self, channel_id: str) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM posts WHERE channel_id = ?", (channel_id,)).fetchone()[0]
+
+    @staticmethod
+    def build_query(query: str) -> str:
+        """Turn free text into an FTS5 query of quoted terms; a trailing '*' keeps prefix search"""
+        terms = []
+        for term in re.findall(r"[\w']+\*?", query):
+            prefix = term.endswith('*')
+            term = term.rstrip('*').replace('"', '""')
+            terms.append(f'"{term}"*' if prefix else f'"{term}"')
+        return " ".join(terms)
+
+    def search(self, channel_id: str, query: str, limit: int = 10, snippet_tokens: int = 12) -> List[Dict[str, Any]]:
+        """Ranked (bm25) matches with short highlighted snippets"""
+        fts_query = self.build_query(query)
+        if not fts_query:
+            return []
+
+        rows = self.conn.execute(
+            '''SELECT p.post_id, p.username, p.create_at, p.root_id,
+                      snippet(posts_fts, 0, '[', ']', '…', ?) AS snippet,
+                      bm25(posts_fts) AS rank
+               FROM posts_fts JOIN posts p ON p.rowid = posts_fts.rowid
+               WHERE posts_fts MATCH ? AND p.channel_id = ?
+               ORDER BY rank LIMIT ?''',
+            (snippet_tokens, fts_query, channel_id, limit)
+        ).fetchall()
+
+        return [
+            dict(zip(('post_id', 'username', 'create_at', 'root_id', 'snippet', 'rank'), row))
+            for row in rows
+        ]
+
+    def close(self):
+        self.conn.close()
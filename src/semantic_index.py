@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Semantic Index
+Local embedding index for recalling relevant older messages into persona context
+"""
+
+import re
+import time
+import zlib
+import asyncio
+import logging
+import threading
+from typing import List, Dict, Optional, Any, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # Semantic retrieval is disabled without NumPy
+    np = None
+
+try:
+    from .tracing import detached_task
+except ImportError:
+    from tracing import detached_task
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) used for context budgets"""
+    return max(1, len(text) // 4)
+
+
+class HashingEmbedder:
+    """CPU-only hashing vectorizer over word unigrams and bigrams"""
+
+    def __init__(self, dimensions: int = 512):
+        self.dimensions = dimensions
+
+    def embed_batch(self, texts: List[str]) -> "np.ndarray":
+        """Embed texts into L2-normalised rows"""
+        matrix = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = TOKEN_PATTERN.findall(text.lower())
+            features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+            for feature in features:
+                # crc32 is stable across processes, unlike hash()
+                digest = zlib.crc32(feature.encode('utf-8'))
+                sign = 1.0 if digest & 0x80000000 else -1.0
+                matrix[row, digest % self.dimensions] += sign
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+
+class SentenceTransformerEmbedder:
+    """Wraps a sentence-transformers model on CPU"""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dimensions = self.model.get_sentence_embedding_dimension()
+
+    def embed_batch(self, texts: List[str]) -> "np.ndarray":
+        return self.model.encode(texts, batch_size=32, normalize_embeddings=True,
+                                 convert_to_numpy=True).astype(np.float32)
+
+
+def make_embedder(model_name: Optional[str] = None, dimensions: int = 512):
+    """Use the configured embedding model when installed, else fall back to hashing"""
+    if model_name:
+        try:
+            return SentenceTransformerEmbedder(model_name)
+        except Exception as e:
+            logger.warning(f"Embedding model {model_name} unavailable, using hashing vectorizer: {e}")
+    return HashingEmbedder(dimensions)
+
+
+class EmbeddingIndex:
+    """Matrix of message embeddings with vectorised top-k cosine search, bounded to the newest max_items messages"""
+
+    def __init__(self, embedder, initial_capacity: int = 256, max_items: Optional[int] = 5000):
+        self.embedder = embedder
+        self.max_items = max_items
+        self.vectors = np.zeros((initial_capacity, embedder.dimensions), dtype=np.float32)
+        self.items: List[Dict[str, Any]] = []
+        self.evicted = 0
+        # add() runs in a worker thread while searches run on the event loop
+        self.lock = threading.Lock()
+        self.pending: List[Dict[str, Any]] = []
+        self.worker: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def add(self, items: List[Dict[str, Any]]):
+        """Embed and append items (dicts with 'content' and 'timestamp') in one batch; blocks while embedding"""
+        if not items:
+            return
+
+        embeddings = self.embedder.embed_batch([item['content'] for item in items])
+        with self.lock:
+            needed = len(self.items) + len(items)
+            if needed > len(self.vectors):
+                capacity = len(self.vectors)
+                while capacity < needed:
+                    capacity *= 2
+                grown = np.zeros((capacity, self.vectors.shape[1]), dtype=np.float32)
+                grown[:len(self.items)] = self.vectors[:len(self.items)]
+                self.vectors = grown
+
+            self.vectors[len(self.items):needed] = embeddings
+            self.items.extend(items)
+            if self.max_items and len(self.items) > self.max_items:
+                self.evict()
+
+    def evict(self):
+        """Drop the oldest items by timestamp (not arrival: backfilled history arrives late), down to 90% of
+        max_items so a full index is not compacted on every add"""
+        keep_count = max(1, int(self.max_items * 0.9))
+        by_age = sorted(range(len(self.items)), key=lambda i: self.items[i]['timestamp'])
+        keep = sorted(by_age[-keep_count:])
+        self.evicted += len(self.items) - len(keep)
+        self.vectors[:len(keep)] = self.vectors[keep]
+        self.items = [self.items[i] for i in keep]
+
+    def submit(self, items: List[Dict[str, Any]]):
+        """Queue items for embedding in a worker thread; embeds inline when no event loop is running"""
+        if not items:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self.add(items)
+            return
+        self.pending.extend(items)
+        if self.worker is None or self.worker.done():
+            self.worker = detached_task(self.drain())
+
+    async def drain(self):
+        while self.pending:
+            batch, self.pending = self.pending, []
+            try:
+                await asyncio.to_thread(self.add, batch)
+            except Exception as e:
+                logger.warning(f"Embedding {len(batch)} messages failed: {str(e)[:200]}")
+
+    async def wait(self):
+        """Wait until queued items are searchable (used by tests and shutdown)"""
+        while self.worker is not None and not self.worker.done():
+            await self.worker
+
+    def search(self, query: str, k: int = 4, min_score: float = 0.0,
+               exclude: Optional[set] = None) -> List[Tuple[float, Dict[str, Any]]]:
+        """Top-k items by cosine similarity, skipping items whose content is in `exclude`"""
+        if k <= 0:
+            return []
+        exclude = exclude or set()
+        query_vector = self.embedder.embed_batch([query])[0]
+
+        with self.lock:
+            count = len(self.items)
+            if count == 0:
+                return []
+            scores = self.vectors[:count] @ query_vector
+            # Enough candidates that k remain after dropping excluded items
+            candidates = min(count, k + len(exclude))
+            top = np.argpartition(-scores, candidates - 1)[:candidates]
+            top = top[np.argsort(-scores[top])]
+            matches = [(float(scores[i]), self.items[i]) for i in top
+                       if scores[i] > min_score and self.items[i]['content'] not in exclude]
+        return matches[:k]
+
+
+def select_within_budget(matches: List[Tuple[float, Dict[str, Any]]], token_budget: int) -> List[Dict[str, Any]]:
+    """Keep the best matches that fit the token budget, returned in chronological order"""
+    selected = []
+    used = 0
+    for _, item in matches:
+        cost = estimate_tokens(f"{item.get('author', '')}: {item['content']}")
+        if used + cost > token_budget:
+            continue
+        selected.append(item)
+        used += cost
+    return sorted(selected, key=lambda item: item['timestamp'])
+
+
+def timed_search(index: EmbeddingIndex, query: str, **kwargs) -> Tuple[List[Tuple[float, Dict[str, Any]]], float]:
+    """Run a search and return it with its latency in milliseconds"""
+    start = time.perf_counter()
+    matches = index.search(query, **kwargs)
+    return matches, (time.perf_counter() - start) * 1000
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Speculative Drafts
+Pre-generate likely persona replies to fresh human posts, keyed by the context they were built from
+"""
+
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import List, Dict, Optional, Any, Callable, Awaitable, Tuple
+
+try:
+    from .budget import LeakyBucket
+    from .tracing import detached_task
+except ImportError:
+    from budget import LeakyBucket
+    from tracing import detached_task
+
+logger = logging.getLogger(__name__)
+
+
+def draft_fingerprint(message: str, persona_config: dict, context: str, engagement: Optional[str],
+                      allow_pass: bool) -> str:
+    """Hash of everything generate_response sees; a draft is only reused for an identical input"""
+    encoded = json.dumps([message, persona_config, context, engagement, allow_pass],
+                         sort_keys=True, default=str).encode('utf-8')
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+class Speculator:
+    """Bounded set of background drafts, dropped as soon as their channel moves on"""
+
+    def __init__(self, generate: Callable[[str, Dict[str, Any]], Awaitable[Optional[Tuple[str, str, int]]]],
+                 max_drafts: int = 4, token_budget: int = 20000, window_seconds: float = 3600,
+                 max_post_age_seconds: float = 120, levels: List[str] = None):
+        self.generate = generate
+        self.max_drafts = max_drafts
+        self.max_post_age_ms = max_post_age_seconds * 1000
+        self.levels = set(levels or ["mandatory"])
+        self.bucket = LeakyBucket(token_budget, window_seconds)
+        self.drafts: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.in_flight: Dict[Tuple[str, str], asyncio.Task] = {}
+        self.latest: Dict[str, int] = {}
+        self.stats = {'scheduled': 0, 'hits': 0, 'misses': 0, 'discarded': 0, 'skipped': 0}
+
+    @classmethod
+    def from_config(cls, config: dict, generate) -> Optional["Speculator"]:
+        """Build from the speculation config section (None unless enabled)"""
+        settings = config.get('speculation', {}) or {}
+        if not settings.get('enabled', False):
+            return None
+        return cls(
+            generate,
+            max_drafts=settings.get('max_drafts', 4),
+            token_budget=settings.get('token_budget', 20000),
+            window_seconds=settings.get('window_seconds', 3600),
+            max_post_age_seconds=settings.get('max_post_age_seconds', 120),
+            levels=settings.get('levels', ["mandatory"])
+        )
+
+    def channel_moved(self, channel_id: str, newest_create_at: int):
+        """Drop drafts for posts that are no longer the newest in their channel"""
+        self.latest[channel_id] = max(self.latest.get(channel_id, 0), newest_create_at)
+        for fingerprint, draft in list(self.drafts.items()):
+            if draft['channel_id'] == channel_id and draft['create_at'] < self.latest[channel_id]:
+                del self.drafts[fingerprint]
+                self.stats['discarded'] += 1
+
+    def schedule(self, channel_id: str, post: Dict[str, Any], personas: List[str]) -> List[str]:
+        """Start background drafts for the personas likely to answer a human post"""
+        if time.time() * 1000 - post['create_at'] > self.max_post_age_ms:
+            return []
+
+        started = []
+        for persona in personas:
+            if (channel_id, persona) in self.in_flight:
+                continue
+            if len(self.drafts) + len(self.in_flight) >= self.max_drafts or self.bucket.utilization() >= 1.0:
+                self.stats['skipped'] += 1
+                continue
+            self.in_flight[(channel_id, persona)] = detached_task(self._draft(channel_id, post, persona))
+            self.stats['scheduled'] += 1
+            started.append(persona)
+        return started
+
+    async def _draft(self, channel_id: str, post: Dict[str, Any], persona: str):
+        try:
+            drafted = await self.generate(persona, post)
+            if drafted is None:
+                return
+            fingerprint, text, tokens = drafted
+            self.bucket.add(tokens)
+
+            if post['create_at'] < self.latest.get(channel_id, 0):
+                self.stats['discarded'] += 1
+                return
+            self.drafts[fingerprint] = {
+                'channel_id': channel_id, 'persona': persona, 'post_id': post.get('id'),
+                'create_at': post['create_at'], 'text': text, 'tokens': tokens
+            }
+            while len(self.drafts) > self.max_drafts:
+                self.drafts.popitem(last=False)
+                self.stats['discarded'] += 1
+        except Exception as e:
+            logger.warning(f"Speculative draft for {persona} failed: {str(e)[:200]}")
+        finally:
+            self.in_flight.pop((channel_id, persona), None)
+
+    def take(self, fingerprint: str) -> Optional[str]:
+        """Claim a ready draft built from exactly this input"""
+        draft = self.drafts.pop(fingerprint, None)
+        if draft is None:
+            self.stats['misses'] += 1
+            return None
+        self.stats['hits'] += 1
+        return draft['text']
+
+    async def wait(self):
+        """Wait for in-flight drafts (used by tests and shutdown)"""
+        if self.in_flight:
+            await asyncio.gather(*list(self.in_flight.values()), return_exceptions=True)
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tool Batch
+Run several tool calls from one MCP request, concurrently where their dependencies allow
+"""
+
+import time
+import asyncio
+import logging
+from typing import List, Dict, Optional, Any, Callable, Awaitable
+
+logger = logging.getLogger(__name__)
+
+# Operation outcomes
+OK = "ok"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+def plan_batch(operations: List[Dict[str, Any]], max_operations: int = 20,
+               disallowed: tuple = ("batch",)) -> List[Dict[str, Any]]:
+    """Validate operations and normalize them to {id, tool, arguments, depends_on}; raises ValueError"""
+    if not operations:
+        raise ValueError("operations must be a non-empty list")
+    if len(operations) > max_operations:
+        raise ValueError(f"At most {max_operations} operations per batch")
+
+    planned = []
+    ids = set()
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict) or not operation.get('tool'):
+            raise ValueError(f"Operation {index} needs a tool")
+        if operation['tool'] in disallowed:
+            raise ValueError(f"Operation {index}: {operation['tool']} cannot be batched")
+        op_id = str(operation.get('id') or f"op{index + 1}")
+        if op_id in ids:
+            raise ValueError(f"Duplicate operation id {op_id}")
+        ids.add(op_id)
+        planned.append({
+            'id': op_id,
+            'tool': operation['tool'],
+            'arguments': operation.get('arguments') or {},
+            'depends_on': [str(dep) for dep in operation.get('depends_on') or []]
+        })
+
+    for operation in planned:
+        for dep in operation['depends_on']:
+            if dep not in ids:
+                raise ValueError(f"Operation {operation['id']} depends on unknown operation {dep}")
+
+    # Kahn's algorithm: anything left unresolved sits on a cycle
+    remaining = {operation['id']: set(operation['depends_on']) for operation in planned}
+    while True:
+        ready = [op_id for op_id, deps in remaining.items() if not deps]
+        if not ready:
+            break
+        for op_id in ready:
+            del remaining[op_id]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    if remaining:
+        raise ValueError(f"Dependency cycle between operations {', '.join(sorted(remaining))}")
+    return planned
+
+
+async def run_batch(operations: List[Dict[str, Any]], call: Callable[[str, dict], Awaitable[List[Any]]],
+                    max_concurrency: int = 8) -> List[Dict[str, Any]]:
+    """Run planned operations; each starts as soon as its dependencies succeed, skipped if any did not"""
+    semaphore = asyncio.Semaphore(max_concurrency)
+    done: Dict[str, asyncio.Future] = {op['id']: asyncio.get_running_loop().create_future() for op in operations}
+
+    async def run(operation: Dict[str, Any]) -> Dict[str, Any]:
+        result = {'id': operation['id'], 'tool': operation['tool'], 'ms': 0.0}
+        try:
+            failed = [dep for dep in operation['depends_on'] if await done[dep] != OK]
+            if failed:
+                result.update(status=SKIPPED, text=f"SKIPPED: dependency {', '.join(failed)} did not succeed")
+                return result
+
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    content = await call(operation['tool'], operation['arguments'])
+                    text = "\n".join(getattr(item, 'text', str(item)) for item in content or [])
+                    result.update(status=FAILED if text.startswith("ERROR") else OK, text=text)
+                except Exception as e:
+                    logger.warning(f"Batch operation {operation['id']} raised: {str(e)[:200]}")
+                    result.update(status=FAILED, text=f"ERROR: {type(e).__name__}: {e}")
+                result['ms'] = round((time.perf_counter() - start) * 1000, 1)
+            return result
+        finally:
+            done[operation['id']].set_result(result.get('status', FAILED))
+
+    return list(await asyncio.gather(*(run(operation) for operation in operations)))
+
+
+def format_batch_results(results: List[Dict[str, Any]], elapsed_ms: float) -> str:
+    counts = {status: sum(1 for result in results if result['status'] == status) for status in (OK, FAILED, SKIPPED)}
+    lines = [f"BATCH: {len(results)} operations in {elapsed_ms:.0f} ms "
+             f"({counts[OK]} ok, {counts[FAILED]} failed, {counts[SKIPPED]} skipped)"]
+    for result in results:
+        lines.append(f"--- {result['id']}: {result['tool']} ({result['status']}, {result['ms']:.0f} ms)")
+        lines.append(result['text'])
+    return "\n".join(lines)
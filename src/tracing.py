@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Tracing
+OpenTelemetry-compatible spans per tool call, exported as OTLP/JSON to a file or collector
+"""
+
+import os
+import json
+import time
+import queue
+import asyncio
+import atexit
+import random
+import secrets
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from typing import List, Dict, Optional, Any
+
+# OTLP status codes
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar('mcp_current_span', default=None)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{'key': key, 'value': _otlp_value(value)} for key, value in attributes.items()]
+
+
+class Span:
+    """One timed operation; children find their parent through a context variable"""
+
+    def __init__(self, tracer: "Tracer", name: str, trace_id: str, parent_span_id: Optional[str],
+                 attributes: Dict[str, Any] = None, sampled: bool = True):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.attributes = dict(attributes or {})
+        self.events: List[Dict[str, Any]] = []
+        self.status = STATUS_UNSET
+        self.status_message = ""
+        self.sampled = sampled
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+
+    def set_attribute(self, key: str, value: Any):
+        if value is not None:
+            self.attributes[key] = value
+
+    def add_event(self, name: str, **attributes):
+        self.events.append({'name': name, 'time_ns': time.time_ns(), 'attributes': attributes})
+
+    def set_status(self, code: int, message: str = ""):
+        self.status = code
+        self.status_message = message
+
+    def record_exception(self, exc: BaseException):
+        self.add_event('exception', **{'exception.type': type(exc).__name__, 'exception.message': str(exc)[:500]})
+        self.set_status(STATUS_ERROR, type(exc).__name__)
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        return None if self.end_ns is None else (self.end_ns - self.start_ns) / 1e6
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Span in OTLP/JSON form"""
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': 1,  # SPAN_KIND_INTERNAL
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns or self.start_ns),
+            'attributes': _otlp_attributes(self.attributes),
+            'events': [
+                {'timeUnixNano': str(event['time_ns']), 'name': event['name'],
+                 'attributes': _otlp_attributes(event['attributes'])}
+                for event in self.events
+            ],
+            'status': {'code': self.status}
+        }
+        if self.parent_span_id:
+            span['parentSpanId'] = self.parent_span_id
+        if self.status_message:
+            span['status']['message'] = self.status_message
+        return span
+
+
+class InMemorySpanExporter:
+    """Keeps finished spans in a list (tests and debugging)"""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def export(self, spans: List[Span]):
+        self.spans.extend(spans)
+
+
+class FileSpanExporter:
+    """Appends one OTLP ExportTraceServiceRequest per line, like the collector's file exporter; rotates at max_bytes"""
+
+    def __init__(self, path: str, service_name: str = "multi-model-debate", max_bytes: int = 10 * 1024 * 1024,
+                 backups: int = 1):
+        self.path = path
+        self.service_name = service_name
+        self.max_bytes = max_bytes
+        self.backups = backups
+
+    def rotate(self):
+        """traces.jsonl -> traces.jsonl.1 -> ... keeping `backups` old files"""
+        for index in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{index}"):
+                os.replace(f"{self.path}.{index}", f"{self.path}.{index + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def export(self, spans: List[Span]):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        if self.max_bytes and os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+            self.rotate()
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(export_request(spans, self.service_name)) + "\n")
+
+
+class OTLPHttpSpanExporter:
+    """Posts OTLP/JSON to a collector's /v1/traces endpoint"""
+
+    def __init__(self, endpoint: str, service_name: str = "multi-model-debate", timeout: float = 5):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.timeout = timeout
+
+    def export(self, spans: List[Span]):
+        import requests
+        requests.post(self.endpoint, json=export_request(spans, self.service_name), timeout=self.timeout)
+
+
+def export_request(spans: List[Span], service_name: str) -> Dict[str, Any]:
+    """Wrap spans in the OTLP resourceSpans envelope"""
+    return {
+        'resourceSpans': [{
+            'resource': {'attributes': _otlp_attributes({'service.name': service_name})},
+            'scopeSpans': [{
+                'scope': {'name': 'multi-model-debate-mcp'},
+                'spans': [span.to_otlp() for span in spans]
+            }]
+        }]
+    }
+
+
+class BatchSpanProcessor:
+    """Exports finished spans from a background thread so tool calls never wait on I/O"""
+
+    def __init__(self, exporter, max_queue_size: int = 2048, max_batch_size: int = 256,
+                 flush_interval: float = 2.0):
+        self.exporter = exporter
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def on_end(self, span: Span):
+        try:
+            self.queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._worker, name="span-exporter", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.force_flush)
+
+    def _drain(self) -> List[Span]:
+        batch = []
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _export(self, batch: List[Span]):
+        try:
+            self.exporter.export(batch)
+        except Exception:
+            self.dropped += len(batch)
+        finally:
+            for _ in batch:
+                self.queue.task_done()
+
+    def _worker(self):
+        while True:
+            try:
+                first = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            self._export([first] + self._drain())
+
+    def force_flush(self):
+        """Export everything still queued and wait for batches already in flight"""
+        batch = self._drain()
+        while batch:
+            self._export(batch)
+            batch = self._drain()
+        self.queue.join()
+
+
+class Tracer:
+    """Creates spans and hands finished, sampled spans to a processor"""
+
+    def __init__(self, processor: BatchSpanProcessor = None, sample_rate: float = 1.0):
+        self.processor = processor
+        self.sample_rate = sample_rate
+
+    @classmethod
+    def from_config(cls, config: dict, data_dir: str = "data") -> "Tracer":
+        """Build a tracer from the tracing config section (MCP_TRACE_EXPORTER overrides the exporter)"""
+        settings = config.get('tracing', {}) or {}
+        exporter_name = os.getenv("MCP_TRACE_EXPORTER", settings.get('exporter', 'none'))
+        if not settings.get('enabled', True) or exporter_name == 'none':
+            return cls(None)
+
+        service_name = settings.get('service_name', 'multi-model-debate')
+        if exporter_name == 'otlp':
+            exporter = OTLPHttpSpanExporter(
+                settings.get('otlp_endpoint', 'http://localhost:4318/v1/traces'), service_name
+            )
+        else:
+            exporter = FileSpanExporter(
+                os.path.join(data_dir, settings.get('path', 'traces.jsonl')), service_name,
+                max_bytes=int(settings.get('max_file_mb', 10) * 1024 * 1024), backups=settings.get('backups', 1)
+            )
+        return cls(BatchSpanProcessor(exporter), sample_rate=settings.get('sample_rate', 1.0))
+
+    @property
+    def enabled(self) -> bool:
+        return self.processor is not None
+
+    @contextmanager
+    def start_span(self, name: str, root: bool = False, **attributes):
+        """Open a span as a child of the current one (or a new trace when root or there is none)"""
+        parent = None if root else _current_span.get()
+        if parent is not None:
+            span = Span(self, name, parent.trace_id, parent.span_id, attributes, parent.sampled)
+        else:
+            sampled = self.enabled and random.random() < self.sample_rate
+            span = Span(self, name, secrets.token_hex(16), None, attributes, sampled)
+
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_ns = time.time_ns()
+            if span.sampled and self.processor is not None:
+                self.processor.on_end(span)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Child span of whatever span is active; a detached no-op span outside a trace"""
+    parent = _current_span.get()
+    if parent is None or not parent.sampled:
+        yield Span(None, name, "", None, attributes, sampled=False)
+        return
+    with parent.tracer.start_span(name, **attributes) as child:
+        yield child
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def detached_task(coro) -> asyncio.Task:
+    """Start a background task outside the current trace, so its spans never attach to a tool call that has ended"""
+    context = copy_context()
+    context.run(_current_span.set, None)
+    # create_task(context=...) is 3.11+; a task copies the context it is created in, so this also runs on 3.10
+    return context.run(asyncio.create_task, coro)
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Shared test fixtures
+"""
+
+import os
+import sys
+import pytest
+from unittest.mock import patch
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.mcp_server import MultiModelMCPServer
+
+
+@pytest.fixture(autouse=True)
+def isolated_data_dir(tmp_path):
+    """Keep server state (SQLite stores, traces, profiles) out of the repository's data/ directory"""
+    with patch.dict(os.environ, {'MCP_DATA_DIR': str(tmp_path)}):
+        yield tmp_path
+
+
+@pytest.fixture
+def make_server(isolated_data_dir):
+    """Factory for servers with a test API key, no Mattermost connection and the isolated data dir;
+    keyword arguments are extra environment variables seen by the constructor"""
+    def make(**env):
+        with patch.dict(os.environ, dict(env, ANTHROPIC_API_KEY='test-key', MCP_DATA_DIR=str(isolated_data_dir))):
+            with patch('src.mcp_server.MultiModelMCPServer.init_mattermost'):
+                return MultiModelMCPServer()
+    return make
+
+
+@pytest.fixture
+def server(make_server):
+    """A test server; test modules override this fixture to adjust it"""
+    return make_server()
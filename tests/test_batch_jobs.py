@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Test suite for offline batch jobs
+"""
+
+import pytest
+import os
+import sys
+from unittest.mock import Mock
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.batch_jobs import BatchJobManager, BatchStore, FakeBatchClient, prompt_hash, PENDING, SUCCEEDED
+
+
+def make_request(text):
+    return {'model': 'claude-3-haiku-20240307', 'max_tokens': 50, 'messages': [{'role': 'user', 'content': text}]}
+
+
+class TestBatchJobs:
+    """Test BatchJobManager with the local fake batch endpoint"""
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        return BatchStore(str(tmp_path / "batch_jobs.db"))
+
+    def test_prompt_hash_is_stable(self):
+        """Test prompt hashes ignore dict ordering"""
+        a = {'model': 'm', 'max_tokens': 5}
+        b = {'max_tokens': 5, 'model': 'm'}
+
+        assert prompt_hash(a) == prompt_hash(b)
+        assert prompt_hash(a) != prompt_hash(make_request("x"))
+
+    @pytest.mark.asyncio
+    async def test_submit_and_collect(self, store):
+        """Test results are persisted by prompt hash once the batch ends"""
+        manager = BatchJobManager(FakeBatchClient(), store, poll_interval=0)
+
+        submitted = await manager.submit([make_request("one"), make_request("two")])
+        await manager.wait()
+
+        assert len(submitted['batch_ids']) == 1
+        assert manager.get_batch(submitted['batch_ids'][0])['status'] == "ended"
+        result = manager.get_result(prompt_hash(make_request("one")))
+        assert result['status'] == SUCCEEDED
+        assert "one" in result['text']
+
+    @pytest.mark.asyncio
+    async def test_known_prompts_are_not_resent(self, store):
+        """Test duplicate prompts reuse stored results"""
+        client = FakeBatchClient()
+        manager = BatchJobManager(client, store, poll_interval=0)
+
+        await manager.submit([make_request("one")])
+        await manager.wait()
+        submitted = await manager.submit([make_request("one"), make_request("two")])
+        await manager.wait()
+
+        assert submitted['reused'] == 1
+        assert len(client.batches) == 2
+        assert [len(b['requests']) for b in client.batches.values()] == [1, 1]
+
+    @pytest.mark.asyncio
+    async def test_batches_are_chunked(self, store):
+        """Test large submissions are split by max_batch_size"""
+        manager = BatchJobManager(FakeBatchClient(), store, poll_interval=0, max_batch_size=2)
+
+        submitted = await manager.submit([make_request(str(i)) for i in range(5)])
+        await manager.wait()
+
+        assert len(submitted['batch_ids']) == 3
+
+    @pytest.mark.asyncio
+    async def test_resume_after_restart(self, tmp_path):
+        """Test pending batches are picked up again by a new manager"""
+        path = str(tmp_path / "batch_jobs.db")
+        client = FakeBatchClient(polls_until_done=3)
+        first = BatchJobManager(client, BatchStore(path), poll_interval=60)
+
+        submitted = await first.submit([make_request("resume me")])
+        for task in list(first.poll_tasks.values()):
+            task.cancel()
+        await first.wait()
+        assert first.get_result(prompt_hash(make_request("resume me")))['status'] == PENDING
+
+        on_usage = Mock()
+        second = BatchJobManager(client, BatchStore(path), poll_interval=0, on_usage=on_usage)
+        assert second.resume() == submitted['batch_ids']
+        await second.wait()
+
+        assert second.get_result(prompt_hash(make_request("resume me")))['status'] == SUCCEEDED
+        on_usage.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_usage_reported_for_owner(self, store):
+        """Test a finished batch reports its total usage for the channel and persona it was submitted for"""
+        on_usage = Mock()
+        manager = BatchJobManager(FakeBatchClient(), store, poll_interval=0, on_usage=on_usage)
+
+        submitted = await manager.submit([make_request("one"), make_request("two")], channel_id="c1", persona="kiro")
+        await manager.wait()
+
+        results = [manager.get_result(key) for key in submitted['prompt_hashes']]
+        on_usage.assert_called_once_with("c1", "kiro", sum(r['input_tokens'] for r in results),
+                                         sum(r['output_tokens'] for r in results))
+
+    @pytest.mark.asyncio
+    async def test_poll_retries_failed_checks(self, store):
+        """Test a transient status-check error is retried instead of ending the poll"""
+        client = FakeBatchClient()
+        retrieve = client.messages.batches.retrieve
+        errors = [ConnectionError("reset"), TimeoutError("slow")]
+
+        def flaky_retrieve(batch_id, **kwargs):
+            if errors:
+                raise errors.pop(0)
+            return retrieve(batch_id, **kwargs)
+
+        client.messages.batches.retrieve = flaky_retrieve
+        manager = BatchJobManager(client, store, poll_interval=0, retry_base_delay=0, retry_max_delay=0)
+
+        await manager.submit([make_request("flaky")])
+        await manager.wait()
+
+        assert manager.poll_retries == 2
+        assert manager.get_result(prompt_hash(make_request("flaky")))['status'] == SUCCEEDED
+
+    @pytest.mark.asyncio
+    async def test_poll_gives_up_after_max_failures(self, store):
+        """Test a batch that keeps failing stays pending for the next start"""
+        client = FakeBatchClient()
+        client.messages.batches.retrieve = Mock(side_effect=ConnectionError("down"))
+        manager = BatchJobManager(client, store, poll_interval=0, max_poll_failures=3,
+                                  retry_base_delay=0, retry_max_delay=0)
+
+        submitted = await manager.submit([make_request("down")])
+        await manager.wait()
+
+        assert manager.poll_retries == 2
+        assert store.pending_batches() == submitted['batch_ids']
+
+
+class TestBudgetedBatchJobs:
+    """Test submit_batch_job goes through the token budgets"""
+
+    @pytest.fixture
+    def server(self, server, monkeypatch):
+        monkeypatch.setenv("ANTHROPIC_BATCH_BACKEND", "fake")
+        return server
+
+    @pytest.mark.asyncio
+    async def test_exhausted_budget_refuses_batch(self, server):
+        """Test no batch is submitted once the persona budget is spent"""
+        server.budget_governor.record(server.channel_id, "kiro", server.budget_governor.capacities['persona'] + 1000, 0)
+
+        result = await server.handle_submit_batch_job({"prompts": ["summarise"], "persona": "kiro"})
+
+        assert result[0].text.startswith("PAUSED: Token budget exhausted")
+        assert server.get_batch_jobs().client.batches == {}
+
+    @pytest.mark.asyncio
+    async def test_batch_usage_charged(self, server):
+        """Test collected batch results are charged to the submitting channel and persona"""
+        result = await server.handle_submit_batch_job({"prompts": ["summarise the thread"], "persona": "kiro"})
+        await server.get_batch_jobs().wait()
+
+        assert result[0].text.startswith("OK: 1 prompts queued")
+        snapshot = server.budget_governor.snapshot()
+        assert snapshot[f"channel:{server.channel_id}"]['total_tokens'] > 0
+        assert snapshot["persona:kiro"]['total_tokens'] == snapshot[f"channel:{server.channel_id}"]['total_tokens']
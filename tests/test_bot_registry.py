@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test suite for the persona bot registry
+"""
+
+import pytest
+import os
+import sys
+from unittest.mock import patch, Mock, AsyncMock
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.bot_registry import BotRegistry, RateBucket
+
+CONFIG = {
+    'personas': {
+        'claude-research': {'name': "Claude-Research"},
+        'kiro': {'name': "Kiro"},
+        'gemini-review': {'name': "Gemini", 'bot_token_env': "GEMINI_TOKEN"},
+        'observer': {'name': "Observer"}
+    },
+    'mattermost_bots': {'rate_per_second': 5, 'burst': 2}
+}
+
+TOKENS = {
+    'CLAUDE_RESEARCH_BOT_TOKEN': "research-token",
+    'KIRO_BOT_TOKEN': "kiro-token",
+    'GEMINI_TOKEN': "gemini-token",
+    'OBSERVER_BOT_TOKEN': "your_observer_bot_token_here"
+}
+
+
+class TestBotRegistry:
+    """Test identities built from the personas config"""
+
+    def test_identity_per_token(self):
+        """Test each persona with a token gets its own authenticated session; others share the server bot"""
+        with patch.dict(os.environ, TOKENS, clear=False):
+            registry = BotRegistry.from_config(CONFIG)
+
+        assert [bot.name for bot in registry.identities()] == ["claude-research", "kiro", "gemini-review"]
+        assert registry.for_persona("kiro").session.headers["Authorization"] == "Bearer kiro-token"
+        assert registry.for_persona("Gemini") is registry.for_persona("gemini_review")
+        assert registry.for_persona("observer") is registry.default
+        assert registry.default.personas == ["claude-research", "observer"]
+        assert registry.for_persona("unknown") is registry.default
+
+    def test_shared_token_shares_identity(self):
+        """Test personas configured with the same token share one session and rate bucket"""
+        with patch.dict(os.environ, dict(TOKENS, GEMINI_TOKEN="kiro-token"), clear=False):
+            registry = BotRegistry.from_config(CONFIG)
+
+        assert registry.for_persona("gemini-review") is registry.for_persona("kiro")
+        assert registry.for_persona("kiro").personas == ["kiro", "gemini-review"]
+
+
+class TestRateBucket:
+    """Test the per-bot token bucket"""
+
+    def test_burst_then_rate(self):
+        """Test the burst is free and later requests wait for their reserved slot"""
+        bucket = RateBucket(rate_per_second=5, burst=2)
+        now = bucket.updated
+
+        assert bucket.reserve(now) == 0 and bucket.reserve(now) == 0
+        assert bucket.reserve(now) == pytest.approx(0.2)
+        assert bucket.reserve(now) == pytest.approx(0.4)
+        assert bucket.reserve(now + 1.0) == 0
+
+
+class TestServerBots:
+    """Test contribute posts through the persona's bot"""
+
+    @pytest.fixture
+    def server(self, make_server):
+        server = make_server(**TOKENS)
+        server.mattermost = True
+        server.mattermost_token = "research-token"
+        server.mattermost_base_url = "http://localhost:8065/api/v4"
+        return server
+
+    @pytest.mark.asyncio
+    async def test_posts_use_persona_session(self, server):
+        """Test each persona's post goes through its own bot session and bucket"""
+        server.generate_response = AsyncMock(return_value="Sounds right")
+        kiro = server.bots.for_persona("kiro")
+        research = server.bots.for_persona("claude-research")
+        kiro.session.request = Mock(return_value=Mock(status_code=201))
+        research.session.request = Mock(return_value=Mock(status_code=201))
+
+        result = await server.handle_contribute({"message": "thoughts?", "persona": "kiro"})
+
+        assert result[0].text.startswith("OK:")
+        assert kiro.session.request.call_args.args[:2] == ("POST", "http://localhost:8065/api/v4/posts")
+        assert kiro.session.request.call_args.kwargs['headers'] == {}
+        assert not research.session.request.called
+        assert kiro.requests == 1 and research.requests == 0
+
+    def test_identify_bots_caches_users(self, server):
+        """Test startup checks each bot once and seeds the username cache"""
+        kiro = server.bots.for_persona("kiro")
+        kiro.session.get = Mock(return_value=Mock(status_code=200, json=Mock(return_value={'id': "u-kiro", 'username': "kiro-bot"})))
+
+        server.identify_bots({'id': "u-research", 'username': "claude-research"})
+
+        assert kiro.user_id == "u-kiro"
+        assert server.usernames == {"u-research": "claude-research", "u-kiro": "kiro-bot"}
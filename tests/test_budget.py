@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test suite for the token budget governor
+"""
+
+import pytest
+import os
+import sys
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.budget import LeakyBucket, BudgetGovernor, OK, DEGRADE, SHRINK, EXHAUSTED
+from src.model_routing import TRIAGE
+
+
+class TestLeakyBucket:
+    """Test LeakyBucket functionality"""
+
+    def test_bucket_drains_over_window(self):
+        """Test usage leaks out linearly over the window"""
+        bucket = LeakyBucket(capacity=1000, window_seconds=100)
+        bucket.add(800, now=0)
+
+        assert bucket.utilization(now=0) == 0.8
+        assert bucket.utilization(now=50) == pytest.approx(0.3)
+        assert bucket.utilization(now=1000) == 0.0
+        assert bucket.total == 800
+
+
+class TestBudgetGovernor:
+    """Test BudgetGovernor functionality"""
+
+    @pytest.fixture
+    def governor(self):
+        return BudgetGovernor({
+            'window_seconds': 100,
+            'channel_tokens_per_window': 1000,
+            'persona_tokens_per_window': 500,
+            'degrade_at': 0.5,
+            'shrink_at': 0.8
+        })
+
+    def test_states_follow_tightest_bucket(self, governor):
+        """Test the persona bucket can tighten before the channel bucket"""
+        assert governor.assess("c1", "kiro", now=0)[0] == OK
+
+        governor.record("c1", "kiro", 200, 100, now=0)
+        assert governor.assess("c1", "kiro", now=0)[0] == DEGRADE
+        assert governor.assess("c1", "claude-research", now=0)[0] == OK
+
+        governor.record("c1", "kiro", 100, 50, now=0)
+        assert governor.assess("c1", "kiro", now=0)[0] == SHRINK
+
+        governor.record("c1", "kiro", 100, 0, now=0)
+        assert governor.assess("c1", "kiro", now=0)[0] == EXHAUSTED
+        assert governor.assess("c1", "kiro", now=100)[0] == OK
+
+    def test_snapshot(self, governor):
+        """Test burn is reported per bucket"""
+        governor.record("c1", "kiro", 100, 50, now=0)
+        snapshot = governor.snapshot(now=0)
+
+        assert snapshot["channel:c1"]['tokens_in_window'] == 150
+        assert snapshot["persona:kiro"]['utilization'] == 0.3
+
+    def test_disabled(self):
+        """Test disabled budgets never restrict"""
+        governor = BudgetGovernor({'enabled': False, 'channel_tokens_per_window': 1})
+        governor.record("c1", "kiro", 100, 100)
+
+        assert governor.assess("c1", "kiro") == (OK, 0.0)
+
+
+class TestBudgetedGeneration:
+    """Test generation degrades as budgets tighten"""
+
+    @pytest.fixture
+    def server(self, server):
+        server.budget_governor = BudgetGovernor({'channel_tokens_per_window': 1000, 'shrunk_max_tokens': 40})
+        return server
+
+    @pytest.mark.asyncio
+    async def test_shrink_keeps_triage_and_caps_tokens(self, server):
+        """Test a tight budget forces the cheap tier with a smaller max_tokens"""
+        server.budget_governor.record(server.channel_id, "kiro", 950, 0)
+        response = SimpleNamespace(content=[SimpleNamespace(text="Brief")],
+                                   usage=SimpleNamespace(input_tokens=10, output_tokens=5))
+        server.create_message = AsyncMock(return_value=response)
+
+        result = await server.generate_response("@kiro review?", {}, "ctx", persona="kiro", engagement="mandatory")
+
+        assert result == "Brief"
+        assert server.create_message.call_args.kwargs['max_tokens'] == 40
+        assert server.model_router.history[-1]['tier'] == TRIAGE
+
+    @pytest.mark.asyncio
+    async def test_exhausted_budget_refuses_contribute(self, server):
+        """Test contribute makes no model call once the budget is spent"""
+        server.mattermost = True
+        server.budget_governor.record(server.channel_id, "kiro", 1100, 0)
+        server.generate_response = AsyncMock()
+
+        result = await server.handle_contribute({"message": "hi", "persona": "kiro"})
+
+        assert result[0].text.startswith("PAUSED: Token budget exhausted")
+        server.generate_response.assert_not_called()
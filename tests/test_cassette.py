@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test suite for cassette recording and replay
+"""
+
+import pytest
+import os
+import sys
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from mcp.types import CallToolRequest, CallToolRequestParams
+
+from src.cassette import (
+    CassetteRecorder, ReplayUpstream, load_cassette, replay_session, MATTERMOST, ANTHROPIC, TOOL
+)
+
+POSTS = {
+    "order": ["p1"],
+    "posts": {"p1": {"id": "p1", "user_id": "u1", "message": "Should we cache reads?",
+                     "create_at": 1700000000000, "root_id": ""}}
+}
+
+
+@pytest.fixture
+def make_server(make_server):
+    def make():
+        server = make_server()
+        server.usernames = {"u1": "craig"}
+        return server
+    return make
+
+
+def fake_mattermost(method, url, **kwargs):
+    if method == "GET":
+        return Mock(status_code=200, json=Mock(return_value=POSTS))
+    return Mock(status_code=201, json=Mock(return_value={"id": "new"}))
+
+
+async def call_tool(server, name, arguments):
+    handler = server.server.request_handlers[CallToolRequest]
+    return await handler(CallToolRequest(method="tools/call",
+                                         params=CallToolRequestParams(name=name, arguments=arguments)))
+
+
+class TestCassetteRecorder:
+    """Test the cassette format"""
+
+    def test_round_trip_gzip(self, tmp_path):
+        """Test events are written as compact lines and read back, gzipped by extension"""
+        path = str(tmp_path / "session.jsonl.gz")
+        recorder = CassetteRecorder(path)
+        recorder.record_mattermost("GET", "/users/u1", {}, Mock(status_code=200, json=Mock(return_value={"a": 1})))
+        recorder.record_anthropic({'model': "m", 'max_tokens': 5, 'messages': []},
+                                  SimpleNamespace(content=[SimpleNamespace(text="hi")],
+                                                  usage=SimpleNamespace(input_tokens=3, output_tokens=1)))
+        recorder.close()
+
+        events = load_cassette(path)
+        assert [event['kind'] for event in events] == [MATTERMOST, ANTHROPIC]
+        assert events[0]['body'] == {"a": 1}
+        assert events[1]['usage'] == [3, 1]
+
+
+class TestReplayUpstream:
+    """Test recorded responses are served back"""
+
+    @pytest.mark.asyncio
+    async def test_exact_then_route_fallback(self):
+        """Test exact requests match first and drifted params fall back to the same route"""
+        upstream = ReplayUpstream([
+            {'t': 0, 'kind': MATTERMOST, 'method': "GET", 'path': "/posts", 'request': {'params': {'page': 0}},
+             'status': 200, 'body': {"n": 1}},
+            {'t': 0, 'kind': MATTERMOST, 'method': "GET", 'path': "/posts", 'request': {'params': {'page': 1}},
+             'status': 200, 'body': {"n": 2}},
+        ])
+
+        assert (await upstream.mattermost("GET", "/posts", params={'page': 1})).json() == {"n": 2}
+        assert (await upstream.mattermost("GET", "/posts", params={'page': 9})).json() == {"n": 1}
+        assert (await upstream.mattermost("GET", "/posts")).status_code == 404
+        assert upstream.misses[MATTERMOST] == 1
+
+
+class TestRecordAndReplay:
+    """Test a recorded session replays deterministically"""
+
+    @pytest.mark.asyncio
+    async def test_session_replays_identically(self, make_server, tmp_path):
+        """Test replayed tool calls reproduce recorded results and request counts"""
+        path = str(tmp_path / "session.jsonl")
+        server = make_server()
+        server.mattermost = True
+        server.mattermost_token = "bot-token"
+        server.mattermost_base_url = "http://localhost:8065/api/v4"
+        server.anthropic_client = Mock()
+        server.anthropic_client.messages.create = Mock(return_value=SimpleNamespace(
+            content=[SimpleNamespace(text="Yes, cache them")],
+            usage=SimpleNamespace(input_tokens=20, output_tokens=4)))
+        server.start_recording(path)
+
+        with patch('requests.Session.request', side_effect=fake_mattermost):
+            await call_tool(server, "read_discussion", {"limit": 5})
+            await call_tool(server, "contribute", {"message": "@kiro thoughts?", "persona": "kiro"})
+        server.cassette.close()
+
+        events = load_cassette(path)
+        assert [event['name'] for event in events if event['kind'] == TOOL] == ["read_discussion", "contribute"]
+
+        replayed = make_server()
+        with patch('requests.Session.request', side_effect=AssertionError("replay must not hit the network")):
+            report = await replay_session(replayed, events)
+
+        assert report['tool_calls'] == 2
+        assert report['changed_results'] == 0
+        assert report['unmatched_requests'] == {}
+        assert report['upstream_requests'] == report['recorded_upstream_requests']
+        assert set(report['latency_ms']) == {"read_discussion", "contribute"}
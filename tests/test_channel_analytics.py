@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Test suite for per-channel analytics
+"""
+
+import pytest
+import os
+import sys
+from unittest.mock import Mock
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.channel_analytics import ChannelAnalytics
+
+AI = {"claude-research", "kiro"}
+
+
+def post(post_id, username, seconds, **fields):
+    return dict({'id': post_id, 'user_id': username, 'username': username, 'message': "msg",
+                 'create_at': seconds * 1000, 'update_at': seconds * 1000}, **fields)
+
+
+class TestChannelAnalytics:
+    """Test incremental aggregation"""
+
+    def test_counts_latency_and_streaks(self):
+        """Test counts, first-reply latency per persona and AI streaks across sync batches"""
+        analytics = ChannelAnalytics(lambda author: author in AI)
+        analytics.add_posts("c1", [post("p2", "kiro", 30), post("p1", "craig", 0)])
+        analytics.add_posts("c1", [post("p3", "claude-research", 60), post("p4", "kiro", 90),
+                                   post("p5", "craig", 100), post("p6", "kiro", 110)])
+
+        stats = analytics.snapshot("c1")
+        assert stats['by_author'] == {"kiro": 3, "craig": 2, "claude-research": 1}
+        assert stats['ai_share'] == pytest.approx(4 / 6, abs=0.001)
+        assert stats['reply_latency']["kiro"]['replies'] == 2
+        assert stats['reply_latency']["kiro"]['mean_s'] == 20.0
+        assert stats['reply_latency']["claude-research"]['p50_s'] == 60.0
+        assert (stats['current_ai_streak'], stats['longest_ai_streak'], stats['mean_ai_streak']) == (1, 3, 3.0)
+
+    def test_edits_deletes_and_backfill(self):
+        """Test re-synced edits are not double counted, deletes are subtracted and old posts only count"""
+        analytics = ChannelAnalytics(lambda author: author in AI)
+        analytics.add_posts("c1", [post("p1", "craig", 100), post("p2", "kiro", 110)])
+        analytics.add_posts("c1", [post("p2", "kiro", 110, update_at=200000)])
+        analytics.add_posts("c1", [post("p1", "craig", 100, delete_at=300000)])
+        analytics.add_posts("c1", [post("p0", "kiro", 10)])
+
+        stats = analytics.snapshot("c1")
+        assert stats['by_author'] == {"kiro": 2}
+        assert stats['current_ai_streak'] == 1
+        assert analytics.snapshot("other") is None
+
+    def test_recent_window_bounded(self):
+        """Test only recent post ids are kept; older deletes stay counted and older edits are not recounted"""
+        analytics = ChannelAnalytics(lambda author: author in AI, recent_posts=2)
+        analytics.add_posts("c1", [post("p1", "craig", 0), post("p2", "kiro", 10), post("p3", "craig", 20)])
+        analytics.add_posts("c1", [post("p1", "craig", 0, update_at=30000)])
+        analytics.add_posts("c1", [post("p1", "craig", 0, delete_at=40000), post("p3", "craig", 20, delete_at=40000)])
+
+        stats = analytics.snapshot("c1")
+        assert len(analytics.channels["c1"].post_authors) == 1
+        assert stats['by_author'] == {"craig": 1, "kiro": 1}
+
+
+class TestChannelStatsTool:
+    """Test channel_stats and the autonomous limit"""
+
+    @pytest.fixture
+    def server(self, server):
+        server.speculator = None
+        return server
+
+    @pytest.mark.asyncio
+    async def test_stats_from_synced_posts(self, server):
+        """Test synced posts are reported without refetching"""
+        server.ingest_posts(server.channel_id, [post("p1", "craig", 0), post("p2", "kiro", 45)])
+
+        text = (await server.handle_channel_stats({}))[0].text
+
+        assert "2 posts, 1 human / 1 AI (AI share 50%)" in text
+        assert "Reply latency kiro: 1 replies, mean 45.0s" in text
+        assert "AI streaks: current 1, longest 1" in text
+
+    @pytest.mark.asyncio
+    async def test_stats_rebuilt_after_restart(self, server, make_server):
+        """Test a restarted server rebuilds counts and streaks from the search index instead of starting at zero"""
+        server.ingest_posts(server.channel_id, [post("p1", "craig", 0), post("p2", "kiro", 45),
+                                                post("p3", "claude-research", 50)])
+
+        restarted = make_server()
+        restarted.speculator = None
+        text = (await restarted.handle_channel_stats({}))[0].text
+        assert "3 posts, 1 human / 2 AI" in text
+        assert "AI streaks: current 2, longest 2" in text
+
+        restarted.ingest_posts(restarted.channel_id, [post("p3", "claude-research", 50, update_at=60000),
+                                                      post("p4", "craig", 70)])
+        text = (await restarted.handle_channel_stats({}))[0].text
+        assert "4 posts, 2 human / 2 AI" in text
+
+    def test_synced_streak_blocks_autonomous_turns(self, server):
+        """Test persona posts seen in the channel count toward the autonomous exchange limit"""
+        server.collaboration_rules = {'enabled': True, 'max_consecutive_ai_exchanges': 2}
+        server.ingest_posts(server.channel_id, [post("p1", "craig", 0), post("p2", "kiro", 10)])
+        assert server.should_allow_autonomous_contribution("kiro")
+
+        server.ingest_posts(server.channel_id, [post("p3", "claude-research", 20)])
+        assert not server.should_allow_autonomous_contribution("kiro")
+
+        server.ingest_posts(server.channel_id, [post("p4", "craig", 30)])
+        assert server.should_allow_autonomous_contribution("kiro")
+
+    def test_stale_streak_does_not_block(self, server):
+        """Test an old sync of an unwatched channel no longer gates autonomous turns"""
+        server.collaboration_rules = {'enabled': True, 'max_consecutive_ai_exchanges': 2}
+        server.ingest_posts(server.channel_id, [post("p1", "kiro", 10), post("p2", "claude-research", 20)])
+        assert not server.should_allow_autonomous_contribution("kiro")
+
+        server.synced_at[server.channel_id] -= 3600
+        assert server.should_allow_autonomous_contribution("kiro")
+
+        server.subscriptions[server.channel_id] = Mock(done=Mock(return_value=False))
+        assert not server.should_allow_autonomous_contribution("kiro")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test suite for IDE-to-chat context bridging
+"""
+
+import pytest
+import os
+import sys
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.context_bridge import BridgeClassifier, BRIDGE, KEEP_LOCAL
+
+CONFIG = {
+    'context_bridging': {
+        'ide_to_chat': {
+            'trigger_phrases': ["should we", "which is better", "design decision"],
+            'keep_local_phrases': ["error", "bug", "fix"],
+            'bridge_format': "From IDE discussion: [summary] - should we discuss this as a team?"
+        }
+    }
+}
+
+
+class TestBridgeClassifier:
+    """Test phrase scoring and the bridge message"""
+
+    def test_trigger_bridges_with_summary(self):
+        """Test a design question bridges, summarized by the sentence holding the trigger"""
+        classifier = BridgeClassifier.from_config(CONFIG)
+        result = classifier.classify("Refactored the cache layer today. Should we move sessions to Redis?")
+
+        assert result['decision'] == BRIDGE
+        assert result['triggers'] == ["should we"]
+        assert result['message'] == ("From IDE discussion: Should we move sessions to Redis? "
+                                     "- should we discuss this as a team?")
+
+    def test_keep_local_outweighs_triggers(self):
+        """Test debugging chatter stays local even with a trigger phrase"""
+        classifier = BridgeClassifier.from_config(CONFIG)
+        result = classifier.classify("Should we fix this bug first? The error is in the parser.")
+
+        assert result['decision'] == KEEP_LOCAL
+        assert result['keep_local'] == ["fix", "bug", "error"]
+        assert result['message'] is None
+
+    def test_whole_words_and_explicit_summary(self):
+        """Test phrases only match whole words and a given summary is used as is"""
+        classifier = BridgeClassifier.from_config(CONFIG)
+        result = classifier.classify("Design decision: prefix-free codes, no debugging needed.", summary="Codec choice")
+
+        assert result['keep_local'] == []
+        assert result['message'].startswith("From IDE discussion: Codec choice -")
+
+    def test_no_config(self):
+        """Test an empty config keeps everything local"""
+        assert BridgeClassifier.from_config({}).classify("Which is better?")['decision'] == KEEP_LOCAL
+
+
+class TestShouldBridgeTool:
+    """Test should_bridge against the shipped config"""
+
+    @pytest.mark.asyncio
+    async def test_routes_without_model_call(self, server):
+        """Test bridge and keep-local answers come from the compiled phrase lists"""
+        server.anthropic_client = None
+
+        text = (await server.handle_should_bridge({'text': "What do you think about an event-sourced store?"}))[0].text
+        assert text.startswith("BRIDGE: From IDE discussion: What do you think about an event-sourced store?")
+
+        text = (await server.handle_should_bridge({'text': "Test failed with a syntax error"}))[0].text
+        assert text.startswith("KEEP_LOCAL:")
+
+        assert (await server.handle_should_bridge({}))[0].text.startswith("ERROR")
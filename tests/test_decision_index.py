@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test suite for incremental decision extraction
+"""
+
+import pytest
+import os
+import sys
+import time
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.decision_index import DecisionExtractor, DecisionStore, extract_items, DEFAULT_PHRASES, RESOLVED
+
+
+def post(post_id, username, message, seconds, **fields):
+    return dict({'id': post_id, 'user_id': username, 'username': username, 'message': message, 'root_id': "",
+                 'create_at': seconds * 1000, 'update_at': seconds * 1000, 'delete_at': 0}, **fields)
+
+
+@pytest.fixture
+def extractor(tmp_path):
+    return DecisionExtractor(DecisionStore(str(tmp_path / "decisions.db")), DEFAULT_PHRASES)
+
+
+class TestExtractItems:
+    """Test sentence classification"""
+
+    def test_kinds_and_assignees(self, extractor):
+        """Test one item per matching sentence, with owners from mentions or 'I'll'"""
+        items = extract_items(
+            "We agreed to ship on Friday. @kiro action item: update the schema. I'll write the migration.\n"
+            "Should we keep the v1 endpoint? Nice work everyone.",
+            "craig", extractor.matcher
+        )
+
+        assert [item['kind'] for item in items] == ["decision", "action", "action", "question"]
+        assert items[1]['assignee'] == "kiro"
+        assert items[2]['assignee'] == "craig"
+        assert items[3]['text'] == "Should we keep the v1 endpoint?"
+
+
+class TestDecisionExtractor:
+    """Test checkpoints, edits, deletes and question resolution"""
+
+    def test_only_new_posts_are_processed(self, extractor):
+        """Test posts at or before the checkpoint are skipped"""
+        posts = [post("p1", "craig", "Decision: use SQLite for the index.", 10)]
+        assert extractor.process("c1", posts) == 1
+        assert extractor.process("c1", posts) == 0
+
+        posts.append(post("p2", "kiro", "Open question: how do we migrate old data?", 20))
+        assert extractor.process("c1", posts) == 1
+        assert [item['kind'] for item in extractor.store.query("c1")] == ["question", "decision"]
+
+    def test_edits_and_deletes(self, extractor):
+        """Test edited posts replace their items and deleted posts drop them"""
+        extractor.process("c1", [post("p1", "craig", "Let's go with Redis.", 10)])
+        extractor.process("c1", [post("p1", "craig", "Let's go with SQLite.", 10, update_at=30000)])
+        assert [item['text'] for item in extractor.store.query("c1")] == ["Let's go with SQLite."]
+
+        extractor.process("c1", [post("p1", "craig", "", 10, update_at=40000, delete_at=40000)])
+        assert extractor.store.query("c1") == []
+
+    def test_decision_resolves_thread_questions(self, extractor):
+        """Test a decision in a thread marks earlier questions in it resolved"""
+        extractor.process("c1", [post("q1", "craig", "Which queue should we use?", 10),
+                                 post("q2", "craig", "Who owns the dashboard?", 15)])
+        extractor.process("c1", [post("r1", "kiro", "We decided on the outbox table.", 20, root_id="q1")])
+
+        assert [item['post_id'] for item in extractor.store.query("c1", ["question"], status="open")] == ["q2"]
+        assert extractor.store.query("c1", ["question"], status=RESOLVED)[0]['post_id'] == "q1"
+
+    @pytest.mark.asyncio
+    async def test_background_worker(self, extractor):
+        """Test submitted posts are processed off the event loop"""
+        extractor.submit("c1", [post("p1", "craig", "Next step: benchmark the hot path.", 10)])
+        await extractor.wait()
+
+        assert extractor.processed == 1
+        assert extractor.store.query("c1")[0]['kind'] == "action"
+
+
+class TestGetDecisionsTool:
+    """Test get_decisions over synced posts"""
+
+    @pytest.fixture
+    def server(self, server):
+        server.speculator = None
+        return server
+
+    @pytest.mark.asyncio
+    async def test_decisions_from_synced_posts(self, server):
+        """Test synced posts are listed by kind with their source post IDs"""
+        now = int(time.time())
+        server.ingest_posts(server.channel_id, [
+            post("p1", "craig", "We agreed to cache user lookups.", now - 60),
+            post("p2", "kiro", "I'll add the registry. Is the rate limit per bot?", now - 30)
+        ])
+
+        text = (await server.handle_get_decisions({}))[0].text
+        assert "Decisions (1):" in text
+        assert "craig: We agreed to cache user lookups. (post p1)" in text
+        assert "kiro: I'll add the registry. (post p2, owner @kiro)" in text
+        assert "Open questions (1):" in text
+
+        text = (await server.handle_get_decisions({'kind': "action"}))[0].text
+        assert "Decisions" not in text and "Action items (1):" in text
+
+        assert (await server.handle_get_decisions({'kind': "vote"}))[0].text.startswith("ERROR")
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test suite for server diagnostics
+"""
+
+import pytest
+import os
+import sys
+import asyncio
+import tracemalloc
+from unittest.mock import Mock, patch
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.diagnostics import process_rss_bytes, tracemalloc_report, format_bytes, format_stats
+from src.mcp_server import MessageCache, RetryHandler
+
+
+class TestCounters:
+    """Test the counters behind get_server_stats"""
+
+    def test_message_cache_hit_ratio(self):
+        """Test cache lookups are counted and payload bytes summed"""
+        cache = MessageCache()
+        cache.get_cached_messages("a")
+        cache.cache_messages("a", "x" * 2048)
+        cache.get_cached_messages("a")
+        cache.get_cached_messages("a")
+
+        stats = cache.stats()
+        assert (stats['entries'], stats['hits'], stats['misses']) == (1, 2, 1)
+        assert stats['hit_ratio'] == pytest.approx(0.667, abs=0.001)
+        assert stats['bytes'] == "2.0KiB"
+
+    @pytest.mark.asyncio
+    async def test_retry_stats(self):
+        """Test retries and exhausted calls are counted with the last error"""
+        handler = RetryHandler(max_retries=1, base_delay=0, max_delay=0)
+        with patch('random.uniform', return_value=0):
+            with pytest.raises(ConnectionError):
+                await handler.retry_with_backoff(Mock(side_effect=ConnectionError("refused")))
+
+        assert handler.stats['calls'] == 1
+        assert handler.stats['retries'] == 1
+        assert handler.stats['exhausted'] == 1
+        assert "ConnectionError: refused" == handler.stats['last_error']
+
+    def test_probes(self):
+        """Test RSS and byte formatting"""
+        assert process_rss_bytes() > 0
+        assert format_bytes(3 * 1024 * 1024) == "3.0MiB"
+        assert format_stats({'a': {'b': 1}, 'c': ["x"]}) == "Server stats:\na: b=1\nc:\n  x"
+
+
+class TestServerStatsTool:
+    """Test get_server_stats"""
+
+    @pytest.fixture
+    def server(self, server):
+        server.mattermost_base_url = "http://localhost:8065/api/v4"
+        server.mattermost_token = "bot-token"
+        return server
+
+    @pytest.mark.asyncio
+    async def test_reports_in_flight_calls(self, server):
+        """Test a Mattermost request still waiting upstream shows up as in flight"""
+        release = asyncio.Event()
+        loop = asyncio.get_running_loop()
+
+        def slow_request(*args, **kwargs):
+            asyncio.run_coroutine_threadsafe(release.wait(), loop).result()
+            return Mock(status_code=200)
+
+        server.add_to_history("Kiro", "Let's ship it")
+        with patch('requests.Session.request', side_effect=slow_request):
+            pending = asyncio.create_task(server.mattermost_request("GET", "/users/me"))
+            while server.in_flight['mattermost'] == 0:
+                await asyncio.sleep(0.01)
+            text = (await server.handle_get_server_stats({}))[0].text
+            release.set()
+            await pending
+
+        assert "in_flight: mattermost=1, anthropic=0" in text
+        assert "message_cache: entries=0" in text
+        assert "exchanges=1, participants=['Kiro']" in text
+        assert "rss=" in text
+        assert server.in_flight['mattermost'] == 0
+
+    @pytest.mark.asyncio
+    async def test_tracemalloc_snapshot(self, server):
+        """Test tracemalloc can be started and then reports top allocation sites"""
+        try:
+            started = (await server.handle_get_server_stats({"tracemalloc": "start"}))[0].text
+            assert "tracing=True" in started
+
+            retained = [bytearray(4096) for _ in range(256)]
+            snapshot = (await server.handle_get_server_stats({"tracemalloc": "snapshot", "top": 3}))[0].text
+            assert "top_allocations:" in snapshot
+            assert "test_diagnostics.py" in snapshot
+            del retained
+        finally:
+            tracemalloc.stop()
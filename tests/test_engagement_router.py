@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test suite for the local engagement router
+"""
+
+import pytest
+import os
+import sys
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.engagement_router import PhraseMatcher, EngagementRouter, MANDATORY, OPTIONAL, OBSERVE
+
+
+PERSONAS = {
+    'claude-research': {
+        'name': 'Claude-Research',
+        'trigger_phrases': ['trade-offs', 'long-term']
+    },
+    'kiro': {
+        'name': 'Kiro',
+        'trigger_phrases': ['timeline', 'next steps']
+    }
+}
+
+
+class TestPhraseMatcher:
+    """Test PhraseMatcher functionality"""
+
+    def test_overlapping_matches(self):
+        """Test classic Aho-Corasick overlapping phrases"""
+        matcher = PhraseMatcher([('he', 1), ('she', 2), ('hers', 3)], whole_words=False)
+
+        assert sorted(matcher.payloads("ushers")) == [1, 2, 3]
+
+    def test_whole_word_matching(self):
+        """Test that phrases embedded in longer words are ignored"""
+        matcher = PhraseMatcher([('kiro', 'kiro')])
+
+        assert matcher.payloads("ask Kiro.") == ['kiro']
+        assert matcher.payloads("kirov ballet") == []
+
+    def test_add_after_build(self):
+        """Test that phrases added later are matched once rebuilt"""
+        matcher = PhraseMatcher([('alpha', 'a')])
+        matcher.add('beta', 'b')
+
+        assert matcher.payloads("alpha beta") == ['a', 'b']
+        assert len(matcher) == 2
+
+
+class TestEngagementRouter:
+    """Test EngagementRouter functionality"""
+
+    @pytest.fixture
+    def router(self):
+        return EngagementRouter(PERSONAS)
+
+    def test_at_mention_is_mandatory(self, router):
+        """Test @mentions make a persona's response mandatory"""
+        levels = router.classify("@kiro can you check this?")
+
+        assert levels['kiro'] == MANDATORY
+        assert levels['claude-research'] == OBSERVE
+
+    def test_name_mention_is_optional(self, router):
+        """Test plain name mentions make a response optional"""
+        levels = router.classify("I wonder what Claude-Research would say")
+
+        assert levels['claude-research'] == OPTIONAL
+
+    def test_trigger_phrases_use_scorer(self, router):
+        """Test trigger phrases lift observe to optional"""
+        levels = router.classify("What is the timeline here?")
+
+        assert levels['kiro'] == OPTIONAL
+        assert levels['claude-research'] == OBSERVE
+
+    def test_pluggable_scorer(self):
+        """Test a custom scorer replaces the keyword scorer"""
+        router = EngagementRouter(PERSONAS, scorer=lambda message, persona, config, hits: 1.0)
+
+        assert router.classify("anything at all") == {'claude-research': OPTIONAL, 'kiro': OPTIONAL}
+
+    def test_broadcast_mention(self, router):
+        """Test @all invites every persona"""
+        assert set(router.classify("@all thoughts?").values()) == {OPTIONAL}
+
+    def test_author_never_responds_to_self(self, router):
+        """Test a persona observes its own posts"""
+        levels = router.classify("@kiro note to self", author="Kiro")
+
+        assert levels['kiro'] == OBSERVE
+
+    def test_resolve_aliases(self, router):
+        """Test persona aliases resolve to config keys"""
+        assert router.resolve("claude_research") == 'claude-research'
+        assert router.resolve("Claude-Research") == 'claude-research'
+        assert router.resolve("unknown") is None
+
+    def test_responders_order(self, router):
+        """Test responders lists mandatory personas first"""
+        assert router.responders("claude-research and @kiro please weigh in") == ['kiro', 'claude-research']
+
+    def test_responders_reuse_levels(self, router):
+        """Test responders accepts levels already computed by classify"""
+        levels = router.classify("@kiro next steps?")
+        levels['claude-research'] = OPTIONAL
+
+        assert router.responders("ignored", levels=levels) == ['kiro', 'claude-research']
+
+
+class TestRouteMessageTool:
+    """Test the route_message tool"""
+
+    @pytest.mark.asyncio
+    async def test_lists_responders(self, server):
+        """Test route_message reports who should reply, mandatory first"""
+        text = (await server.handle_route_message({"message": "@kiro what are the next steps?"}))[0].text
+
+        assert "kiro: mandatory" in text
+        assert text.splitlines()[-1].startswith("Responders: kiro")
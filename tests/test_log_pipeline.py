@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Test suite for the structured logging pipeline
+"""
+
+import io
+import os
+import sys
+import json
+import queue
+import logging
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.log_pipeline import (
+    truncate, summarize, SamplingFilter, StructuredFormatter, DroppingQueueHandler
+)
+
+
+def make_record(msg="Tool called: %s", args=("contribute",), level=logging.INFO, **extra):
+    record = logging.LogRecord("test", level, __file__, 1, msg, args, None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+class TestSummaries:
+    """Test truncation and redaction of logged payloads"""
+
+    def test_truncate_keeps_length(self):
+        """Test long strings are cut with the dropped length noted"""
+        assert truncate("x" * 250, 200) == "x" * 200 + "…(+50 chars)"
+        assert truncate("short", 200) == "short"
+
+    def test_summarize_redacts_and_caps(self):
+        """Test redacted keys become sizes and long lists are shortened"""
+        summary = summarize({
+            'message': "secret draft " * 100,
+            'persona': "kiro",
+            'ids': list(range(8))
+        })
+
+        assert summary['message'] == "<redacted str len=1300>"
+        assert summary['persona'] == "kiro"
+        assert summary['ids'] == [0, 1, 2, 3, 4, "…(+3 items)"]
+
+
+class TestSamplingFilter:
+    """Test per-event sampling"""
+
+    def test_keeps_one_in_n(self):
+        """Test a 0.25 rate keeps every fourth record for that event only"""
+        sampler = SamplingFilter({'semantic_retrieval': 0.25})
+
+        kept = [sampler.filter(make_record(event='semantic_retrieval')) for _ in range(8)]
+        assert kept.count(True) == 2
+        assert sampler.filter(make_record(event='tool_call'))
+        assert sampler.filter(make_record())
+
+    def test_warnings_always_kept(self):
+        """Test warnings bypass sampling"""
+        sampler = SamplingFilter({'retry': 0.0})
+
+        assert not sampler.filter(make_record(event='retry'))
+        assert sampler.filter(make_record(event='retry', level=logging.WARNING))
+
+
+class TestStructuredFormatter:
+    """Test record formatting"""
+
+    def test_json_output(self):
+        """Test JSON lines carry the event and summarized fields"""
+        formatter = StructuredFormatter(json_output=True)
+        record = make_record(event='tool_call', fields={'tool': 'contribute', 'arguments': {'message': 'hello'}})
+
+        entry = json.loads(formatter.format(record))
+
+        assert entry['msg'] == "Tool called: contribute"
+        assert entry['event'] == "tool_call"
+        assert entry['arguments'] == {'message': "<redacted str len=5>"}
+
+    def test_long_messages_truncated(self):
+        """Test exception text in messages is capped"""
+        formatter = StructuredFormatter(max_message_length=50)
+        record = make_record(msg="API call failed: %s", args=(RuntimeError("e" * 500),))
+
+        assert "…(+" in formatter.format(record)
+        assert len(formatter.format(record)) < 200
+
+
+class TestDroppingQueueHandler:
+    """Test the non-blocking queue handler"""
+
+    def test_drops_when_full(self):
+        """Test a full queue drops records instead of blocking"""
+        handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+        handler.handle(make_record())
+        handler.handle(make_record())
+
+        assert handler.queue.qsize() == 1
+        assert handler.dropped == 1
+
+    def test_formatting_deferred(self):
+        """Test records are enqueued unformatted, with args intact"""
+        handler = DroppingQueueHandler(queue.Queue())
+        handler.handle(make_record())
+
+        record = handler.queue.get_nowait()
+        assert record.args == ("contribute",)
+
+        stream = io.StringIO()
+        output = logging.StreamHandler(stream)
+        output.setFormatter(StructuredFormatter())
+        output.handle(record)
+        assert "Tool called: contribute" in stream.getvalue()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test suite for Mattermost payload decoding
+"""
+
+import pytest
+import os
+import sys
+import json
+from unittest.mock import Mock
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import src.mattermost_payloads as payloads
+from src.mattermost_payloads import decode_post_list, decode_user
+
+PAYLOAD = {
+    "order": ["p2", "p1", "p3"],
+    "posts": {
+        "p1": {"id": "p1", "user_id": "u1", "message": "first", "create_at": 1000, "root_id": "",
+               "props": {"from_bot": "true"}, "metadata": {"embeds": [{"type": "link"}]}, "file_ids": []},
+        "p2": {"id": "p2", "user_id": "u2", "message": "edited", "create_at": 500, "update_at": 3000,
+               "root_id": "p1", "reply_count": 1},
+        "p3": {"id": "p3", "user_id": "u1", "message": "third", "create_at": 2000},
+    },
+    "next_post_id": "",
+    "prev_post_id": "p0",
+}
+
+
+def raw_response(payload):
+    return Mock(content=json.dumps(payload).encode('utf-8'))
+
+
+class TestDecodePostList:
+    """Test post list decoding"""
+
+    @pytest.mark.parametrize("use_msgspec", [True, False])
+    def test_follows_order_array(self, monkeypatch, use_msgspec):
+        """Test posts come back in the server's order rather than re-sorted by create_at"""
+        if not use_msgspec:
+            monkeypatch.setattr(payloads, 'msgspec', None)
+
+        posts = decode_post_list(raw_response(PAYLOAD))
+
+        assert [post.id for post in posts] == ["p2", "p1", "p3"]
+        assert posts[0].reply_count == 1
+        assert not hasattr(posts[1], 'props')
+
+    def test_dict_style_access(self):
+        """Test records behave like the JSON dicts the handlers were written against"""
+        post = decode_post_list(raw_response(PAYLOAD))[1]
+
+        assert post['message'] == "first"
+        assert post.get('reply_count', 7) == 7
+        assert not post.get('root_id')
+        post['username'] = "alice"
+        assert post.username == "alice"
+        with pytest.raises(KeyError):
+            post['props']
+
+    def test_json_fallback_without_order(self):
+        """Test mock responses without raw content or 'order' are ordered newest first"""
+        response = Mock(json=Mock(return_value={"posts": {k: v for k, v in PAYLOAD["posts"].items() if k != "p2"}}))
+
+        posts = decode_post_list(response)
+
+        assert [post.id for post in posts] == ["p3", "p1"]
+
+
+class TestDecodeUser:
+    """Test user decoding"""
+
+    def test_username_only(self):
+        """Test only the username is kept from a user payload"""
+        user = decode_user(raw_response({"id": "u1", "username": "alice", "email": "a@example.com",
+                                         "props": {}, "timezone": {"useAutomaticTimezone": "true"}}))
+
+        assert user.username == "alice"
+        assert decode_user(Mock(json=Mock(return_value={"id": "u2"}))).username == "unknown"
@@ -7,12 +7,13 @@ import pytest
 import asyncio
 import os
 import sys
+from datetime import datetime
 from unittest.mock import Mock, AsyncMock, patch, MagicMock
 
 # Add src to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from src.mcp_server import MultiModelMCPServer, RetryHandler, MessageCache, ConversationContext
+from src.mcp_server import MultiModelMCPServer, RetryHandler, MessageCache, ConversationContext, parse_time_ms
 
 
 class TestConversationContext:
@@ -223,6 +224,166 @@ class TestMultiModelMCPServer:
         server.add_to_history("human-user", "Human message")
         assert server.should_allow_autonomous_contribution("claude_research")
 
+    def test_engagement_level(self, server):
+        """Test engagement routing resolves persona aliases"""
+        assert server.get_engagement_level("@kiro please review", "kiro") == "mandatory"
+        assert server.get_engagement_level("@kiro please review", "claude_research") == "observe"
+        assert server.get_engagement_level("anything", "unknown-persona") == "optional"
+
+
+class TestThreadReading:
+    """Test thread-aware read tools"""
+
+    @pytest.fixture
+    def server(self, server):
+        server.mattermost = True
+        server.usernames = {'u1': 'alice', 'u2': 'kiro'}
+        return server
+
+    @staticmethod
+    def response(posts):
+        return Mock(status_code=200, json=Mock(return_value={'posts': posts}))
+
+    @pytest.mark.asyncio
+    async def test_threads_mode_lists_roots_with_reply_counts(self, server):
+        """Test threads mode hides replies and reports reply counts"""
+        server.mattermost_request = AsyncMock(return_value=self.response({
+            'r1': {'user_id': 'u1', 'message': 'Root question', 'create_at': 1000, 'root_id': ''},
+            'x1': {'user_id': 'u2', 'message': 'Deep dive reply', 'create_at': 2000, 'root_id': 'r1'},
+            'r2': {'user_id': 'u2', 'message': 'Standalone', 'create_at': 3000, 'root_id': ''},
+        }))
+
+        result = await server.handle_read_discussion({"mode": "threads"})
+
+        assert "Deep dive reply" not in result[0].text
+        assert "[1 replies, thread r1]" in result[0].text
+        assert server.mattermost_request.call_args.kwargs['params']['collapsedThreads'] == "true"
+
+    @pytest.mark.asyncio
+    async def test_read_thread_is_cached_until_new_reply(self, server):
+        """Test thread bodies are cached and invalidated by synced replies"""
+        server.mattermost_request = AsyncMock(return_value=self.response({
+            'r1': {'user_id': 'u1', 'message': 'Root question', 'create_at': 1000, 'root_id': ''},
+            'x1': {'user_id': 'u2', 'message': 'Reply', 'create_at': 2000, 'root_id': 'r1'},
+        }))
+
+        first = await server.handle_read_thread({"root_id": "r1"})
+        await server.handle_read_thread({"root_id": "r1"})
+        assert server.mattermost_request.call_count == 1
+        assert first[0].text.startswith("Thread r1 (1 replies):")
+
+        server.invalidate_synced_threads(server.channel_id, [{'id': 'x2', 'root_id': 'r1'}])
+        await server.handle_read_thread({"root_id": "r1"})
+        assert server.mattermost_request.call_count == 2
+
+
+class TestPaginatedRead:
+    """Test cursor-paginated read_discussion"""
+
+    POSTS = [{'id': f"p{i:02d}", 'user_id': 'u1', 'message': f"message {i}", 'create_at': 1000 * i, 'root_id': ''}
+             for i in range(1, 26)]
+
+    @pytest.fixture
+    def server(self, server):
+        server.mattermost = True
+        server.usernames = {'u1': 'alice'}
+        server.config['history_sync'] = {'page_size': 5}
+        server.mattermost_request = AsyncMock(side_effect=self.fake_posts_api)
+        return server
+
+    async def fake_posts_api(self, method, path, params=None, **kwargs):
+        """Serve POSTS like Mattermost: pages newest first, before/after cursors"""
+        ids = [post['id'] for post in self.POSTS]
+        if 'before' in params:
+            window = self.POSTS[:ids.index(params['before'])][-params['per_page']:]
+        elif 'after' in params:
+            window = self.POSTS[ids.index(params['after']) + 1:][:params['per_page']]
+        elif 'since' in params:
+            window = [post for post in self.POSTS if post['create_at'] >= params['since']]
+        else:
+            window = self.POSTS[-params['per_page']:]
+        order = [post['id'] for post in reversed(window)]
+        return Mock(status_code=200, json=Mock(return_value={'order': order, 'posts': {p['id']: p for p in window}}))
+
+    @pytest.mark.asyncio
+    async def test_walks_pages_backwards_with_cursor(self, server):
+        """Test large limits span pages and return a continuation cursor"""
+        result = await server.handle_read_discussion({"limit": 12})
+        lines = result[0].text.split("\n")
+
+        assert lines[0].endswith("message 14")
+        assert lines[11].endswith("message 25")
+        assert lines[-1] == "Next cursor: before=p14"
+        assert server.mattermost_request.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_continuation_until_end(self, server):
+        """Test following the cursor reaches the start of history"""
+        result = await server.handle_read_discussion({"limit": 20, "before": "p14"})
+        lines = result[0].text.split("\n")
+
+        assert lines[0].endswith("message 1")
+        assert lines[-1] == "(end of history in this direction)"
+
+    @pytest.mark.asyncio
+    async def test_after_cursor_reads_forward(self, server):
+        """Test after cursors page oldest-to-newest"""
+        result = await server.handle_read_discussion({"limit": 3, "after": "p20"})
+
+        assert result[0].text.split("\n")[:3] == [
+            f"[{datetime.fromtimestamp(i).strftime('%Y-%m-%d %H:%M')}] alice: message {i}" for i in (21, 22, 23)
+        ]
+        assert result[0].text.endswith("Next cursor: after=p23")
+
+    @pytest.mark.asyncio
+    async def test_time_range(self, server):
+        """Test since/until bound the window"""
+        result = await server.handle_read_discussion({"limit": 50, "since": "10000", "until": "12000"})
+
+        assert [line.split(": ")[-1] for line in result[0].text.split("\n")[:-1]] == ["message 10", "message 11", "message 12"]
+
+    @pytest.mark.asyncio
+    async def test_until_starts_from_indexed_anchor(self, server):
+        """Test an until-only window pages from the first indexed post after it, not from the newest post"""
+        server.get_search_index().add_posts(server.channel_id, self.POSTS)
+
+        result = await server.handle_read_discussion({"limit": 3, "until": "12000"})
+
+        assert [line.split(": ")[-1] for line in result[0].text.split("\n")[:-1]] == ["message 10", "message 11", "message 12"]
+        assert server.mattermost_request.call_count == 1
+        assert server.mattermost_request.call_args.kwargs['params']['before'] == "p13"
+
+    @pytest.mark.asyncio
+    async def test_page_stream_closed_on_error(self, server):
+        """Test the page generator is closed when reading a post fails mid-page"""
+        closed = []
+
+        async def pages(*args, **kwargs):
+            try:
+                yield self.POSTS[0]
+                yield self.POSTS[1]
+            finally:
+                closed.append(True)
+
+        server.iter_channel_posts = pages
+        server.get_username = AsyncMock(side_effect=RuntimeError("users API down"))
+
+        result = await server.handle_read_discussion({"limit": 12})
+
+        assert result[0].text.startswith("ERROR: Error reading discussion")
+        assert closed == [True]
+
+    @pytest.mark.asyncio
+    async def test_invalid_time(self, server):
+        """Test unparseable times are reported"""
+        result = await server.handle_read_discussion({"since": "yesterday-ish"})
+
+        assert result[0].text.startswith("ERROR: Invalid time")
+
+    def test_utc_suffix(self):
+        """Test a trailing Z parses as UTC on every supported Python"""
+        assert parse_time_ms("2024-01-01T00:00:00Z") == parse_time_ms("2024-01-01T00:00:00+00:00") == 1704067200000
+
 
 @pytest.mark.asyncio
 async def test_mcp_tools_registration():
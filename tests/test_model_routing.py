@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test suite for tiered model routing
+"""
+
+import pytest
+import os
+import sys
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.model_routing import ModelRouter, TRIAGE, ESCALATED
+
+
+def fake_response(text, input_tokens=100, output_tokens=20):
+    """Build an object shaped like an Anthropic Messages API response"""
+    return SimpleNamespace(
+        content=[SimpleNamespace(text=text)],
+        usage=SimpleNamespace(input_tokens=input_tokens, output_tokens=output_tokens)
+    )
+
+
+class TestModelRouter:
+    """Test ModelRouter functionality"""
+
+    def test_mandatory_escalates(self):
+        """Test @mention-mandatory requests go to the stronger tier"""
+        router = ModelRouter()
+        tier, reason = router.choose_tier("quick question", engagement="mandatory")
+
+        assert tier == ESCALATED
+        assert "mandatory" in reason
+
+    def test_simple_message_uses_triage(self):
+        """Test short, simple requests stay on the triage tier"""
+        router = ModelRouter()
+
+        assert router.choose_tier("sounds good", engagement="optional")[0] == TRIAGE
+
+    def test_complex_message_escalates(self):
+        """Test multiple complexity phrases trigger escalation"""
+        router = ModelRouter()
+
+        assert router.choose_tier("compare the architecture options")[0] == ESCALATED
+
+    def test_persona_overrides(self):
+        """Test per-persona model tier overrides"""
+        router = ModelRouter(
+            {'tiers': {TRIAGE: {'model': 'small', 'max_tokens': 100}}},
+            {'kiro': {'model_tiers': {TRIAGE: {'max_tokens': 50}}}}
+        )
+
+        assert router.tier_params('kiro', TRIAGE) == {'model': 'small', 'max_tokens': 50,
+                                                      'input_cost_per_mtok': 0.25, 'output_cost_per_mtok': 1.25}
+        assert router.tier_params(None, TRIAGE)['max_tokens'] == 100
+
+    def test_record_and_summary(self):
+        """Test routing decisions record latency and token cost"""
+        router = ModelRouter()
+        router.record('kiro', TRIAGE, 'claude-3-haiku-20240307', 'default', 120.0, input_tokens=1_000_000, output_tokens=0)
+        router.record('kiro', TRIAGE, 'claude-3-haiku-20240307', 'default', 80.0)
+
+        summary = router.summary()
+        assert summary[TRIAGE]['calls'] == 2
+        assert summary[TRIAGE]['median_latency_ms'] == 100.0
+        assert summary[TRIAGE]['cost_usd'] == 0.25
+
+    def test_cost_priced_by_model(self):
+        """Test a call is priced by the model it ran on, not by its tier's default model"""
+        router = ModelRouter(
+            {'prices': {'claude-3-opus-20240229': {'input_cost_per_mtok': 15.0, 'output_cost_per_mtok': 75.0}}},
+            {'kiro': {'model_tiers': {TRIAGE: {'model': 'claude-3-opus-20240229'}}}}
+        )
+        assert router.record('kiro', TRIAGE, 'claude-3-opus-20240229', 'default', 10.0,
+                             input_tokens=1_000_000)['cost_usd'] == 15.0
+        assert router.record('kiro', TRIAGE, 'llama3', 'default', 10.0, input_tokens=1_000_000)['cost_usd'] is None
+
+        summary = router.summary()
+        assert summary[TRIAGE]['cost_usd'] == 15.0
+        assert summary[TRIAGE]['unpriced_calls'] == 1
+
+
+class TestTieredGeneration:
+    """Test generate_response routing through the model tiers"""
+
+    @pytest.mark.asyncio
+    async def test_triage_draft_is_used(self, server):
+        """Test a triage draft is returned without calling the stronger model"""
+        server.create_message = AsyncMock(return_value=fake_response("Short answer"))
+
+        result = await server.generate_response("ok?", {}, "ctx", persona="kiro", engagement="optional")
+
+        assert result == "Short answer"
+        assert server.create_message.call_count == 1
+        assert server.model_router.history[-1]['tier'] == TRIAGE
+
+    @pytest.mark.asyncio
+    async def test_triage_escalation(self, server):
+        """Test the triage model can hand off to the stronger tier"""
+        server.create_message = AsyncMock(side_effect=[fake_response("ESCALATE"), fake_response("Deep answer")])
+
+        result = await server.generate_response("ok?", {}, "ctx", persona="kiro", engagement="optional")
+
+        assert result == "Deep answer"
+        assert [entry['tier'] for entry in server.model_router.history] == [TRIAGE, ESCALATED]
+
+    @pytest.mark.asyncio
+    async def test_triage_pass(self, server):
+        """Test autonomous turns can decline to respond"""
+        server.create_message = AsyncMock(return_value=fake_response("PASS"))
+
+        result = await server.generate_response("ok?", {}, "ctx", persona="kiro", allow_pass=True)
+
+        assert result == ""
+        assert server.model_router.history[-1]['outcome'] == "pass"
+
+    @pytest.mark.asyncio
+    async def test_budget_status_reports_routing(self, server):
+        """Test get_budget_status includes the per-tier routing summary"""
+        server.model_router.record('kiro', TRIAGE, 'claude-3-haiku-20240307', 'default', 50.0,
+                                   input_tokens=1000, output_tokens=200)
+
+        text = (await server.handle_get_budget_status({}))[0].text
+
+        assert "Model routing (last 1 calls):" in text
+        assert "triage: 1 calls, median 50.0ms, 1000/200 tokens in/out, $0.0005" in text
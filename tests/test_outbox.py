@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Test suite for the contribute outbox
+"""
+
+import pytest
+import os
+import sys
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.outbox import Outbox, OutboxStore, DeliveryError, QUEUED, DELIVERED, FAILED
+
+
+class TestOutbox:
+    """Test Outbox delivery"""
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        return OutboxStore(str(tmp_path / "outbox.db"))
+
+    @pytest.mark.asyncio
+    async def test_ordered_delivery_with_retry(self, store):
+        """Test a failing head post is retried before later posts go out"""
+        delivered = []
+        failures = {'first': 2}
+
+        async def poster(entry):
+            if failures.get(entry['message'], 0):
+                failures[entry['message']] -= 1
+                raise DeliveryError("503 - unavailable")
+            delivered.append(entry['message'])
+            return f"post-{entry['message']}"
+
+        outbox = Outbox(store, poster, base_delay=0, max_delay=0)
+        first = outbox.enqueue("c1", "kiro", "Kiro", "first")
+        outbox.enqueue("c1", "kiro", "Kiro", "second")
+        await outbox.wait()
+
+        assert delivered == ["first", "second"]
+        entry = outbox.get(first)
+        assert entry['status'] == DELIVERED
+        assert entry['attempts'] == 3
+        assert entry['post_id'] == "post-first"
+
+    @pytest.mark.asyncio
+    async def test_non_retriable_fails_and_moves_on(self, store):
+        """Test a rejected post fails without blocking the channel"""
+        async def poster(entry):
+            if entry['message'] == "bad":
+                raise DeliveryError("403 - forbidden", retriable=False)
+            return "ok"
+
+        outbox = Outbox(store, poster, base_delay=0, max_delay=0)
+        bad = outbox.enqueue("c1", "kiro", "Kiro", "bad")
+        good = outbox.enqueue("c1", "kiro", "Kiro", "good")
+        await outbox.wait()
+
+        assert outbox.get(bad)['status'] == FAILED
+        assert "403" in outbox.get(bad)['last_error']
+        assert outbox.get(good)['status'] == DELIVERED
+
+    @pytest.mark.asyncio
+    async def test_resume_after_restart(self, store):
+        """Test queued posts survive a restart and are delivered on resume"""
+        delivery_id = store.enqueue("c1", "kiro", "Kiro", "pending")
+        assert store.get(delivery_id)['status'] == QUEUED
+
+        outbox = Outbox(store, AsyncMock(return_value="p1"))
+        assert outbox.resume() == ["c1"]
+        await outbox.wait()
+
+        assert outbox.get(delivery_id)['status'] == DELIVERED
+
+
+class TestAsyncContribute:
+    """Test contribute with delivery=async"""
+
+    @pytest.fixture
+    def server(self, server):
+        server.mattermost = True
+        server.mattermost_token = "bot-token"
+        server.generate_response = AsyncMock(return_value="Queued reply")
+        return server
+
+    @pytest.mark.asyncio
+    async def test_returns_delivery_id_then_posts(self, server):
+        """Test the tool returns before posting and the status tool tracks delivery"""
+        server.mattermost_request = AsyncMock(return_value=Mock(status_code=201, json=Mock(return_value={"id": "post-9"})))
+
+        result = await server.handle_contribute({"message": "hi", "persona": "kiro", "delivery": "async"})
+
+        assert result[0].text.startswith("QUEUED:")
+        delivery_id = result[0].text.split("delivery_id=")[1].split(")")[0]
+        server.mattermost_request.assert_not_called()
+
+        await server.outbox.wait()
+        server.mattermost_request.assert_called_once()
+        status = await server.handle_get_delivery_status({"delivery_id": delivery_id})
+        assert "delivered" in status[0].text
+        assert "post-9" in status[0].text
+
+    @pytest.mark.asyncio
+    async def test_history_recorded_on_delivery_only(self, server):
+        """Test an async reply enters persona context when delivered, and never if delivery fails for good"""
+        server.mattermost_request = AsyncMock(return_value=Mock(status_code=403, text="forbidden"))
+        await server.handle_contribute({"message": "hi", "persona": "kiro", "delivery": "async"})
+        await server.outbox.wait()
+        assert all(msg['content'] != "Queued reply" for msg in server.conversation_context.messages)
+
+        server.mattermost_request = AsyncMock(return_value=Mock(status_code=201, json=Mock(return_value={"id": "post-9"})))
+        await server.handle_contribute({"message": "hi again", "persona": "kiro", "delivery": "async"})
+        assert all(msg['content'] != "Queued reply" for msg in server.conversation_context.messages)
+        await server.outbox.wait()
+        assert [msg['content'] for msg in server.conversation_context.messages].count("Queued reply") == 1
+
+    @pytest.mark.asyncio
+    async def test_retry_resends_same_pending_post_id(self, server):
+        """Test a retried delivery sends the same pending_post_id so Mattermost can drop the duplicate"""
+        server.mattermost_request = AsyncMock(side_effect=[
+            ConnectionError("read timed out"),
+            Mock(status_code=201, json=Mock(return_value={"id": "post-9"}))
+        ])
+        server.get_outbox().base_delay = 0
+
+        with patch('src.outbox.random.uniform', return_value=0):
+            result = await server.handle_contribute({"message": "hi", "persona": "kiro", "delivery": "async"})
+            await server.outbox.wait()
+
+        delivery_id = result[0].text.split("delivery_id=")[1].split(")")[0]
+        sent = [call.kwargs['json']['pending_post_id'] for call in server.mattermost_request.call_args_list]
+        assert sent == [f"outbox:{delivery_id}"] * 2
+
+    @pytest.mark.asyncio
+    async def test_outage_does_not_fail_contribute(self, server):
+        """Test a Mattermost outage leaves the post queued for retry"""
+        server.mattermost_request = AsyncMock(side_effect=ConnectionError("refused"))
+        server.get_outbox().base_delay = 30
+
+        result = await server.handle_contribute({"message": "hi", "persona": "kiro", "delivery": "async"})
+        delivery_id = result[0].text.split("delivery_id=")[1].split(")")[0]
+
+        for _ in range(3):
+            await asyncio.sleep(0)
+        status = await server.handle_get_delivery_status({"delivery_id": delivery_id})
+        assert "queued (1 attempts)" in status[0].text
+        assert "ConnectionError" in status[0].text
+
+        for task in server.outbox.workers.values():
+            task.cancel()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test suite for read tool output formats
+"""
+
+import pytest
+import os
+import sys
+import json
+from unittest.mock import AsyncMock, Mock
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.output_formats import render_posts, author_aliases, format_delta, COMPACT, JSON, TEXT
+from src.semantic_index import estimate_tokens
+
+START = 1760000000000
+
+
+def make_entries(count, message="Caching reads would cut latency noticeably for the whole team"):
+    authors = ["Claude-Research", "Kiro", "craig"]
+    return [{'id': f"p{i}", 'author': authors[i % 3], 'create_at': START + i * 90000, 'message': f"{message} {i}"}
+            for i in range(count)]
+
+
+class TestRenderPosts:
+    """Test the renderers"""
+
+    def test_compact_is_smaller_than_text(self):
+        """Test compact output aliases authors and uses delta timestamps"""
+        entries = make_entries(20)
+
+        text = render_posts(entries, TEXT, report_tokens=True)
+        compact = render_posts(entries, COMPACT)
+
+        assert compact.splitlines()[0].startswith("authors C=Claude-Research K=Kiro C2=craig")
+        assert compact.splitlines()[2].startswith("+1m K: ")
+        assert compact.endswith("tokens]")
+        assert estimate_tokens(compact) < estimate_tokens(text)
+
+    def test_json_is_structured(self):
+        """Test JSON output parses and reports its own size"""
+        rendered = render_posts(make_entries(2), JSON)
+        payload = json.loads(rendered)
+
+        assert [post['author'] for post in payload['posts']] == ["Claude-Research", "Kiro"]
+        assert payload['omitted'] == 0
+        assert payload['tokens'] == pytest.approx(estimate_tokens(rendered), abs=2)
+
+    @pytest.mark.parametrize("fmt", [TEXT, COMPACT, JSON])
+    def test_max_tokens_keeps_newest(self, fmt):
+        """Test a cap drops the oldest posts first and stays within budget"""
+        rendered = render_posts(make_entries(40), fmt, max_tokens=120)
+
+        assert estimate_tokens(rendered) <= 120
+        assert "latency noticeably for the whole team 39" in rendered
+        assert "team 0\n" not in rendered
+
+    def test_single_long_post_is_clipped(self):
+        """Test the newest post is clipped rather than dropped when nothing else is left"""
+        rendered = render_posts(make_entries(1, message="x" * 2000), TEXT, max_tokens=50)
+
+        assert estimate_tokens(rendered) <= 50
+        assert "…" in rendered
+
+    def test_helpers(self):
+        """Test alias collisions and delta units"""
+        assert author_aliases(["alice", "alex", "bob", "alice"]) == {"alice": "A", "alex": "A2", "bob": "B"}
+        assert [format_delta(ms) for ms in (5000, 120000, 7200000, 172800000)] == ["+5s", "+2m", "+2h", "+2d"]
+
+
+class TestReadToolFormats:
+    """Test format and max_tokens on the read tools"""
+
+    @pytest.fixture
+    def server(self, server):
+        server.mattermost = True
+        server.usernames = {'u1': 'alice', 'u2': 'kiro'}
+        posts = {f"p{i}": {'id': f"p{i}", 'user_id': f"u{i % 2 + 1}", 'message': f"message number {i}",
+                           'create_at': START + i * 60000, 'root_id': ''} for i in range(8)}
+        server.mattermost_request = AsyncMock(return_value=Mock(status_code=200, json=Mock(return_value={'posts': posts})))
+        return server
+
+    @pytest.mark.asyncio
+    async def test_read_discussion_compact(self, server):
+        """Test read_discussion renders compact output and caches it apart from text"""
+        text = await server.handle_read_discussion({"limit": 8})
+        compact = await server.handle_read_discussion({"limit": 8, "format": "compact", "max_tokens": 40})
+
+        assert text[0].text.startswith("[")
+        assert compact[0].text.startswith("authors ")
+        assert "message number 7" in compact[0].text
+        assert estimate_tokens(compact[0].text) <= 40
+
+    @pytest.mark.asyncio
+    async def test_conversation_context_json(self, server):
+        """Test get_conversation_context returns recent posts as JSON"""
+        result = await server.handle_get_conversation_context({"format": "json"})
+        payload = json.loads(result[0].text)
+
+        assert len(payload['posts']) == 5
+        assert payload['posts'][-1]['text'] == "message number 7"
+
+    @pytest.mark.asyncio
+    async def test_unknown_format(self, server):
+        """Test unknown formats are rejected"""
+        result = await server.handle_read_discussion({"format": "xml"})
+        assert result[0].text.startswith("ERROR:")
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Test suite for profiling mode and the event-loop lag watchdog
+"""
+
+import pytest
+import os
+import sys
+import time
+import json
+import asyncio
+from unittest.mock import Mock, patch
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from mcp.types import CallToolRequest, CallToolRequestParams
+
+from src.profiling import ToolProfiler, LoopLagMonitor, folded_stack, OUTSIDE_TASK
+from src.mcp_server import parse_args
+
+
+def busy_wait(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class TestToolProfiler:
+    """Test per-tool-call stack sampling"""
+
+    def test_writes_folded_stacks(self, tmp_path):
+        """Test a profiled call produces a flamegraph-ready folded file"""
+        profiler = ToolProfiler(str(tmp_path), interval=0.001)
+
+        with profiler.profile("read_discussion"):
+            busy_wait(0.05)
+
+        files = list(tmp_path.glob("tool-read_discussion-*.folded"))
+        assert len(files) == 1
+        lines = files[0].read_text().splitlines()
+        assert any("busy_wait" in line for line in lines)
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+    def test_sampling_and_overlap_skip(self, tmp_path):
+        """Test unsampled and overlapping calls are not profiled"""
+        profiler = ToolProfiler(str(tmp_path), sample_rate=0.0)
+        with profiler.profile("x") as sampler:
+            assert sampler is None
+
+        profiler = ToolProfiler(str(tmp_path))
+        with profiler.profile("outer"):
+            with profiler.profile("inner") as inner:
+                assert inner is None
+        assert profiler.profiled == 1 and profiler.skipped == 1
+
+    @pytest.mark.asyncio
+    async def test_other_tasks_not_attributed_to_tool(self, tmp_path):
+        """Test loop time spent in other tasks is folded into one labelled frame, not the tool's stacks"""
+        profiler = ToolProfiler(str(tmp_path), interval=0.001)
+
+        async def other_task():
+            busy_wait(0.05)
+
+        with profiler.profile("read_discussion"):
+            await asyncio.create_task(other_task())
+            busy_wait(0.05)
+
+        lines = list(tmp_path.glob("tool-read_discussion-*.folded"))[0].read_text().splitlines()
+        assert not any(";other_task (" in line for line in lines)
+        assert any(line.startswith(OUTSIDE_TASK + " ") for line in lines)
+        assert any("test_other_tasks_not_attributed_to_tool" in line and "busy_wait" in line for line in lines)
+
+    def test_folded_stack_is_root_first(self):
+        """Test folded stacks list the outermost frame first"""
+        stack = folded_stack(sys._getframe())
+        assert stack.split(";")[-1].startswith("test_folded_stack_is_root_first")
+
+
+class TestLoopLagMonitor:
+    """Test event-loop stall detection"""
+
+    @pytest.mark.asyncio
+    async def test_blocking_callback_reported_with_stack(self, tmp_path):
+        """Test a blocking call on the loop is recorded with the blocking function's stack"""
+        monitor = LoopLagMonitor(str(tmp_path), threshold_ms=50, interval=0.01)
+        monitor.start()
+        await asyncio.sleep(0.03)
+
+        busy_wait(0.2)
+        await asyncio.sleep(0.03)
+        monitor.stop()
+
+        assert len(monitor.stalls) == 1
+        assert any("busy_wait" in frame for frame in monitor.stalls[0]['stack'])
+        assert monitor.max_lag_ms >= 150
+        stall = json.loads((tmp_path / "loop_stalls.jsonl").read_text().splitlines()[0])
+        assert stall['lag_ms'] >= 50
+        assert (tmp_path / "loop_stalls.folded").exists()
+
+
+class TestProfileMode:
+    """Test the server's --profile mode"""
+
+    def test_parse_args(self):
+        """Test the profiling flags"""
+        args = parse_args(["--profile", "--lag-threshold-ms", "250", "--uvloop"])
+        assert args.profile and args.uvloop
+        assert args.lag_threshold_ms == 250
+        assert not parse_args([]).profile
+
+    @pytest.mark.asyncio
+    async def test_tool_calls_profiled(self, server, tmp_path):
+        """Test tool calls write a profile when profiling is enabled"""
+        server.enable_profiling(str(tmp_path))
+
+        handler = server.server.request_handlers[CallToolRequest]
+        await handler(CallToolRequest(method="tools/call", params=CallToolRequestParams(
+            name="get_conversation_context", arguments={})))
+
+        assert server.profiler.profiled == 1
+        assert list(tmp_path.glob("tool-get_conversation_context-*.folded"))
+
+    @pytest.mark.asyncio
+    async def test_lag_monitor_stopped_on_shutdown(self, server, tmp_path):
+        """Test run() stops the loop-lag monitor when the server exits"""
+        server.enable_profiling(str(tmp_path))
+        server.get_batch_jobs = Mock(return_value=None)
+        server.get_outbox = Mock()
+        with patch('mcp.server.stdio.stdio_server', side_effect=RuntimeError("stdin closed")):
+            with pytest.raises(RuntimeError):
+                await server.run()
+
+        await asyncio.gather(server.lag_monitor._task, return_exceptions=True)
+        assert server.lag_monitor._task.cancelled()
+        assert server.lag_monitor._stop.is_set()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Test suite for model providers and hedged requests
+"""
+
+import pytest
+import os
+import sys
+import json
+import asyncio
+import threading
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.providers import ProviderPool, OpenAICompatibleProvider, Completion, LatencyTracker, ProviderError
+from src.cassette import load_cassette, ReplayUpstream
+
+
+class FakeProvider:
+    """Provider whose first token and completion arrive after fixed delays"""
+
+    def __init__(self, name, delay, text=None, fail=False):
+        self.name = name
+        self.delay = delay
+        self.text = text or name
+        self.fail = fail
+        self.calls = 0
+
+    async def complete(self, params, on_first_token, abandoned=None):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ProviderError(f"{self.name} down")
+        on_first_token()
+        return Completion(self.text, input_tokens=10, output_tokens=5, model=f"{self.name}-model")
+
+
+def make_pool(primary, backup, on_discarded=None, **hedging):
+    return ProviderPool({primary.name: primary, backup.name: backup}, default=primary.name,
+                        hedging=dict({'enabled': True, 'backup': backup.name, 'default_threshold_ms': 20}, **hedging),
+                        on_discarded=on_discarded)
+
+
+def sse_response(chunks):
+    response = MagicMock(status_code=200)
+    response.iter_lines.return_value = [b"data: " + json.dumps(chunk).encode() for chunk in chunks] + [b"data: [DONE]"]
+    response.__enter__.return_value = response
+    return response
+
+
+CHUNKS = [{'choices': [{'delta': {'content': "Cache "}}]}, {'choices': [{'delta': {'content': "it."}}]},
+          {'choices': [], 'usage': {'prompt_tokens': 12, 'completion_tokens': 3}}]
+
+
+class TestProviderPool:
+    """Test provider selection and hedging"""
+
+    @pytest.mark.asyncio
+    async def test_fast_primary_is_not_hedged(self):
+        """Test no backup request is sent when the primary answers within the threshold"""
+        primary, backup = FakeProvider("anthropic", 0), FakeProvider("local", 0)
+
+        provider, response = await make_pool(primary, backup).complete(None, {})
+
+        assert provider == "anthropic"
+        assert backup.calls == 0
+
+    @pytest.mark.asyncio
+    async def test_slow_primary_hedges_to_backup(self):
+        """Test a stalled primary triggers a backup request whose answer wins"""
+        primary, backup = FakeProvider("anthropic", 1.0), FakeProvider("local", 0.01)
+        pool = make_pool(primary, backup)
+
+        provider, response = await pool.complete(None, {})
+
+        assert provider == "local"
+        assert response.content[0].text == "local"
+        assert pool.stats["anthropic"]['hedged'] == 1
+
+    @pytest.mark.asyncio
+    async def test_hedge_loser_is_charged(self):
+        """Test the losing request is abandoned but its tokens are still reported once it finishes"""
+        discarded = []
+        primary, backup = FakeProvider("anthropic", 0.1), FakeProvider("local", 0.01)
+        pool = make_pool(primary, backup, on_discarded=lambda *args: discarded.append(args))
+
+        provider, _ = await pool.complete("kiro", {})
+        await asyncio.sleep(0.15)
+
+        assert provider == "local"
+        assert [(persona, name) for persona, name, _ in discarded] == [("kiro", "anthropic")]
+        assert discarded[0][2].usage.input_tokens == 10
+        assert pool.stats["anthropic"]['discarded'] == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_backup_falls_back_to_primary(self):
+        """Test the primary still answers when the hedge request fails"""
+        primary, backup = FakeProvider("anthropic", 0.05), FakeProvider("local", 0, fail=True)
+        pool = make_pool(primary, backup)
+
+        provider, _ = await pool.complete(None, {})
+
+        assert provider == "anthropic"
+        assert pool.stats["local"]['errors'] == 1
+
+    def test_threshold_adapts_to_p95(self):
+        """Test the hedge delay follows the provider's recorded latencies once there are enough"""
+        pool = make_pool(FakeProvider("anthropic", 0), FakeProvider("local", 0), min_samples=10)
+        assert pool.hedge_threshold_ms("anthropic") == 20
+
+        for latency in range(1, 101):
+            pool.latency["anthropic"].record(latency * 10)
+        assert pool.hedge_threshold_ms("anthropic") == 950
+
+    def test_persona_provider(self):
+        """Test personas pick their provider and backup from config"""
+        pool = ProviderPool.from_config({
+            'model_providers': {'backends': {'local': {'type': "openai_compatible", 'base_url': "http://x/v1"}},
+                                'hedging': {'enabled': True}},
+            'personas': {'kiro': {'provider': "local", 'backup_provider': "anthropic"}}
+        }, AsyncMock())
+
+        primary, backup = pool.for_persona("kiro")
+        assert (primary.name, backup.name) == ("local", "anthropic")
+        assert pool.for_persona("other")[0].name == "anthropic"
+
+
+class TestOpenAICompatibleProvider:
+    """Test the streaming chat completions backend"""
+
+    @pytest.mark.asyncio
+    async def test_streams_and_marks_first_token(self):
+        """Test SSE deltas are joined, usage is read and the first token is signalled"""
+        response = sse_response(CHUNKS)
+        first_token = MagicMock()
+
+        provider = OpenAICompatibleProvider("local", "http://localhost:11434/v1/", model="llama3.1:8b")
+        with patch('requests.post', return_value=response) as post:
+            completion = await provider.complete({'model': "claude", 'max_tokens': 50, 'system': "Be brief",
+                                                  'messages': [{'role': "user", 'content': "hi"}]}, first_token)
+        await asyncio.sleep(0)
+
+        assert completion.content[0].text == "Cache it."
+        assert (completion.usage.input_tokens, completion.usage.output_tokens) == (12, 3)
+        assert post.call_args.args[0] == "http://localhost:11434/v1/chat/completions"
+        assert post.call_args.kwargs['json']['model'] == "llama3.1:8b"
+        assert post.call_args.kwargs['json']['messages'][0] == {'role': "system", 'content': "Be brief"}
+        first_token.assert_called_once()
+
+    def test_abandoned_stream_stops_reading(self):
+        """Test an abandoned stream closes early and reports only what it received"""
+        abandoned = threading.Event()
+        provider = OpenAICompatibleProvider("local", "http://localhost:11434/v1", model="llama3.1:8b")
+        with patch('requests.post', return_value=sse_response(CHUNKS)):
+            completion = provider.stream({'messages': [{'role': "user", 'content': "hi"}]}, abandoned.set, abandoned)
+
+        assert completion.content[0].text == "Cache "
+        assert completion.usage.output_tokens > 0
+
+
+class TestRoutedCompletionProviders:
+    """Test routed completions go through the persona's provider"""
+
+    @pytest.mark.asyncio
+    async def test_local_provider_model_recorded(self, make_server):
+        """Test a persona on a local backend records that backend's model"""
+        server = make_server()
+        local = FakeProvider("local", 0, text="Local answer")
+        server.providers.providers["local"] = local
+        server.providers.latency["local"] = LatencyTracker()
+        server.providers.stats["local"] = {'requests': 0, 'wins': 0, 'hedged': 0, 'errors': 0, 'discarded': 0}
+        server.providers.personas = {'kiro': {'provider': "local"}}
+        server.create_message = AsyncMock()
+
+        text = await server.routed_completion("kiro", "triage", "test", "prompt")
+
+        assert text == "Local answer"
+        server.create_message.assert_not_called()
+        assert server.providers.stats["local"]['wins'] == 1
+        assert server.model_router.history[-1]['model'] == "local-model"
+
+    @pytest.mark.asyncio
+    async def test_local_provider_without_anthropic_key(self, make_server):
+        """Test a persona on a local backend still generates replies when no Anthropic client exists"""
+        server = make_server()
+        server.anthropic_client = None
+        server.providers.personas = {'kiro': {'provider': "local"}}
+
+        assert server.providers.usable("kiro")
+        assert not server.providers.usable("claude-research")
+        with patch('requests.post', return_value=sse_response(CHUNKS)):
+            text = await server.generate_response("ok?", {'name': "Kiro"}, "ctx", persona="kiro", engagement="optional")
+
+        assert text == "Cache it."
+        fallback = await server.generate_response("ok?", {'name': "Claude"}, "ctx", persona="claude-research")
+        assert "don't have access" in fallback
+
+    @pytest.mark.asyncio
+    async def test_local_provider_records_and_replays(self, make_server, tmp_path):
+        """Test OpenAI-compatible calls go through the server seam: traced, recorded and replayed offline"""
+        path = str(tmp_path / "session.jsonl")
+        server = make_server()
+        server.providers.personas = {'kiro': {'provider': "local"}}
+        server.start_recording(path)
+        with patch('requests.post', return_value=sse_response(CHUNKS)):
+            assert await server.routed_completion("kiro", "triage", "test", "prompt") == "Cache it."
+        server.cassette.close()
+
+        events = load_cassette(path)
+        assert [(event['kind'], event.get('provider')) for event in events] == [("anthropic", "local")]
+        assert server.in_flight['local'] == 0
+
+        replayed = make_server()
+        replayed.providers.personas = {'kiro': {'provider': "local"}}
+        ReplayUpstream(events).attach(replayed)
+        with patch('requests.post', side_effect=AssertionError("replay must not hit the network")):
+            assert await replayed.routed_completion("kiro", "triage", "test", "prompt") == "Cache it."
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test suite for near-duplicate and circular discussion detection
+"""
+
+import pytest
+import os
+import sys
+import time
+from unittest.mock import AsyncMock, Mock
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.redundancy import RedundancyDetector, simhash, similarity, NOVEL, REDUNDANT, CIRCULAR
+
+POINT = "We should cache the channel history locally so that every read does not hit the Mattermost API again"
+REPHRASED = "We should cache the channel history locally so that every read does not hit the Mattermost API at all"
+OTHER = "The deployment pipeline needs a staging environment before Friday's release candidate"
+
+
+def post(post_id, username, message, create_at):
+    return {'id': post_id, 'user_id': username, 'username': username, 'message': message,
+            'create_at': create_at, 'update_at': create_at, 'delete_at': 0}
+
+
+class TestSimHash:
+    """Test SimHash fingerprints"""
+
+    def test_identical_text(self):
+        """Test identical text has similarity 1.0"""
+        assert similarity(simhash(POINT), simhash(POINT)) == 1.0
+
+    def test_near_duplicate_scores_higher_than_unrelated(self):
+        """Test small edits stay close while unrelated text does not"""
+        assert similarity(simhash(POINT), simhash(REPHRASED)) > 0.8
+        assert similarity(simhash(POINT), simhash(OTHER)) < 0.8
+
+
+class TestRedundancyDetector:
+    """Test RedundancyDetector functionality"""
+
+    def test_duplicate_draft_is_redundant(self):
+        """Test drafts matching the window are flagged redundant"""
+        detector = RedundancyDetector()
+        detector.add("conv", POINT)
+
+        assert detector.check("conv", POINT)[0] == REDUNDANT
+        assert detector.check("conv", OTHER)[0] == NOVEL
+        assert detector.check("other-conv", POINT)[0] == NOVEL
+
+    def test_circular_streak(self):
+        """Test repeated near-duplicates from AIs become circular"""
+        detector = RedundancyDetector(duplicate_threshold=1.01, circular_threshold=0.8, circular_limit=2)
+        detector.add("conv", POINT)
+        detector.add("conv", REPHRASED)
+
+        assert detector.check("conv", POINT)[0] == CIRCULAR
+
+    def test_human_message_resets_streak(self):
+        """Test a human post breaks the circular streak"""
+        detector = RedundancyDetector(duplicate_threshold=1.01, circular_limit=2)
+        detector.add("conv", POINT)
+        detector.add("conv", REPHRASED)
+        detector.add("conv", REPHRASED, from_ai=False)
+
+        assert detector.check("conv", POINT)[0] == NOVEL
+
+    def test_window_is_bounded(self):
+        """Test only the most recent messages are compared"""
+        detector = RedundancyDetector(window=2)
+        detector.add("conv", POINT)
+        detector.add("conv", OTHER)
+        detector.add("conv", "Completely different topic about lunch orders and coffee")
+
+        assert detector.check("conv", POINT)[0] == NOVEL
+
+
+class TestAutonomousPause:
+    """Test the server pauses circular autonomous exchanges"""
+
+    @pytest.fixture
+    def server(self, server):
+        server.collaboration_rules = {'enabled': True, 'max_consecutive_ai_exchanges': 10}
+        return server
+
+    def test_pause_until_human_posts(self, server):
+        """Test a redundancy pause blocks autonomous turns until a human posts"""
+        server.add_to_history("Kiro", POINT)
+        server.pause_autonomous_collaboration("circular discussion")
+
+        assert not server.should_allow_autonomous_contribution("kiro")
+
+        server.add_to_history("human-user", "Let's move on")
+        assert server.should_allow_autonomous_contribution("kiro")
+
+    def test_synced_human_post_lifts_pause(self, server):
+        """Test a human post arriving through channel sync resets the streak and lifts the pause"""
+        conversation_id = f"{server.conversation_context.team}_{server.conversation_context.channel}"
+        server.add_to_history("Kiro", POINT)
+        server.redundancy_detector.streaks[conversation_id] = 2
+        server.pause_autonomous_collaboration("circular discussion")
+        now_ms = int(time.time() * 1000)
+
+        # Backfilled history from before the pause is not fresh human input
+        server.ingest_posts(server.channel_id, [post("old", "craig", "Earlier thoughts", now_ms - 60000)])
+        assert not server.should_allow_autonomous_contribution("kiro")
+
+        server.ingest_posts(server.channel_id, [post("p1", "kiro", "Same point again", now_ms + 500),
+                                                post("p2", "craig", "Let's move on", now_ms + 1000)])
+        assert server.should_allow_autonomous_contribution("kiro")
+        assert server.redundancy_detector.streaks[conversation_id] == 0
+        assert len(server.redundancy_detector.recent[conversation_id]) == 2
+
+    def test_first_backfill_seeds_watermark(self, server):
+        """Test the first synced history is not replayed into redundancy or autonomous tracking"""
+        conversation_id = f"{server.conversation_context.team}_{server.conversation_context.channel}"
+        server.ingest_posts(server.channel_id, [post(f"h{i}", "craig", f"Older thought {i}", 1000 * i) for i in range(1, 50)])
+
+        assert conversation_id not in server.redundancy_detector.recent
+        assert server.last_human_post_at[server.channel_id] == 49000
+
+    @pytest.mark.asyncio
+    async def test_read_discussion_lifts_pause(self, server):
+        """Test a human post seen through read_discussion lifts the pause without any channel watch"""
+        server.add_to_history("Kiro", POINT)
+        server.pause_autonomous_collaboration("circular discussion")
+        now_ms = int(time.time() * 1000)
+        posts = {
+            "p1": {'id': "p1", 'user_id': "u1", 'message': "Older", 'create_at': now_ms - 60000, 'root_id': ""},
+            "p2": {'id': "p2", 'user_id': "u1", 'message': "Let's move on", 'create_at': now_ms + 1000, 'root_id': ""}
+        }
+        server.mattermost = True
+        server.usernames = {'u1': "craig"}
+        server.mattermost_request = AsyncMock(return_value=Mock(status_code=200, json=Mock(return_value={'posts': posts})))
+
+        await server.handle_read_discussion({"limit": 5})
+
+        conversation_id = f"{server.conversation_context.team}_{server.conversation_context.channel}"
+        assert server.should_allow_autonomous_contribution("kiro")
+        assert len(server.redundancy_detector.recent[conversation_id]) == 2
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Test suite for channel transcript resources
+"""
+
+import pytest
+import os
+import sys
+import asyncio
+from unittest.mock import AsyncMock
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from anyio import ClosedResourceError
+from mcp.types import ReadResourceRequest, ReadResourceRequestParams
+
+from src.resources import ChannelTranscript, SubscriberQueue, ResourceHub, channel_uri, parse_channel_uri
+
+
+def make_post(post_id, message, create_at, **fields):
+    return dict({'id': post_id, 'user_id': "u1", 'username': "craig", 'message': message,
+                 'create_at': create_at, 'update_at': create_at, 'root_id': ""}, **fields)
+
+
+class TestChannelTranscript:
+    """Test transcript bookkeeping"""
+
+    def test_edits_deletes_and_since(self):
+        """Test edits replace posts, deletes remove them and since returns only newer changes"""
+        transcript = ChannelTranscript(max_posts=2)
+        transcript.add([make_post("p1", "first", 1000), make_post("p2", "second", 2000)])
+        cursor = transcript.cursor
+
+        transcript.add([make_post("p1", "first (edited)", 1000, update_at=3000)])
+        assert transcript.render(cursor) == [line for line in transcript.render() if "edited" in line]
+
+        transcript.add([make_post("p2", "", 2000, delete_at=4000), make_post("p3", "third", 5000),
+                        make_post("p4", "fourth", 6000)])
+        assert [post_id for post_id in transcript.posts] == ["p3", "p4"]
+        assert transcript.cursor == 6000
+
+    def test_uri_round_trip(self):
+        """Test channel URIs carry the since cursor"""
+        assert parse_channel_uri(channel_uri("c1", 42)) == ("c1", 42)
+        with pytest.raises(ValueError):
+            parse_channel_uri("https://example.com/c1")
+
+
+class TestSubscriberQueue:
+    """Test bounded, coalescing push queues"""
+
+    @pytest.mark.asyncio
+    async def test_slow_client_coalesces_and_stays_bounded(self):
+        """Test updates to one URI collapse while a send is in flight and the queue never grows past its bound"""
+        release = asyncio.Event()
+        sent = []
+
+        async def send(uri):
+            await release.wait()
+            sent.append(uri)
+
+        queue = SubscriberQueue(send, max_pending=2)
+        queue.push("a")
+        await asyncio.sleep(0)
+        for uri in ["b", "b", "c", "d"]:
+            queue.push(uri)
+
+        assert len(queue.pending) == 2
+        assert queue.stats['coalesced'] == 1
+        assert queue.stats['dropped'] == 1
+        release.set()
+        await queue.task
+
+        assert sent == ["a", "c", "d"]
+
+
+class TestResourceHub:
+    """Test subscriber bookkeeping"""
+
+    @pytest.mark.asyncio
+    async def test_disconnected_client_is_removed(self):
+        """Test a send failing on a closed stream drops that client; live clients keep their subscriptions"""
+        hub = ResourceHub()
+        live = AsyncMock()
+        hub.subscribe("gone", channel_uri("c1"), AsyncMock(side_effect=ClosedResourceError()))
+        hub.subscribe("gone", channel_uri("c2"), AsyncMock())
+        hub.subscribe("live", channel_uri("c1"), live)
+
+        hub.publish("c1", [make_post("p1", "one", 1000)])
+        await asyncio.gather(*(queue.task for queue in hub.subscribers.values()))
+
+        assert list(hub.subscribers) == ["live"]
+        assert hub.subscriptions == {"c1": {"live"}}
+        live.assert_awaited_once_with(channel_uri("c1"))
+
+        hub.close()
+        assert hub.subscribers == {} and hub.subscribed_channels() == []
+
+
+class TestChannelResource:
+    """Test the server's channel resources"""
+
+    @pytest.fixture
+    def server(self, server):
+        server.speculator = None
+        return server
+
+    async def read(self, server, uri):
+        handler = server.server.request_handlers[ReadResourceRequest]
+        result = await handler(ReadResourceRequest(method="resources/read", params=ReadResourceRequestParams(uri=uri)))
+        return result.root.contents[0].text
+
+    @pytest.mark.asyncio
+    async def test_incremental_read(self, server):
+        """Test a read returns a cursor and reading from it yields only newer posts"""
+        server.ingest_posts("c1", [make_post("p1", "old news", 1000)])
+
+        full = await self.read(server, channel_uri("c1"))
+        assert "craig: old news" in full
+        next_uri = full.splitlines()[-1].split("Next: ")[1]
+
+        server.ingest_posts("c1", [make_post("p2", "fresh", 2000)])
+        incremental = await self.read(server, next_uri)
+
+        assert "fresh" in incremental
+        assert "old news" not in incremental
+
+    @pytest.mark.asyncio
+    async def test_new_posts_notify_subscribers_once(self, server):
+        """Test subscribers get one coalesced update per channel burst"""
+        send = AsyncMock()
+        server.resources.subscribe("session-1", channel_uri("c1"), send)
+
+        server.ingest_posts("c1", [make_post("p1", "one", 1000)])
+        server.ingest_posts("c1", [make_post("p2", "two", 2000)])
+        server.ingest_posts("c2", [make_post("p3", "elsewhere", 3000)])
+        await server.resources.subscribers["session-1"].task
+
+        send.assert_awaited_once_with(channel_uri("c1"))
+
+    @pytest.mark.asyncio
+    async def test_read_after_restart_seeds_from_index(self, server, make_server):
+        """Test a fresh server's first read shows indexed history instead of an empty transcript"""
+        server.ingest_posts("c1", [make_post("p1", "before the restart", 1000)])
+
+        restarted = make_server()
+        restarted.speculator = None
+        text = await self.read(restarted, channel_uri("c1"))
+
+        assert "craig: before the restart" in text
+        assert text.splitlines()[-1] == f"Next: {channel_uri('c1', 1000)}"
+
+    @pytest.mark.asyncio
+    async def test_watch_stops_with_last_subscriber(self, server):
+        """Test a resource watch is cancelled when its last subscriber leaves, unless notifications still need it"""
+        server.sync_channel_posts = AsyncMock(return_value=[])
+        server.resources.subscribe("session-1", channel_uri("c1"), AsyncMock())
+        server.resources.subscribe("session-2", channel_uri("c1"), AsyncMock())
+        server.watch("c1")
+        watcher = server.subscriptions["c1"]
+
+        server.resources.unsubscribe("session-1", channel_uri("c1"))
+        assert server.subscriptions["c1"] is watcher
+
+        server.resources.remove_client("session-2")
+        await asyncio.sleep(0)
+        assert "c1" not in server.subscriptions and watcher.cancelled()
+
+        server.notification_channels.add("c2")
+        server.resources.subscribe("session-3", channel_uri("c2"), AsyncMock())
+        server.watch("c2")
+        server.resources.remove_client("session-3")
+        assert not server.subscriptions["c2"].done()
+        server.subscriptions["c2"].cancel()
+
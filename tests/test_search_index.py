@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Test suite for the channel history search index
+"""
+
+import pytest
+import os
+import sys
+from unittest.mock import Mock, AsyncMock
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.search_index import SearchIndex
+
+
+def make_post(post_id, message, create_at, **extra):
+    post = {'id': post_id, 'user_id': 'u1', 'username': 'alice', 'message': message,
+            'create_at': create_at, 'update_at': create_at, 'delete_at': 0}
+    post.update(extra)
+    return post
+
+
+class TestSearchIndex:
+    """Test SearchIndex functionality"""
+
+    @pytest.fixture
+    def index(self):
+        return SearchIndex()
+
+    def test_ranked_search_with_snippets(self, index):
+        """Test matches come back ranked with highlighted snippets"""
+        index.add_posts("c1", [
+            make_post("p1", "We decided to use SQLite for the cache", 1000),
+            make_post("p2", "Lunch plans?", 2000),
+            make_post("p3", "SQLite FTS5 is fast; SQLite everywhere", 3000),
+        ])
+
+        matches = index.search("c1", "sqlite")
+
+        assert [m['post_id'] for m in matches] == ["p3", "p1"]
+        assert "[SQLite]" in matches[0]['snippet']
+
+    def test_channels_are_isolated(self, index):
+        """Test searches only return posts from the requested channel"""
+        index.add_posts("c1", [make_post("p1", "deploy tonight", 1000)])
+        index.add_posts("c2", [make_post("p2", "deploy tomorrow", 1000)])
+
+        assert [m['post_id'] for m in index.search("c2", "deploy")] == ["p2"]
+
+    def test_edits_and_deletes(self, index):
+        """Test re-synced posts replace or remove indexed content"""
+        index.add_posts("c1", [make_post("p1", "original wording", 1000)])
+        index.add_posts("c1", [make_post("p1", "edited wording", 1000, update_at=1500)])
+
+        assert index.search("c1", "original") == []
+        assert len(index.search("c1", "edited")) == 1
+
+        index.add_posts("c1", [make_post("p1", "", 1000, update_at=1600, delete_at=1600)])
+        assert index.count("c1") == 0
+        assert index.last_synced("c1") == 1600
+
+    def test_query_sanitizing(self, index):
+        """Test FTS syntax characters in user queries are harmless"""
+        index.add_posts("c1", [make_post("p1", "what about OR-mapping (ORM)?", 1000)])
+
+        assert len(index.search("c1", '(ORM" mapping')) == 1
+        assert len(index.search("c1", "abou*")) == 1
+        assert index.search("c1", "!!!") == []
+
+
+class TestHistorySync:
+    """Test incremental channel sync into the index"""
+
+    @pytest.fixture
+    def server(self, server):
+        server.mattermost = True
+        server.usernames = {'u1': 'alice'}
+        return server
+
+    @pytest.mark.asyncio
+    async def test_backfill_then_since(self, server):
+        """Test the first sync backfills and later syncs ask only for newer posts"""
+        first = Mock(status_code=200, json=Mock(return_value={'posts': {'p1': make_post('p1', 'hello team', 1000)}}))
+        second = Mock(status_code=200, json=Mock(return_value={'posts': {'p2': make_post('p2', 'hello again', 2000)}}))
+        server.mattermost_request = AsyncMock(side_effect=[first, second])
+
+        await server.sync_channel_posts("c1")
+        await server.sync_channel_posts("c1")
+
+        assert server.mattermost_request.call_args_list[0].kwargs['params'] == {"per_page": 200}
+        assert server.mattermost_request.call_args_list[1].kwargs['params'] == {"since": 1000}
+        assert server.get_search_index().count("c1") == 2
+
+    @pytest.mark.asyncio
+    async def test_backfill_runs_in_background_and_resumes(self, server):
+        """Test older pages are fetched before the oldest indexed post, a capped run reports the partial index
+        and the next sync resumes it"""
+        history = [make_post(f"p{i}", f"release note {i}", i * 1000) for i in range(1, 8)]
+        server.config['history_sync'] = {'page_size': 2, 'backfill_max_pages': 1}
+
+        async def fake_posts_api(method, path, params=None, **kwargs):
+            newest_first = sorted(history, key=lambda post: -post['create_at'])
+            if params.get("before"):
+                start = [post['id'] for post in newest_first].index(params["before"]) + 1
+                page = newest_first[start:start + params["per_page"]]
+            elif params.get("since"):
+                page = [post for post in newest_first if post['create_at'] > params["since"]]
+            else:
+                page = newest_first[:params["per_page"]]
+            return Mock(status_code=200, json=Mock(return_value={
+                'order': [post['id'] for post in page], 'posts': {post['id']: post for post in page}}))
+
+        server.mattermost_request = AsyncMock(side_effect=fake_posts_api)
+
+        result = await server.handle_search_discussion({"query": "release", "channel_id": "c1"})
+        await server.backfills["c1"]
+
+        index = server.get_search_index()
+        assert index.count("c1") == 4
+        assert server.mattermost_request.call_args_list[1].kwargs['params'] == {"before": "p6", "per_page": 2}
+        assert "older history not indexed yet" in result[0].text
+
+        await server.sync_channel_posts("c1")
+        while "c1" in server.backfills:
+            await server.backfills["c1"]
+            await server.sync_channel_posts("c1")
+
+        assert index.count("c1") == 7
+        assert index.backfill_progress("c1")['complete']
+        result = await server.handle_search_discussion({"query": "release", "channel_id": "c1"})
+        assert "older history" not in result[0].text
+
+    @pytest.mark.asyncio
+    async def test_search_tool(self, server):
+        """Test search_discussion returns post IDs and snippets"""
+        server.sync_channel_posts = AsyncMock(return_value=[])
+        server.get_search_index().add_posts("c1", [make_post("p9", "ship the outbox on friday", 1000)])
+
+        result = await server.handle_search_discussion({"query": "outbox", "channel_id": "c1"})
+
+        assert "[p9]" in result[0].text
+        assert "alice" in result[0].text
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test suite for semantic recall of older messages
+"""
+
+import pytest
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.semantic_index import HashingEmbedder, EmbeddingIndex, select_within_budget, estimate_tokens
+from src.mcp_server import ConversationContext
+
+
+def item(content, minutes=0):
+    return {'author': 'alice', 'content': content, 'timestamp': datetime(2025, 1, 1) + timedelta(minutes=minutes)}
+
+
+class TestEmbeddingIndex:
+    """Test EmbeddingIndex functionality"""
+
+    def test_hashing_embeddings_are_normalised(self):
+        """Test hashing vectorizer rows have unit length"""
+        vectors = HashingEmbedder(64).embed_batch(["hello world", "", "hello"])
+
+        assert vectors.shape == (3, 64)
+        assert abs(float((vectors[0] ** 2).sum()) - 1.0) < 1e-5
+        assert float(abs(vectors[1]).sum()) == 0.0
+
+    def test_top_k_search(self):
+        """Test the most similar item ranks first"""
+        index = EmbeddingIndex(HashingEmbedder(256))
+        index.add([item("we decided to use postgres for storage"), item("lunch is at noon"), item("deploy on friday")])
+
+        matches = index.search("which storage did we decide on postgres", k=2)
+
+        assert matches[0][1]['content'] == "we decided to use postgres for storage"
+
+    def test_capacity_grows(self):
+        """Test the embedding matrix grows when appending past capacity"""
+        index = EmbeddingIndex(HashingEmbedder(16), initial_capacity=2)
+        index.add([item(f"message {i}") for i in range(5)])
+
+        assert len(index) == 5
+        assert index.vectors.shape[0] >= 5
+
+    def test_exclude(self):
+        """Test items already in the prompt can be excluded from search"""
+        index = EmbeddingIndex(HashingEmbedder(64))
+        index.add([item("alpha beta"), item("alpha beta gamma")])
+
+        matches = index.search("alpha beta gamma", k=5, exclude={"alpha beta gamma"})
+
+        assert [m[1]['content'] for m in matches] == ["alpha beta"]
+
+    def test_oldest_items_evicted(self):
+        """Test the index stays bounded and evicts by timestamp, even when older items arrive last"""
+        index = EmbeddingIndex(HashingEmbedder(16), initial_capacity=2, max_items=10)
+        index.add([item(f"recent {i}", minutes=100 + i) for i in range(8)])
+        index.add([item(f"backfilled {i}", minutes=i) for i in range(4)])
+
+        assert len(index) == 9 and index.evicted == 3
+        assert [m['content'] for m in index.items if m['content'].startswith("backfilled")] == ["backfilled 3"]
+        assert index.search("recent 7", k=1)[0][1]['content'] == "recent 7"
+
+    @pytest.mark.asyncio
+    async def test_submit_embeds_off_the_loop(self):
+        """Test submitted items are embedded in a worker thread and searchable after wait()"""
+        index = EmbeddingIndex(HashingEmbedder(64))
+        index.submit([item("deploy on friday")])
+        assert len(index) == 0
+
+        await index.wait()
+        assert index.search("friday deploy", k=1)[0][1]['content'] == "deploy on friday"
+
+    def test_budget_selection(self):
+        """Test selection respects the token budget and returns chronological order"""
+        matches = [(0.9, item("b" * 40, minutes=5)), (0.8, item("a" * 40, minutes=1)), (0.7, item("c" * 400, minutes=2))]
+
+        selected = select_within_budget(matches, token_budget=2 * estimate_tokens("alice: " + "a" * 40))
+
+        assert [m['content'][0] for m in selected] == ["a", "b"]
+
+
+class TestConversationMemory:
+    """Test ConversationContext recall of aged-out messages"""
+
+    def test_recall_beyond_window(self):
+        """Test messages dropped from the window are still recalled"""
+        context = ConversationContext("team", "channel", max_context=3, memory=EmbeddingIndex(HashingEmbedder(256)))
+        context.add_message("kiro", "Decision: we will ship the release on Thursday")
+        for i in range(10):
+            context.add_message("user", f"unrelated chatter number {i}")
+
+        relevant = context.get_relevant_messages("when do we ship the release", k=1, skip_recent=3)
+
+        assert relevant[0]['content'] == "Decision: we will ship the release on Thursday"
+        assert context.last_retrieval_ms is not None
+
+    def test_remember_deduplicates(self):
+        """Test synced posts are only remembered once"""
+        context = ConversationContext("team", "channel", memory=EmbeddingIndex(HashingEmbedder(32)))
+        post = {'id': 'p1', 'author': 'alice', 'content': 'hello', 'timestamp': datetime(2025, 1, 1)}
+
+        context.remember([post])
+        context.remember([post])
+
+        assert len(context.memory) == 1
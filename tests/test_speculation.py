@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Test suite for speculative persona drafts
+"""
+
+import pytest
+import os
+import sys
+import time
+from unittest.mock import AsyncMock, Mock
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from mcp.types import CallToolRequest, CallToolRequestParams
+
+from src.speculation import Speculator, draft_fingerprint
+
+
+def make_post(post_id, message, age_seconds=0, username="craig"):
+    return {'id': post_id, 'user_id': "u1", 'username': username, 'message': message,
+            'create_at': int((time.time() - age_seconds) * 1000), 'root_id': ""}
+
+
+class TestSpeculator:
+    """Test Speculator bookkeeping"""
+
+    @pytest.mark.asyncio
+    async def test_draft_taken_by_fingerprint(self):
+        """Test a ready draft is returned once for its exact fingerprint"""
+        speculator = Speculator(AsyncMock(return_value=("fp1", "draft", 50)))
+
+        assert speculator.schedule("c1", make_post("p1", "hi"), ["kiro"]) == ["kiro"]
+        await speculator.wait()
+
+        assert speculator.take("other") is None
+        assert speculator.take("fp1") == "draft"
+        assert speculator.take("fp1") is None
+        assert speculator.stats['hits'] == 1
+
+    @pytest.mark.asyncio
+    async def test_channel_moving_on_discards(self):
+        """Test drafts for superseded posts are dropped, including ones still in flight"""
+        speculator = Speculator(AsyncMock(return_value=("fp1", "draft", 50)))
+        post = make_post("p1", "hi", age_seconds=1)
+
+        speculator.schedule("c1", post, ["kiro"])
+        speculator.channel_moved("c1", post['create_at'] + 500)
+        await speculator.wait()
+
+        assert speculator.take("fp1") is None
+        assert speculator.stats['discarded'] == 1
+
+    @pytest.mark.asyncio
+    async def test_bounds(self):
+        """Test draft count, token budget and post age limit speculation"""
+        speculator = Speculator(AsyncMock(), max_drafts=1, token_budget=100)
+        assert speculator.schedule("c1", make_post("old", "hi", age_seconds=600), ["kiro"]) == []
+
+        speculator.bucket.add(200)
+        assert speculator.schedule("c1", make_post("p1", "hi"), ["kiro"]) == []
+
+        speculator = Speculator(AsyncMock(), max_drafts=1)
+        assert speculator.schedule("c1", make_post("p1", "hi"), ["kiro", "claude-research"]) == ["kiro"]
+        assert speculator.stats['skipped'] == 1
+        for task in speculator.in_flight.values():
+            task.cancel()
+
+    def test_fingerprint_covers_inputs(self):
+        """Test any change in generation input changes the fingerprint"""
+        base = draft_fingerprint("hi", {'name': "Kiro"}, "ctx", "mandatory", False)
+        assert base == draft_fingerprint("hi", {'name': "Kiro"}, "ctx", "mandatory", False)
+        assert base != draft_fingerprint("hi", {'name': "Kiro"}, "ctx2", "mandatory", False)
+        assert base != draft_fingerprint("hi", {'name': "Kiro"}, "ctx", "mandatory", True)
+
+
+class TestSpeculativeContribute:
+    """Test the server drafts on human posts and reuses drafts in contribute"""
+
+    @pytest.fixture
+    def server(self, server):
+        server.config['speculation'] = {'enabled': True}
+        server.speculator = Speculator.from_config(server.config, server.speculate_reply)
+        server.mattermost = True
+        server.mattermost_token = "bot-token"
+        server.generate_response = AsyncMock(return_value="Speculated reply")
+        server.mattermost_request = AsyncMock(return_value=Mock(status_code=201))
+        server.get_search_index = Mock()
+        return server
+
+    @pytest.mark.asyncio
+    async def test_contribute_uses_draft(self, server):
+        """Test a contribute matching the drafted context skips generation"""
+        post = make_post("p1", "@kiro can you review the cache change?")
+        server.ingest_posts(server.channel_id, [post])
+        await server.speculator.wait()
+        assert server.generate_response.await_count == 1
+
+        result = await server.handle_contribute({"message": post['message'], "persona": "kiro"})
+
+        assert result[0].text.startswith("OK: Posted as")
+        assert server.generate_response.await_count == 1
+        assert server.speculator.stats['hits'] == 1
+
+    @pytest.mark.asyncio
+    async def test_default_persona_uses_draft(self, server):
+        """Test contribute without a persona (claude_research alias) matches the draft made for claude-research"""
+        post = make_post("p1", "@claude-research what are the trade-offs of caching here?")
+        server.ingest_posts(server.channel_id, [post])
+        await server.speculator.wait()
+
+        handler = server.server.request_handlers[CallToolRequest]
+        result = await handler(CallToolRequest(method="tools/call", params=CallToolRequestParams(
+            name="contribute", arguments={"message": post['message']})))
+
+        assert result.root.content[0].text.startswith("OK: Posted as Claude-Research")
+        assert server.generate_response.await_count == 1
+        assert server.speculator.stats['hits'] == 1
+
+    @pytest.mark.asyncio
+    async def test_ai_posts_not_drafted(self, server):
+        """Test posts by persona bots never trigger speculation"""
+        server.ingest_posts(server.channel_id, [make_post("p1", "@kiro thoughts?", username="claude-research")])
+        await server.speculator.wait()
+
+        server.generate_response.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_changed_context_generates_fresh(self, server):
+        """Test a draft is not reused once the conversation changed"""
+        post = make_post("p1", "@kiro can you review the cache change?")
+        server.ingest_posts(server.channel_id, [post])
+        await server.speculator.wait()
+
+        server.add_to_history("craig", "Actually, ignore the cache, look at the retry logic")
+        server.add_to_history("Claude-Research", "Retry logic looks fine to me")
+        await server.handle_contribute({"message": post['message'], "persona": "kiro"})
+
+        assert server.generate_response.await_count == 2
+        assert server.speculator.stats['misses'] == 1
+
+
+class TestSpeculativeGeneration:
+    """Test speculative drafts are paid by the speculator alone and never cache failures"""
+
+    @pytest.fixture
+    def server(self, server):
+        server.config['speculation'] = {'enabled': True}
+        server.speculator = Speculator.from_config(server.config, server.speculate_reply)
+        server.providers.usable = Mock(return_value=True)
+        return server
+
+    @pytest.mark.asyncio
+    async def test_draft_not_charged_to_budgets(self, server):
+        """Test a draft fills the speculation bucket but not the channel or persona budget"""
+        response = Mock(content=[Mock(text="Drafted reply")], usage=Mock(input_tokens=400, output_tokens=100))
+        server.providers.complete = AsyncMock(return_value=("anthropic", response))
+
+        server.ingest_posts(server.channel_id, [make_post("p1", "@kiro can you review the cache change?")])
+        await server.speculator.wait()
+
+        assert len(server.speculator.drafts) == 1
+        assert server.speculator.bucket.total > 0
+        assert all(bucket['total_tokens'] == 0 for bucket in server.budget_governor.snapshot().values())
+        assert server.providers.complete.await_args.kwargs['charge_discarded'] is False
+
+    @pytest.mark.asyncio
+    async def test_generation_error_stores_no_draft(self, server):
+        """Test a failed generation is dropped rather than cached as an error message draft"""
+        server.providers.complete = AsyncMock(side_effect=RuntimeError("overloaded"))
+
+        server.ingest_posts(server.channel_id, [make_post("p1", "@kiro can you review the cache change?")])
+        await server.speculator.wait()
+
+        assert server.speculator.drafts == {}
+        assert server.speculator.take("anything") is None
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test suite for the batch tool
+"""
+
+import pytest
+import os
+import sys
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from mcp.types import CallToolRequest, CallToolRequestParams, TextContent
+
+from src.tool_batch import plan_batch, run_batch, OK, FAILED, SKIPPED
+
+
+class TestPlanBatch:
+    """Test batch validation"""
+
+    def test_defaults_and_validation(self):
+        """Test ids default by position and bad batches are rejected"""
+        planned = plan_batch([{'tool': "read_discussion"}, {'tool': "contribute", 'depends_on': ["op1"]}])
+        assert [op['id'] for op in planned] == ["op1", "op2"]
+        assert planned[1]['arguments'] == {}
+
+        for operations, error in [
+            ([], "non-empty"),
+            ([{'tool': "batch"}], "cannot be batched"),
+            ([{'tool': "read_discussion", 'depends_on': ["nope"]}], "unknown operation"),
+            ([{'id': "a", 'tool': "x", 'depends_on': ["b"]}, {'id': "b", 'tool': "x", 'depends_on': ["a"]}], "cycle"),
+        ]:
+            with pytest.raises(ValueError, match=error):
+                plan_batch(operations)
+
+
+class TestRunBatch:
+    """Test concurrent execution"""
+
+    @pytest.mark.asyncio
+    async def test_independent_operations_overlap(self):
+        """Test operations without dependencies run at the same time and dependents wait"""
+        running = set()
+        overlaps = []
+
+        async def call(tool, arguments):
+            running.add(arguments['n'])
+            await asyncio.sleep(0.01)
+            overlaps.append(set(running))
+            running.discard(arguments['n'])
+            return [TextContent(type="text", text=f"OK: {arguments['n']}")]
+
+        results = await run_batch(plan_batch([
+            {'id': "a", 'tool': "t", 'arguments': {'n': 1}},
+            {'id': "b", 'tool': "t", 'arguments': {'n': 2}},
+            {'id': "c", 'tool': "t", 'arguments': {'n': 3}, 'depends_on': ["a", "b"]},
+        ]), call)
+
+        assert [result['status'] for result in results] == [OK, OK, OK]
+        assert {1, 2} in overlaps
+        assert overlaps[-1] == {3}
+
+    @pytest.mark.asyncio
+    async def test_failed_dependency_skips(self):
+        """Test dependents of a failed operation are skipped while independent ones still run"""
+        async def call(tool, arguments):
+            if tool == "boom":
+                raise RuntimeError("upstream down")
+            return [TextContent(type="text", text="ERROR: nope" if tool == "bad" else "fine")]
+
+        results = await run_batch(plan_batch([
+            {'id': "a", 'tool': "boom"}, {'id': "b", 'tool': "ok", 'depends_on': ["a"]},
+            {'id': "c", 'tool': "bad"}, {'id': "d", 'tool': "ok"},
+        ]), call)
+
+        assert [result['status'] for result in results] == [FAILED, SKIPPED, FAILED, OK]
+        assert "RuntimeError" in results[0]['text']
+
+
+class TestBatchTool:
+    """Test the batch tool end to end"""
+
+    @pytest.mark.asyncio
+    async def test_read_then_contribute(self, server):
+        """Test a read/context/contribute workflow runs in one call"""
+        server.mattermost = True
+        server.mattermost_token = "bot-token"
+        server.usernames = {'u1': 'craig'}
+        posts = {'p1': {'id': 'p1', 'user_id': 'u1', 'message': "Should we cache reads?", 'create_at': 1000, 'root_id': ''}}
+        server.mattermost_request = AsyncMock(side_effect=lambda method, path, **kwargs: Mock(
+            status_code=200 if method == "GET" else 201, json=Mock(return_value={'posts': posts} if method == "GET" else {'id': "new"})))
+        server.generate_response = AsyncMock(return_value="Yes, cache them")
+
+        handler = server.server.request_handlers[CallToolRequest]
+        result = await handler(CallToolRequest(method="tools/call", params=CallToolRequestParams(name="batch", arguments={
+            "operations": [
+                {"id": "read", "tool": "read_discussion", "arguments": {"limit": 5}},
+                {"id": "context", "tool": "get_conversation_context"},
+                {"id": "reply", "tool": "contribute", "arguments": {"message": "@kiro thoughts?", "persona": "kiro"},
+                 "depends_on": ["read", "context"]},
+            ]
+        })))
+
+        text = result.root.content[0].text
+        assert text.startswith("BATCH: 3 operations")
+        assert "(3 ok, 0 failed, 0 skipped)" in text
+        assert "--- reply: contribute (ok" in text
+        assert "craig: Should we cache reads?" in text
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Test suite for per-tool-call tracing
+"""
+
+import pytest
+import os
+import sys
+import json
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from mcp.types import CallToolRequest, CallToolRequestParams
+
+from src.tracing import (
+    Tracer, BatchSpanProcessor, InMemorySpanExporter, FileSpanExporter, span, current_span, detached_task,
+    STATUS_ERROR
+)
+
+
+def make_tracer():
+    exporter = InMemorySpanExporter()
+    processor = BatchSpanProcessor(exporter)
+    return Tracer(processor), processor, exporter
+
+
+class TestTracer:
+    """Test span creation and export"""
+
+    def test_children_share_trace(self):
+        """Test nested spans link to their parent and export on end"""
+        tracer, processor, exporter = make_tracer()
+
+        with tracer.start_span("tool/contribute", root=True) as root:
+            with span("cache.lookup", **{'cache.key': "k"}) as child:
+                assert current_span() is child
+            assert current_span() is root
+        processor.force_flush()
+
+        child_span, root_span = exporter.spans
+        assert child_span.trace_id == root_span.trace_id
+        assert child_span.parent_span_id == root_span.span_id
+        assert root_span.parent_span_id is None
+        assert child_span.attributes == {'cache.key': "k"}
+
+    def test_span_outside_trace_is_noop(self):
+        """Test module-level spans do nothing without an active trace"""
+        with span("orphan") as orphan:
+            orphan.set_attribute("x", 1)
+        assert not orphan.sampled
+        assert current_span() is None
+
+    def test_exception_marks_error(self):
+        """Test an exception escaping a span records it and sets error status"""
+        tracer, processor, exporter = make_tracer()
+
+        with pytest.raises(ValueError):
+            with tracer.start_span("tool/x", root=True):
+                raise ValueError("boom")
+        processor.force_flush()
+
+        assert exporter.spans[0].status == STATUS_ERROR
+        assert exporter.spans[0].events[0]['name'] == "exception"
+
+    def test_file_exporter_writes_otlp(self, tmp_path):
+        """Test the file exporter writes OTLP resourceSpans lines"""
+        path = tmp_path / "traces.jsonl"
+        processor = BatchSpanProcessor(FileSpanExporter(str(path)))
+        tracer = Tracer(processor)
+
+        with tracer.start_span("tool/read_discussion", root=True, **{'mcp.tool': "read_discussion"}):
+            pass
+        processor.force_flush()
+
+        request = json.loads(path.read_text().splitlines()[0])
+        otlp_span = request['resourceSpans'][0]['scopeSpans'][0]['spans'][0]
+        assert otlp_span['name'] == "tool/read_discussion"
+        assert len(otlp_span['traceId']) == 32
+        assert otlp_span['attributes'] == [{'key': 'mcp.tool', 'value': {'stringValue': 'read_discussion'}}]
+
+    def test_file_exporter_rotates(self, tmp_path):
+        """Test the trace file rotates once it reaches max_bytes"""
+        path = tmp_path / "traces.jsonl"
+        exporter = FileSpanExporter(str(path), max_bytes=200, backups=1)
+        tracer = Tracer(None)
+        for _ in range(3):
+            with tracer.start_span("tool/x", root=True) as root:
+                pass
+            exporter.export([root])
+
+        assert (tmp_path / "traces.jsonl.1").exists()
+        assert len(path.read_text().splitlines()) == 1
+
+    @pytest.mark.asyncio
+    async def test_detached_task_starts_new_trace(self):
+        """Test background tasks started inside a tool call do not attach spans to it"""
+        exporter = InMemorySpanExporter()
+        processor = BatchSpanProcessor(exporter)
+        tracer = Tracer(processor)
+
+        async def background():
+            await asyncio.sleep(0)
+            assert current_span() is None
+            with span("late.child"):
+                pass
+            with tracer.start_span("sync/watch", root=True) as root:
+                return root
+
+        with tracer.start_span("tool/subscribe_notifications", root=True) as tool_root:
+            task = detached_task(background())
+        root = await task
+        processor.force_flush()
+
+        assert root.trace_id != tool_root.trace_id
+        assert [s.name for s in exporter.spans] == ["tool/subscribe_notifications", "sync/watch"]
+
+    def test_disabled_tracer_exports_nothing(self):
+        """Test exporter none yields an unsampled tracer"""
+        tracer = Tracer.from_config({'tracing': {'exporter': 'none'}})
+
+        with tracer.start_span("tool/x", root=True) as root:
+            pass
+        assert not tracer.enabled and not root.sampled
+
+
+class TestToolCallTracing:
+    """Test the server traces tool calls end to end"""
+
+    @pytest.fixture
+    def server(self, server):
+        server.tracer, server.processor, server.exporter = make_tracer()
+        server.mattermost = True
+        server.mattermost_token = "bot-token"
+        server.mattermost_base_url = "http://localhost:8065/api/v4"
+        return server
+
+    async def call_tool(self, server, name, arguments):
+        handler = server.server.request_handlers[CallToolRequest]
+        return await handler(CallToolRequest(method="tools/call",
+                                             params=CallToolRequestParams(name=name, arguments=arguments)))
+
+    @pytest.mark.asyncio
+    async def test_contribute_trace(self, server):
+        """Test contribute yields a root span with context, generation and upstream children"""
+        response = SimpleNamespace(content=[SimpleNamespace(text="Looks good")],
+                                   usage=SimpleNamespace(input_tokens=10, output_tokens=5))
+        server.anthropic_client = Mock()
+        server.anthropic_client.messages.create = Mock(return_value=response)
+        with patch('requests.Session.request', return_value=Mock(status_code=201, json=Mock(return_value={}))):
+            await self.call_tool(server, "contribute", {"message": "@kiro thoughts?", "persona": "kiro"})
+        server.processor.force_flush()
+
+        spans = {s.name: s for s in server.exporter.spans}
+        root = spans["tool/contribute"]
+        assert spans["build_context"].parent_span_id == root.span_id
+        assert spans["model.completion"].trace_id == root.trace_id
+        assert spans["retry.attempt"].parent_span_id == spans["anthropic.messages.create"].span_id
+        assert spans["anthropic.messages.create"].attributes['gen_ai.usage.output_tokens'] == 5
+        assert spans["mattermost.request"].attributes['http.response.status_code'] == 201
+
+    @pytest.mark.asyncio
+    async def test_cache_lookup_span(self, server):
+        """Test a cached read records a cache hit under the tool span"""
+        server.message_cache.cache_messages(f"channel_{server.channel_id}_limit_5", "cached text")
+
+        await self.call_tool(server, "read_discussion", {"limit": 5})
+        server.processor.force_flush()
+
+        lookup = next(s for s in server.exporter.spans if s.name == "cache.lookup")
+        assert lookup.attributes['cache.hit'] is True